@@ -0,0 +1,94 @@
+import queue
+from collections import deque
+from datetime import datetime, timedelta
+
+# Blocchi più vicini di così vengono fusi in un unico elemento. È sotto PHRASE_TIMEOUT, quindi dentro
+# un elemento non c'è mai una pausa di fine frase: quella con l'audio precedente va misurata dal primo
+# istante dell'elemento, che per questo viene restituito insieme all'ultimo
+COALESCE_WINDOW = timedelta(seconds=3)
+# Audio più vecchio di così rispetto all'ultimo blocco viene scartato: non arriverebbe mai in tempo
+MAX_QUEUE_SECONDS = 30
+MAX_QUEUE_CHUNKS = 100
+
+class AudioQueue(queue.Queue):
+    """
+    Coda dei blocchi audio (dati, istante) prodotti dai recorder. Gli elementi estratti sono
+    (dati, istante del primo blocco, istante dell'ultimo blocco), perché più blocchi possono essere fusi.
+
+    ``lag()`` si misura dall'istante di inserimento, tenuto a parte: l'istante del blocco è quello
+    dell'audio, che nel replay a velocità maggiore di 1x è più avanti dell'orologio.
+
+    A ogni inserimento segnala l'evento ``wakeup``, così il thread di trascrizione resta fermo
+    finché non arriva audio invece di interrogare le code a intervalli.
+
+    La coda è limitata e non blocca mai il thread di cattura: i blocchi adiacenti vengono fusi in
+    un unico elemento e, se il modello non tiene il passo, vengono scartati i blocchi più vecchi
+    (quelli oltre ``max_seconds`` dall'ultimo, o in eccesso rispetto a ``maxsize``).
+    ``lag()`` e le statistiche permettono di vedere quando succede.
+    """
+    def __init__(self, maxsize=MAX_QUEUE_CHUNKS, wakeup=None, max_seconds=MAX_QUEUE_SECONDS):
+        super().__init__(maxsize)
+        self.wakeup = wakeup
+        self.max_age = timedelta(seconds=max_seconds)
+        self.dropped_chunks = 0
+        self.coalesced_chunks = 0
+
+    def _init(self, maxsize):
+        # Ogni elemento è una lista di parti (dati, istante, istante di inserimento) contigue
+        self.queue = deque()
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def put(self, item, block=True, timeout=None):
+        """Accoda senza mai bloccare: se la coda è piena viene scartato il blocco più vecchio"""
+        data, time_spoken = item
+        enqueued_at = datetime.utcnow()
+        with self.not_full:
+            if self.queue and time_spoken - self.queue[-1][-1][1] <= COALESCE_WINDOW:
+                self.queue[-1].append((data, time_spoken, enqueued_at))
+                self.coalesced_chunks += 1
+            else:
+                if 0 < self.maxsize <= len(self.queue):
+                    self.dropped_chunks += len(self.queue.popleft())
+                    self.unfinished_tasks -= 1
+                self.queue.append([(data, time_spoken, enqueued_at)])
+                self.unfinished_tasks += 1
+
+            while self.queue and time_spoken - self.queue[0][0][1] > self.max_age:
+                self.queue[0].pop(0)
+                self.dropped_chunks += 1
+                if not self.queue[0]:
+                    self.queue.popleft()
+                    self.unfinished_tasks -= 1
+
+            self.not_empty.notify()
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def _get(self):
+        parts = self.queue.popleft()
+        return b"".join(part[0] for part in parts), parts[0][1], parts[-1][1]
+
+    def clear(self):
+        """Scarta tutto l'audio in coda"""
+        with self.mutex:
+            self.queue.clear()
+            self.unfinished_tasks = 0
+            self.all_tasks_done.notify_all()
+
+    def lag(self, now=None):
+        """Secondi trascorsi dall'inserimento del blocco più vecchio ancora in coda"""
+        with self.mutex:
+            if not self.queue:
+                return 0.0
+            oldest = self.queue[0][0][2]
+        return max(0.0, ((now or datetime.utcnow()) - oldest).total_seconds())
+
+    def get_stats(self):
+        return {
+            "queue_depth": self.qsize(),
+            "lag": self.lag(),
+            "dropped_chunks": self.dropped_chunks,
+            "coalesced_chunks": self.coalesced_chunks,
+        }
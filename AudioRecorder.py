@@ -1,13 +1,63 @@
+import os
+import time
+import threading
 import custom_speech_recognition as sr
-import pyaudiowpatch as pyaudio
-from datetime import datetime
+# PyAudio (WASAPI) serve solo per i dispositivi reali: ReplayRecorder funziona anche senza
+try:
+    import pyaudiowpatch as pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+from custom_speech_recognition.dsp import StreamResampler
+from CaptureConfig import get_capture_config
+from CalibrationCache import get_cached_threshold, store_threshold
+from datetime import datetime, timedelta
 
 RECORD_TIMEOUT = 3
 ENERGY_THRESHOLD = 1000
 DYNAMIC_ENERGY_THRESHOLD = False
+# La soglia segue il rumore di fondo misurato di continuo (NoiseFloorTracker) invece di restare
+# quella della calibrazione iniziale
+NOISE_FLOOR_TRACKING = True
+# Formato dell'audio messo in coda: quello che i modelli si aspettano (16kHz mono)
+CAPTURE_SAMPLE_RATE = 16000
+# PortAudio non è thread-safe nell'inizializzazione e nell'apertura dei flussi: i recorder possono
+# essere creati e calibrati in parallelo, ma aprono e chiudono i dispositivi uno alla volta
+PORTAUDIO_LOCK = threading.RLock()
+# Attesa massima (secondi) perché il thread di ascolto apra il dispositivo
+STREAM_OPEN_TIMEOUT = 5
+# Risultati della prova dei dispositivi, per host API e nome: vedi list_working_microphones
+DEVICE_CACHE_PATH = os.environ.get("ECOUTE_DEVICE_CACHE", "device_cache.json")
+# Un dispositivo che non risponde entro questo tempo (secondi) viene considerato non funzionante
+PROBE_TIMEOUT = 2
+
+_device_cache = None
+
+def list_working_microphones(refresh=False):
+    """
+    Microfoni che ricevono audio, {indice: nome}. I dispositivi vengono provati in parallelo e il
+    risultato resta in cache: le chiamate successive tornano subito, riprovando solo i dispositivi
+    collegati o cambiati nel frattempo. refresh=True li riprova tutti.
+    """
+    global _device_cache
+    if not PYAUDIO_AVAILABLE:
+        raise ImportError("pyaudiowpatch not installed: pip install pyaudiowpatch")
+    if _device_cache is None:
+        _device_cache = sr.DeviceCache(DEVICE_CACHE_PATH)
+    if refresh:
+        _device_cache.invalidate()
+    # Il lock non va tenuto per tutta la chiamata: i thread di prova lo prendono per aprire e chiudere
+    # i flussi, mentre le letture procedono in parallelo
+    return sr.Microphone.list_working_microphones(parallel=True, timeout=PROBE_TIMEOUT, cache=_device_cache,
+                                                  lock=PORTAUDIO_LOCK)
 
 class BaseRecorder:
-    def __init__(self, source):
+    """
+    Registra una sorgente in background e mette in coda blocchi (dati, istante).
+    Se la sorgente non è già a CAPTURE_SAMPLE_RATE mono, l'audio viene convertito subito alla cattura:
+    SAMPLE_RATE, SAMPLE_WIDTH e channels descrivono l'audio in coda, non quello del dispositivo.
+    """
+    def __init__(self, source, sample_rate=CAPTURE_SAMPLE_RATE):
         self.recorder = sr.Recognizer()
         self.recorder.energy_threshold = ENERGY_THRESHOLD
         self.recorder.dynamic_energy_threshold = DYNAMIC_ENERGY_THRESHOLD
@@ -16,28 +66,119 @@ class BaseRecorder:
             raise ValueError("audio source can't be None")
 
         self.source = source
+        self.stop_listening = None
+        self.noise_tracker = sr.NoiseFloorTracker() if NOISE_FLOOR_TRACKING else None
+
+        self.SAMPLE_WIDTH = source.SAMPLE_WIDTH
+        if sample_rate is None or (source.SAMPLE_RATE == sample_rate and source.channels == 1):
+            self.resampler = None
+            self.SAMPLE_RATE = source.SAMPLE_RATE
+            self.channels = source.channels
+        else:
+            self.resampler = StreamResampler(source.SAMPLE_RATE, sample_rate, source.channels)
+            self.SAMPLE_RATE = sample_rate
+            self.channels = 1
+
+    def adjust_for_noise(self, device_name, msg, cache_key=None, recalibrate=False):
+        """
+        Misura il rumore di fondo per fissare la soglia di energia. Con cache_key la soglia viene
+        salvata e, finché è recente, riusata agli avvii successivi senza aprire il dispositivo.
+        """
+        if cache_key is not None and not recalibrate:
+            energy_threshold = get_cached_threshold(cache_key)
+            if energy_threshold is not None:
+                self.recorder.energy_threshold = energy_threshold
+                print(f"[INFO] Using cached ambient noise level for {device_name}.")
+                return
 
-    def adjust_for_noise(self, device_name, msg):
         print(f"[INFO] Adjusting for ambient noise from {device_name}. " + msg)
-        with self.source:
+        with PORTAUDIO_LOCK:
+            self.source.__enter__()
+        try:
+            # Solo apertura e chiusura sono serializzate: la misura dei dispositivi procede in parallelo
             self.recorder.adjust_for_ambient_noise(self.source)
+        finally:
+            with PORTAUDIO_LOCK:
+                self.source.__exit__(None, None, None)
+        if cache_key is not None:
+            store_threshold(cache_key, self.recorder.energy_threshold)
         print(f"[INFO] Completed ambient noise adjustment for {device_name}.")
 
+    def convert(self, data):
+        """Porta i dati della sorgente al formato messo in coda (SAMPLE_RATE, channels)"""
+        if self.resampler is not None:
+            data = self.resampler.process(data)
+        return data
+
     def record_into_queue(self, audio_queue):
         def record_callback(_, audio:sr.AudioData) -> None:
-            data = audio.get_raw_data()
-            audio_queue.put((data, datetime.utcnow()))
+            audio_queue.put((self.convert(audio.get_raw_data()), datetime.utcnow()))
+
+        self.start_listening(record_callback)
+
+    def start_listening(self, callback, event_callback=None):
+        """Avvia l'ascolto in background; per i dispositivi reali attende che il flusso sia aperto"""
+        with PORTAUDIO_LOCK:
+            self.stop_listening = self.recorder.listen_in_background(
+                self.source, callback, phrase_time_limit=RECORD_TIMEOUT, event_callback=event_callback,
+                noise_tracker=self.noise_tracker)
+            if isinstance(self.source, sr.Microphone):
+                deadline = time.monotonic() + STREAM_OPEN_TIMEOUT
+                while self.source.stream is None and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+    def get_capture_stats(self):
+        """Audio perso in cattura: dati scartati perché il buffer ad anello era pieno e overflow segnalati da PortAudio"""
+        stream = self.source.stream
+        if stream is None or not hasattr(stream, "ring"):
+            return {}
+        return {
+            "buffered_bytes": stream.ring.available(),
+            "overrun_bytes": stream.overrun_bytes,
+            "overrun_count": stream.overrun_count,
+            "input_overflows": stream.input_overflows,
+        }
+
+    def get_noise_stats(self):
+        """Rumore di fondo stimato, soglia di energia in uso e frazione dell'audio sopra soglia"""
+        if self.noise_tracker is None:
+            return {"energy_threshold": self.recorder.energy_threshold}
+        return self.noise_tracker.get_stats()
 
-        self.recorder.listen_in_background(self.source, record_callback, phrase_time_limit=RECORD_TIMEOUT)
+    def stop(self, wait_for_stop=False):
+        """Ferma l'ascolto in background avviato da record_into_queue"""
+        if self.stop_listening is not None:
+            self.stop_listening(wait_for_stop)
+            self.stop_listening = None
 
-class DefaultMicRecorder(BaseRecorder):
-    def __init__(self):
-        super().__init__(source=sr.Microphone(sample_rate=16000))
-        self.adjust_for_noise("Default Mic", "Please make some noise from the Default Mic...")
+class MicRecorder(BaseRecorder):
+    """
+    Registra un microfono qualsiasi, indicato dall'indice del dispositivo PortAudio (None = predefinito).
+    recalibrate=True ripete la misura del rumore di fondo anche se ce n'è una recente in cache.
+    """
+    def __init__(self, device_index=None, name=None, recalibrate=False):
+        if not PYAUDIO_AVAILABLE:
+            raise ImportError("pyaudiowpatch not installed: pip install pyaudiowpatch")
+        with PORTAUDIO_LOCK, pyaudio.PyAudio() as p:
+            device_info = p.get_default_input_device_info() if device_index is None else p.get_device_info_by_index(device_index)
+            config = get_capture_config(device_info, sample_rate=16000, channels=1)
+            # Anche il costruttore inizializza e termina PortAudio: va fatto sotto il lock
+            source = sr.CallbackMicrophone(device_index=device_index, sample_rate=config.sample_rate,
+                                           chunk_size=config.chunk_size)
+        super().__init__(source=source)
+        self.name = name or device_info["name"]
+        self.adjust_for_noise(self.name, f"Please make some noise from {self.name}...",
+                              cache_key=f"mic:{device_info['name']}", recalibrate=recalibrate)
+
+class DefaultMicRecorder(MicRecorder):
+    def __init__(self, recalibrate=False):
+        super().__init__(name="Default Mic", recalibrate=recalibrate)
 
 class DefaultSpeakerRecorder(BaseRecorder):
-    def __init__(self):
-        with pyaudio.PyAudio() as p:
+    def __init__(self, recalibrate=False):
+        if not PYAUDIO_AVAILABLE:
+            raise ImportError("pyaudiowpatch not installed: pip install pyaudiowpatch")
+        with PORTAUDIO_LOCK, pyaudio.PyAudio() as p:
             wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
             default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
             
@@ -49,10 +190,47 @@ class DefaultSpeakerRecorder(BaseRecorder):
                 else:
                     print("[ERROR] No loopback device found.")
         
-        source = sr.Microphone(speaker=True,
-                               device_index= default_speakers["index"],
-                               sample_rate=int(default_speakers["defaultSampleRate"]),
-                               chunk_size=pyaudio.get_sample_size(pyaudio.paInt16),
-                               channels=default_speakers["maxInputChannels"])
+            config = get_capture_config(default_speakers)
+            # Anche il costruttore inizializza e termina PortAudio: va fatto sotto il lock
+            source = sr.CallbackMicrophone(speaker=True,
+                                   device_index= default_speakers["index"],
+                                   sample_rate=config.sample_rate,
+                                   chunk_size=config.chunk_size,
+                                   channels=config.channels)
         super().__init__(source=source)
-        self.adjust_for_noise("Default Speaker", "Please make or play some noise from the Default Speaker...")
\ No newline at end of file
+        self.name = "Default Speaker"
+        self.adjust_for_noise(self.name, "Please make or play some noise from the Default Speaker...",
+                              cache_key=f"speaker:{default_speakers['name']}", recalibrate=recalibrate)
+
+class ReplayRecorder(BaseRecorder):
+    """
+    Riproduce un file audio (WAV/FLAC/AIFF) attraverso la stessa catena dei dispositivi reali, senza scheda audio.
+    speed: 1 tempo reale, N più veloce, None il più in fretta possibile. Gli istanti dei blocchi in coda
+    seguono la posizione nel file, così le pause tra le frasi restano le stesse a qualsiasi velocità.
+    """
+    def __init__(self, path, speed=1.0, name=None):
+        source = sr.ReplayFile(path, speed)
+        with source:
+            pass  # frequenza e formato del file sono noti solo dopo l'apertura
+        super().__init__(source=source)
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        self.start_time = None
+        # Istante (nel file) dell'ultimo blocco di ogni frase -> time.monotonic() in cui è stato messo in coda
+        self.enqueued_at = {}
+
+    @property
+    def finished(self):
+        # Il file è finito e il thread di ascolto ha consegnato l'ultima frase (chiudendo la sorgente)
+        return self.source.finished.is_set() and self.source.stream is None
+
+    def record_into_queue(self, audio_queue):
+        self.start_time = datetime.utcnow()
+
+        def on_segment(_, event):
+            if event.kind != "end":
+                return
+            time_spoken = self.start_time + timedelta(seconds=event.end_sample / self.source.SAMPLE_RATE)
+            self.enqueued_at[time_spoken] = time.monotonic()
+            audio_queue.put((self.convert(event.audio.get_raw_data()), time_spoken))
+
+        self.start_listening(lambda *_: None, event_callback=on_segment)
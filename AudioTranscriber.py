@@ -1,159 +1,533 @@
-import wave
-import os
+import re
+import time
+import queue
 import threading
-import tempfile
-import custom_speech_recognition as sr
-import io
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-import pyaudiowpatch as pyaudio
-from heapq import merge
+from PhraseBuffer import PhraseBuffer
+from Transcript import Transcript, MAX_PHRASES
+from VoiceActivityDetector import VAD_BACKEND, get_vad
 
 PHRASE_TIMEOUT = 3.05
-MAX_PHRASES = 10
+STREAMING_MODE = True
+# Intervallo di polling usato solo con code che non supportano il risveglio (queue.Queue semplici)
+POLL_INTERVAL = 0.1
+# Attesa massima (secondi) perché anche le altre sorgenti abbiano audio prima di formare un batch
+BATCH_MAX_WAIT = 0.05
+# Ritardo (secondi) oltre il quale una sorgente smette di decodificare i parziali e trascrive
+# ogni frase una sola volta, alla sua chiusura, finché non recupera
+MAX_LAG = 2.0
+# Limite dei worker quando max_workers non è indicato
+MAX_WORKERS = 32
+# Frasi concluse in attesa del modello definitivo (get_final_transcription) oltre le quali le nuove
+# restano con il testo dei parziali, così il modello grande non accumula ritardo (vedi dropped_refinements)
+MAX_PENDING_REFINEMENTS = 4
+
+def normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
 
 class AudioTranscriber:
-    def __init__(self, mic_source, speaker_source, model):
-        self.transcript_data = {"You": [], "Speaker": []}
+    """
+    Trascrive in parallelo un numero qualsiasi di sorgenti audio.
+
+    Ogni sorgente viene registrata con add_source sotto un'etichetta (che compare nella trascrizione),
+    con la propria coda, il proprio accumulatore e un peso di scheduling: quando più sorgenti sono
+    pronte di quanti worker siano liberi, passano prima quelle con peso per ritardo maggiore.
+    mic_source e speaker_source registrano la coppia classica "You"/"Speaker".
+
+    Con i modelli a due livelli (supports_refinement) i parziali vengono dal modello veloce e, dopo
+    PHRASE_TIMEOUT di silenzio, la frase conclusa viene ritrascritta una volta sola con
+    get_final_transcription da un worker dedicato; il testo definitivo sostituisce la stessa riga.
+    Una frase che riempirebbe l'accumulatore (MAX_PHRASE_SECONDS) viene chiusa e ritrascritta subito,
+    e quella che segue prosegue su una nuova riga.
+    """
+    def __init__(self, mic_source, speaker_source, model, streaming=STREAMING_MODE, max_workers=None,
+                 batch_max_wait=BATCH_MAX_WAIT, vad=VAD_BACKEND, max_lag=MAX_LAG):
+        self.transcript = Transcript([], MAX_PHRASES)
         self.transcript_changed_event = threading.Event()
+        self.transcript_lock = threading.RLock()
         self.audio_model = model
-        self.audio_sources = {
-            "You": {
-                "sample_rate": mic_source.SAMPLE_RATE,
-                "sample_width": mic_source.SAMPLE_WIDTH,
-                "channels": mic_source.channels,
-                "last_sample": bytes(),
-                "last_spoken": None,
-                "new_phrase": True,
-                "process_data_func": self.process_mic_data
-            },
-            "Speaker": {
-                "sample_rate": speaker_source.SAMPLE_RATE,
-                "sample_width": speaker_source.SAMPLE_WIDTH,
-                "channels": speaker_source.channels,
-                "last_sample": bytes(),
+        self.model_slots = self.create_model_slots(model)
+        self.streaming = streaming
+        self.audio_ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.transcribe_thread = None
+        # Per default un worker per sorgente: le sorgenti vengono decodificate in parallelo
+        self.max_workers = max_workers
+        self.in_flight = set()
+        # None disattiva il batching anche con modelli che lo supportano
+        self.batch_max_wait = batch_max_wait
+        # None disattiva la modalità "solo frasi finali" quando il modello è in ritardo
+        self.max_lag = max_lag
+        self.vad = vad
+        # Worker del modello definitivo, creato dal ciclo di dispatch
+        self.refine_pool = None
+        self.pending_refinements = 0
+        # Frasi rimaste con il testo dei parziali perché c'erano già MAX_PENDING_REFINEMENTS in attesa
+        self.dropped_refinements = 0
+        self.audio_sources = {}
+        if mic_source is not None:
+            self.add_source("You", mic_source)
+        if speaker_source is not None:
+            self.add_source("Speaker", speaker_source)
+
+    def add_source(self, label, source, audio_queue=None, weight=1.0):
+        """
+        Registra una sorgente (recorder o AudioSource con SAMPLE_RATE, SAMPLE_WIDTH e channels).
+        La coda può essere indicata qui o più tardi in start; si possono aggiungere sorgenti anche a trascrizione avviata.
+        """
+        with self.transcript_lock:
+            if label in self.audio_sources:
+                raise ValueError(f"Audio source '{label}' already registered")
+            self.audio_sources[label] = {
+                "source": source,
+                "sample_rate": source.SAMPLE_RATE,
+                "sample_width": source.SAMPLE_WIDTH,
+                "channels": source.channels,
+                "phrase_buffer": PhraseBuffer(source.SAMPLE_RATE, source.channels),
+                # Tutto l'audio della frase, anche quello già confermato, per la trascrizione definitiva
+                "phrase_audio": None,
+                "refine_pending": False,
+                "queue": None,
+                "weight": weight,
                 "last_spoken": None,
                 "new_phrase": True,
-                "process_data_func": self.process_speaker_data
+                "entry_id": None,
+                "committed_text": "",
+                "hypothesis": [],
+                "reset_pending": False,
+                "vad": get_vad(self.vad),
+                "last_arrival": None,
+                "pending_final": False,
+                "catching_up": False,
+                "last_decode_seconds": 0.0
             }
-        }
+            if audio_queue is not None:
+                self.attach_queue(label, audio_queue)
+
+    def attach_queue(self, label, audio_queue):
+        """Collega la coda da cui leggere l'audio della sorgente"""
+        with self.transcript_lock:
+            self.audio_sources[label]["queue"] = audio_queue
+            if hasattr(audio_queue, "wakeup"):
+                audio_queue.wakeup = self.audio_ready
+        self.audio_ready.set()
 
     def update_model(self, new_model):
-        """Aggiorna il modello di trascrizione"""
+        """Aggiorna il modello di trascrizione (model=None nel costruttore: l'audio attende il primo modello)"""
+        self.model_slots = self.create_model_slots(new_model)
         self.audio_model = new_model
         print(f"[INFO] Modello di trascrizione aggiornato")
+        self.audio_ready.set()
 
-    def transcribe_audio_queue(self, speaker_queue, mic_queue):
-        import queue
-        
-        while True:
-            pending_transcriptions = []
-            
-            mic_data = []
-            while True:
-                try:
-                    data, time_spoken = mic_queue.get_nowait()
-                    self.update_last_sample_and_phrase_status("You", data, time_spoken)
-                    mic_data.append((data, time_spoken))
-                except queue.Empty:
-                    break
-                    
-            speaker_data = []
-            while True:
-                try:
-                    data, time_spoken = speaker_queue.get_nowait()
-                    self.update_last_sample_and_phrase_status("Speaker", data, time_spoken)
-                    speaker_data.append((data, time_spoken))
-                except queue.Empty:
+    @staticmethod
+    def create_model_slots(model):
+        """
+        Semaforo che limita le chiamate contemporanee al modello a quelle che il backend sopporta
+        (concurrent_calls): parziali, batch e trascrizioni definitive passano tutti da qui
+        """
+        return threading.BoundedSemaphore(getattr(model, "concurrent_calls", 1))
+
+    def use_batching(self):
+        return self.batch_max_wait is not None and getattr(self.audio_model, "supports_batching", False)
+
+    def use_refinement(self):
+        return getattr(self.audio_model, "supports_refinement", False)
+
+    def start(self, speaker_queue=None, mic_queue=None):
+        """
+        Avvia il thread di trascrizione, che si sveglia solo quando i recorder accodano audio.
+        speaker_queue e mic_queue, se indicate, vengono collegate alle sorgenti "Speaker" e "You".
+        """
+        assert self.transcribe_thread is None, "Transcriber already started"
+        for label, audio_queue in (("Speaker", speaker_queue), ("You", mic_queue)):
+            if audio_queue is not None:
+                self.attach_queue(label, audio_queue)
+        self.stop_event.clear()
+        self.transcribe_thread = threading.Thread(target=self.transcribe_audio_queue)
+        self.transcribe_thread.daemon = True
+        self.transcribe_thread.start()
+
+    def stop(self, timeout=None):
+        """Ferma il thread di trascrizione dopo il ciclo in corso"""
+        self.stop_event.set()
+        self.audio_ready.set()
+        if self.transcribe_thread is not None:
+            self.transcribe_thread.join(timeout)
+            self.transcribe_thread = None
+
+    def transcribe_audio_queue(self):
+        """
+        Ciclo di dispatch: a ogni risveglio affida le sorgenti con audio in coda ai worker del pool,
+        saltando quelle già in decodifica, così ogni sorgente è trascritta da un solo worker alla volta.
+        Se il modello supporta il batching, le sorgenti pronte vengono decodificate insieme in un'unica
+        chiamata, aspettando al massimo batch_max_wait che si aggiungano anche le altre.
+        Le chiamate al modello restano comunque limitate da model_slots (concurrent_calls del backend).
+        """
+        # Eventuale audio accodato prima dell'avvio va elaborato subito
+        self.audio_ready.set()
+
+        batch_deadline = None
+        final_deadline = None
+        # Al massimo un lavoro per sorgente è in corso, quindi i thread creati sono tanti quante le
+        # sorgenti, anche quelle aggiunte dopo l'avvio. Le trascrizioni definitive hanno un worker a
+        # parte: il modello grande non rallenta i parziali e chiude dopo che i worker hanno finito
+        with ThreadPoolExecutor(max_workers=1) as self.refine_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers or MAX_WORKERS) as pool:
+            while not self.stop_event.is_set():
+                with self.transcript_lock:
+                    # Le code senza risveglio (queue.Queue semplici) vanno interrogate a intervalli
+                    event_driven = all(hasattr(source_info["queue"], "wakeup")
+                                       for source_info in self.audio_sources.values() if source_info["queue"] is not None)
+                timeout = None if event_driven else POLL_INTERVAL
+                for deadline in (batch_deadline, final_deadline):
+                    if deadline is not None:
+                        remaining = max(0.0, deadline - time.monotonic())
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                self.audio_ready.wait(timeout)
+                # L'evento va azzerato prima di controllare le code: un blocco arrivato nel frattempo
+                # lo reimposta e genera un nuovo giro, quindi nessun risveglio va perso
+                self.audio_ready.clear()
+                if self.stop_event.is_set():
                     break
-            
-            if mic_data:
-                source_info = self.audio_sources["You"]
-                try:
-                    fd, path = tempfile.mkstemp(suffix=".wav")
-                    os.close(fd)
-                    source_info["process_data_func"](source_info["last_sample"], path)
-                    text = self.audio_model.get_transcription(path)
-                    if text != '' and text.lower() != 'you':
-                        latest_time = max(time for _, time in mic_data)
-                        pending_transcriptions.append(("You", text, latest_time))
-                except Exception as e:
-                    print(f"Transcription error for You: {e}")
-                finally:
-                    os.unlink(path)
-            
-            if speaker_data:
-                source_info = self.audio_sources["Speaker"]
-                try:
-                    fd, path = tempfile.mkstemp(suffix=".wav")
-                    os.close(fd)
-                    source_info["process_data_func"](source_info["last_sample"], path)
-                    text = self.audio_model.get_transcription(path)
-                    if text != '' and text.lower() != 'you':
-                        latest_time = max(time for _, time in speaker_data)
-                        pending_transcriptions.append(("Speaker", text, latest_time))
-                except Exception as e:
-                    print(f"Transcription error for Speaker: {e}")
-                finally:
-                    os.unlink(path)
-            
-            if pending_transcriptions:
-                pending_transcriptions.sort(key=lambda x: x[2])
-                for who_spoke, text, time_spoken in pending_transcriptions:
-                    self.update_transcript(who_spoke, text, time_spoken)
-                
-                self.transcript_changed_event.set()
-            
-            threading.Event().wait(0.1)
+                if self.audio_model is None:
+                    # Modello ancora in caricamento: l'audio resta in coda, update_model risveglia il ciclo
+                    continue
+
+                with self.transcript_lock:
+                    idle = [who for who, source_info in self.audio_sources.items()
+                            if who not in self.in_flight and source_info["queue"] is not None]
+                    ready = [who for who in idle if not self.audio_sources[who]["queue"].empty()]
+
+                    # Le frasi rimaste senza decodifica (sorgente in ritardo) si chiudono dopo PHRASE_TIMEOUT di
+                    # silenzio, e così quelle da ritrascrivere con il modello definitivo
+                    now = time.monotonic()
+                    final_deadline = None
+                    for who in idle:
+                        source_info = self.audio_sources[who]
+                        if who in ready or not (source_info["pending_final"] or source_info["refine_pending"]):
+                            continue
+                        deadline = source_info["last_arrival"] + PHRASE_TIMEOUT
+                        if deadline > now:
+                            final_deadline = deadline if final_deadline is None else min(final_deadline, deadline)
+                        elif source_info["pending_final"]:
+                            ready.append(who)
+                        else:
+                            self.in_flight.add(who)
+                            pool.submit(self.finalize_source, who)
+
+                    if not ready:
+                        batch_deadline = None
+                        continue
+                    # Con più sorgenti pronte che worker liberi, passano prima quelle più pesanti e più in ritardo
+                    ready.sort(key=self.scheduling_priority, reverse=True)
+                    if self.use_batching():
+                        if len(ready) < len(idle):
+                            if batch_deadline is None:
+                                batch_deadline = time.monotonic() + self.batch_max_wait
+                            if time.monotonic() < batch_deadline:
+                                continue
+                        batch_deadline = None
+                        jobs = [ready]
+                    else:
+                        jobs = [[who] for who in ready]
+                    self.in_flight.update(ready)
+
+                for speakers in jobs:
+                    pool.submit(self.process_sources, speakers)
+
+    def scheduling_priority(self, who_spoke):
+        source_info = self.audio_sources[who_spoke]
+        audio_queue = source_info["queue"]
+        lag = audio_queue.lag() if hasattr(audio_queue, "lag") else 0.0
+        return source_info["weight"] * (1.0 + lag)
+
+    def process_sources(self, speakers):
+        """Lavoro di un worker: svuota le code delle sorgenti, aggiorna le frasi e le trascrive"""
+        try:
+            latest_times = {}
+            for who_spoke in speakers:
+                source_info = self.audio_sources[who_spoke]
+                audio_queue = source_info["queue"]
+                lag = audio_queue.lag() if hasattr(audio_queue, "lag") else 0.0
+                latest_time = self.collect_audio(who_spoke, audio_queue)
+                if latest_time is not None:
+                    source_info["catching_up"] = self.max_lag is not None and lag > self.max_lag
+                    if source_info["catching_up"]:
+                        # In ritardo: niente parziali, la frase verrà decodificata una sola volta alla chiusura
+                        source_info["pending_final"] = True
+                        continue
+                    latest_times[who_spoke] = latest_time
+                elif source_info["pending_final"]:
+                    # Coda svuotata: la frase in sospeso viene chiusa e la sorgente è di nuovo in pari
+                    source_info["catching_up"] = False
+                    latest_times[who_spoke] = source_info["last_spoken"]
+
+            ready = list(latest_times)
+            decode_start = time.monotonic()
+            if len(ready) > 1:
+                texts = self.transcribe_batch(ready)
+            else:
+                texts = [self.transcribe_source(who_spoke) for who_spoke in ready]
+            decode_seconds = time.monotonic() - decode_start
+
+            for who_spoke, text in zip(ready, texts):
+                self.audio_sources[who_spoke]["pending_final"] = False
+                self.audio_sources[who_spoke]["last_decode_seconds"] = decode_seconds
+                self.publish_transcription(who_spoke, text, latest_times[who_spoke])
+        except Exception as e:
+            print(f"Transcription error for {', '.join(speakers)}: {e}")
+        finally:
+            with self.transcript_lock:
+                self.in_flight.difference_update(speakers)
+            # Ricontrolla le code: può essere arrivato audio mentre il worker era occupato
+            self.audio_ready.set()
+
+    def finalize_source(self, who_spoke):
+        """Lavoro di un worker: chiude la frase della sorgente rimasta in silenzio e la affida al modello definitivo"""
+        try:
+            if not self.audio_sources[who_spoke]["reset_pending"]:
+                self.finalize_phrase(who_spoke)
+            self.audio_sources[who_spoke]["refine_pending"] = False
+        except Exception as e:
+            print(f"Transcription error for {who_spoke}: {e}")
+        finally:
+            with self.transcript_lock:
+                self.in_flight.discard(who_spoke)
+            self.audio_ready.set()
+
+    def finalize_phrase(self, who_spoke):
+        """Chiude la frase corrente e, se il modello lo prevede, ne pianifica la trascrizione definitiva"""
+        source_info = self.audio_sources[who_spoke]
+        phrase_audio = source_info["phrase_audio"]
+        refine = source_info["refine_pending"] and not source_info["new_phrase"] and phrase_audio is not None
+        source_info["refine_pending"] = False
+        if refine and len(phrase_audio) > 0:
+            with self.transcript_lock:
+                accepted = self.pending_refinements < MAX_PENDING_REFINEMENTS
+                if accepted:
+                    self.pending_refinements += 1
+                else:
+                    self.dropped_refinements += 1
+            if accepted:
+                # Copia: l'accumulatore viene riusato subito dalla frase successiva
+                samples = phrase_audio.view().copy()
+                self.refine_pool.submit(self.refine_phrase, who_spoke, source_info["entry_id"], samples, source_info["sample_rate"])
+        self.reset_phrase(who_spoke)
+        source_info["new_phrase"] = True
+
+    def refine_phrase(self, who_spoke, entry_id, samples, sample_rate):
+        """Ritrascrive una frase conclusa con il modello definitivo e ne sostituisce la riga nella trascrizione"""
+        try:
+            with self.model_slots:
+                text = self.audio_model.get_final_transcription(samples, sample_rate)
+            if text == '' or text.lower() == 'you':
+                return
+            with self.transcript_lock:
+                # Una riga già uscita dalla trascrizione (o cancellata con clear) non esiste più e resta così
+                if self.transcript.update(entry_id, text):
+                    self.transcript_changed_event.set()
+        except Exception as e:
+            print(f"Refinement error for {who_spoke}: {e}")
+        finally:
+            with self.transcript_lock:
+                self.pending_refinements -= 1
 
-    def update_last_sample_and_phrase_status(self, who_spoke, data, time_spoken):
+    def collect_audio(self, who_spoke, audio_queue):
+        """Sposta nel buffer della frase tutto l'audio in coda; restituisce l'istante più recente o None"""
         source_info = self.audio_sources[who_spoke]
-        if source_info["last_spoken"] and time_spoken - source_info["last_spoken"] > timedelta(seconds=PHRASE_TIMEOUT):
-            source_info["last_sample"] = bytes()
+        if source_info["reset_pending"]:
+            self.reset_phrase(who_spoke)
             source_info["new_phrase"] = True
+            source_info["pending_final"] = False
+            source_info["refine_pending"] = False
+            source_info["reset_pending"] = False
+
+        latest_time = None
+        while True:
+            try:
+                # AudioQueue restituisce anche l'istante del primo blocco fuso: (dati, primo, ultimo)
+                data, *times = audio_queue.get_nowait()
+            except queue.Empty:
+                break
+            if source_info["vad"] is not None:
+                # I frame senza parlato non raggiungono né l'accumulatore né il modello
+                data = source_info["vad"].filter(data, source_info["sample_rate"], source_info["channels"])
+                if not data:
+                    continue
+            first_time, time_spoken = times[0], times[-1]
+            self.update_last_sample_and_phrase_status(who_spoke, data, time_spoken, first_time)
+            source_info["last_arrival"] = time.monotonic()
+            latest_time = time_spoken if latest_time is None else max(latest_time, time_spoken)
+        return latest_time
+
+    def publish_transcription(self, who_spoke, text, time_spoken):
+        if text == '' or text.lower() == 'you':
+            return
+        with self.transcript_lock:
+            # Un clear arrivato durante la decodifica invalida questo risultato
+            if not self.audio_sources[who_spoke]["reset_pending"]:
+                self.update_transcript(who_spoke, text, time_spoken)
+                self.audio_sources[who_spoke]["refine_pending"] = self.use_refinement()
+                self.transcript_changed_event.set()
+
+    def transcribe_source(self, who_spoke):
+        source_info = self.audio_sources[who_spoke]
+        samples = self.get_samples(who_spoke)
+        with self.model_slots:
+            if self.streaming:
+                return self.stream_transcription(who_spoke, samples, source_info["sample_rate"])
+            return self.audio_model.get_transcription_array(samples, source_info["sample_rate"])
+
+    def get_samples(self, who_spoke):
+        """Restituisce la frase corrente come array (frame, canali) senza passare da file WAV"""
+        source_info = self.audio_sources[who_spoke]
+        return source_info["phrase_buffer"].view()
+
+    def transcribe_batch(self, speakers):
+        """Decodifica più sorgenti con un'unica chiamata batch al modello"""
+        batch = [(self.get_samples(who_spoke), self.audio_sources[who_spoke]["sample_rate"]) for who_spoke in speakers]
+        with self.model_slots:
+            texts = self.audio_model.get_transcription_batch(batch)
+        if not self.streaming:
+            return texts
+        return [self.apply_hypothesis(who_spoke, [(word, None, None) for word in text.split()])
+                for who_spoke, text in zip(speakers, texts)]
+
+    def stream_transcription(self, who_spoke, samples, sample_rate):
+        """Trascrive solo la coda non ancora confermata della frase (local agreement)"""
+        get_words = getattr(self.audio_model, "get_transcription_words", None)
+        if get_words is not None:
+            words = get_words(samples, sample_rate)
         else:
-            source_info["new_phrase"] = False
+            words = [(word, None, None) for word in self.audio_model.get_transcription_array(samples, sample_rate).split()]
+        return self.apply_hypothesis(who_spoke, words)
 
-        source_info["last_sample"] += data
-        source_info["last_spoken"] = time_spoken 
+    def apply_hypothesis(self, who_spoke, words):
+        """
+        Le parole su cui due ipotesi consecutive concordano vengono confermate e,
+        se il modello fornisce i timestamp, l'audio corrispondente viene rimosso dal buffer.
+        Restituisce il testo completo della frase (confermato + ipotesi corrente).
+        """
+        source_info = self.audio_sources[who_spoke]
+        previous = source_info["hypothesis"]
+        agreed = 0
+        while (agreed < min(len(words), len(previous))
+               and normalize_word(words[agreed][0]) == normalize_word(previous[agreed][0])):
+            agreed += 1
 
-    def process_mic_data(self, data, temp_file_name):
-        audio_data = sr.AudioData(data, self.audio_sources["You"]["sample_rate"], self.audio_sources["You"]["sample_width"])
-        wav_data = io.BytesIO(audio_data.get_wav_data())
-        with open(temp_file_name, 'w+b') as f:
-            f.write(wav_data.read())
+        if agreed > 0 and words[agreed - 1][2] is not None:
+            # Conferma il prefisso stabile e scarta l'audio già decodificato
+            self.commit_words(who_spoke, words[:agreed], words[agreed - 1][2])
+            source_info["hypothesis"] = words[agreed:]
+        elif words and agreed == len(words) == len(previous):
+            # Senza timestamp si conferma solo un'ipotesi rimasta identica per intero
+            self.commit_words(who_spoke, words, None)
+            source_info["hypothesis"] = []
+        else:
+            source_info["hypothesis"] = words
 
-    def process_speaker_data(self, data, temp_file_name):
-        with wave.open(temp_file_name, 'wb') as wf:
-            wf.setnchannels(self.audio_sources["Speaker"]["channels"])
-            p = pyaudio.PyAudio()
-            wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-            wf.setframerate(self.audio_sources["Speaker"]["sample_rate"])
-            wf.writeframes(data)
+        tail = " ".join(word for word, _, _ in source_info["hypothesis"])
+        return " ".join(part for part in (source_info["committed_text"], tail) if part)
 
-    def update_transcript(self, who_spoke, text, time_spoken):
+    def commit_words(self, who_spoke, words, end_time):
         source_info = self.audio_sources[who_spoke]
-        transcript = self.transcript_data[who_spoke]
+        committed = " ".join(word for word, _, _ in words)
+        source_info["committed_text"] = " ".join(part for part in (source_info["committed_text"], committed) if part)
 
-        if source_info["new_phrase"] or len(transcript) == 0:
-            if len(transcript) > MAX_PHRASES:
-                transcript.pop(-1)
-            transcript.insert(0, (f"{who_spoke}: [{text}]\n\n", time_spoken))
+        if end_time is None:
+            source_info["phrase_buffer"].clear()
         else:
-            transcript[0] = (f"{who_spoke}: [{text}]\n\n", time_spoken)
+            source_info["phrase_buffer"].trim(int(end_time * source_info["sample_rate"]))
+
+    def update_last_sample_and_phrase_status(self, who_spoke, data, time_spoken, first_time=None):
+        """first_time è l'istante del primo blocco di data, se la coda ne ha fusi più d'uno"""
+        source_info = self.audio_sources[who_spoke]
+        # La pausa con la frase precedente va misurata dall'inizio dell'audio appena arrivato
+        gap_start = time_spoken if first_time is None else first_time
+        if source_info["last_spoken"] and gap_start - source_info["last_spoken"] > timedelta(seconds=PHRASE_TIMEOUT):
+            self.close_phrase(who_spoke)
+        else:
+            phrase_audio = source_info["phrase_audio"]
+            frame_count = len(data) // (source_info["sample_width"] * source_info["channels"])
+            if phrase_audio is not None and len(phrase_audio) > 0 and len(phrase_audio) + frame_count > phrase_audio.capacity:
+                # Un monologo più lungo dell'accumulatore ne perderebbe l'inizio: la frase viene chiusa
+                # qui, con tutto il suo audio per il modello definitivo, e questo blocco apre la successiva
+                self.close_phrase(who_spoke)
+
+        source_info["phrase_buffer"].append(data)
+        if self.use_refinement():
+            if source_info["phrase_audio"] is None:
+                source_info["phrase_audio"] = PhraseBuffer(source_info["sample_rate"], source_info["channels"])
+            source_info["phrase_audio"].append(data)
+        source_info["last_spoken"] = time_spoken
+
+    def close_phrase(self, who_spoke):
+        """Chiude la frase corrente prima che arrivi l'audio della successiva"""
+        source_info = self.audio_sources[who_spoke]
+        if source_info["pending_final"]:
+            # La frase non è mai stata decodificata: va trascritta prima di scartarne l'audio
+            self.publish_transcription(who_spoke, self.transcribe_source(who_spoke), source_info["last_spoken"])
+            source_info["pending_final"] = False
+        # new_phrase resta vero finché la nuova frase non entra nella trascrizione
+        self.finalize_phrase(who_spoke)
+
+    def reset_phrase(self, who_spoke):
+        source_info = self.audio_sources[who_spoke]
+        source_info["phrase_buffer"].clear()
+        if source_info["phrase_audio"] is not None:
+            source_info["phrase_audio"].clear()
+        source_info["committed_text"] = ""
+        source_info["hypothesis"] = []
+
+    def update_transcript(self, who_spoke, text, time_spoken):
+        source_info = self.audio_sources[who_spoke]
+
+        if source_info["new_phrase"] or not self.transcript.update(source_info["entry_id"], text, time_spoken):
+            source_info["entry_id"] = self.transcript.add(who_spoke, text, time_spoken)
+            source_info["new_phrase"] = False
+
+    def get_pipeline_stats(self):
+        """Profondità delle code, ritardo e stato di ogni sorgente, per capire se il modello tiene il passo"""
+        stats = {}
+        for who_spoke, source_info in list(self.audio_sources.items()):
+            audio_queue = source_info["queue"]
+            source_stats = audio_queue.get_stats() if hasattr(audio_queue, "get_stats") else {}
+            if hasattr(source_info["source"], "get_noise_stats"):
+                source_stats.update(source_info["source"].get_noise_stats())
+            source_stats.update({
+                "catching_up": source_info["catching_up"],
+                "last_decode_seconds": source_info["last_decode_seconds"],
+                "buffered_seconds": source_info["phrase_buffer"].duration,
+                "pending_refinements": self.pending_refinements,
+                "dropped_refinements": self.dropped_refinements,
+            })
+            stats[who_spoke] = source_stats
+        return stats
 
     def get_transcript(self):
-        combined_transcript = list(merge(
-            self.transcript_data["You"], self.transcript_data["Speaker"], 
-            key=lambda x: x[1], reverse=True))
-        combined_transcript = combined_transcript[:MAX_PHRASES]
-        return "".join([t[0] for t in combined_transcript])
+        return self.transcript.render()
+
+    def get_transcript_since(self, version):
+        """None se nulla è cambiato dopo ``version``, altrimenti le righe cambiate (vedi Transcript.get_since)"""
+        return self.transcript.get_since(version)
     
     def clear_transcript_data(self):
-        self.transcript_data["You"].clear()
-        self.transcript_data["Speaker"].clear()
+        with self.transcript_lock:
+            self.transcript.clear()
 
-        self.audio_sources["You"]["last_sample"] = bytes()
-        self.audio_sources["Speaker"]["last_sample"] = bytes()
+            # I buffer appartengono ai worker: il reset viene applicato all'inizio del prossimo lavoro
+            for source_info in self.audio_sources.values():
+                source_info["reset_pending"] = True
+        self.transcript_changed_event.set()
 
-        self.audio_sources["You"]["new_phrase"] = True
-        self.audio_sources["Speaker"]["new_phrase"] = True
\ No newline at end of file
+    def clear_queues(self):
+        """Scarta l'audio ancora in coda in tutte le sorgenti registrate"""
+        with self.transcript_lock:
+            audio_queues = [source_info["queue"] for source_info in self.audio_sources.values()]
+        for audio_queue in audio_queues:
+            if hasattr(audio_queue, "clear"):
+                audio_queue.clear()
+            elif audio_queue is not None:
+                with audio_queue.mutex:
+                    audio_queue.queue.clear()
@@ -0,0 +1,40 @@
+import os
+import json
+import time
+import threading
+
+# Soglie di energia misurate per dispositivo: {"nome dispositivo": {"energy_threshold": 312.5, "measured_at": ...}}
+CALIBRATION_CACHE_PATH = os.environ.get("ECOUTE_CALIBRATION_CACHE", "calibration_cache.json")
+# Oltre questa età (secondi) la misura va ripetuta: il rumore di fondo della stanza può essere cambiato
+CALIBRATION_MAX_AGE = 12 * 3600
+
+_lock = threading.Lock()
+
+def _load(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Cache di calibrazione in {path} non leggibile ({e}), la ignoro")
+        return {}
+
+def get_cached_threshold(device_name, path=CALIBRATION_CACHE_PATH, max_age=CALIBRATION_MAX_AGE):
+    """Soglia di energia salvata per il dispositivo, o None se assente o troppo vecchia"""
+    with _lock:
+        entry = _load(path).get(device_name)
+    if entry is None or time.time() - entry.get("measured_at", 0) > max_age:
+        return None
+    return entry.get("energy_threshold")
+
+def store_threshold(device_name, energy_threshold, path=CALIBRATION_CACHE_PATH):
+    """Salva la soglia appena misurata; più dispositivi calibrati in parallelo scrivono a turno"""
+    with _lock:
+        cache = _load(path)
+        cache[device_name] = {"energy_threshold": energy_threshold, "measured_at": time.time()}
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            print(f"[WARNING] Impossibile salvare la calibrazione in {path}: {e}")
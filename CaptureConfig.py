@@ -0,0 +1,59 @@
+import os
+import json
+from collections import namedtuple
+
+# Durata di ogni blocco letto dal dispositivo: abbastanza corta da non ritardare il rilevamento
+# delle frasi, abbastanza lunga da non far girare il ciclo di lettura in Python migliaia di volte al secondo
+CAPTURE_LATENCY_MS = 30
+# Profili per dispositivo: {"parte del nome del dispositivo": {"latency_ms": 20}, ...}
+CAPTURE_PROFILES_PATH = os.environ.get("ECOUTE_CAPTURE_PROFILES", "capture_profiles.json")
+
+CaptureConfig = namedtuple("CaptureConfig", ["sample_rate", "channels", "chunk_size", "latency_ms"])
+
+_profiles = None
+
+def load_profiles(path=CAPTURE_PROFILES_PATH):
+    """Legge (una sola volta) i profili di cattura per dispositivo; nessun file = nessun profilo"""
+    global _profiles
+    if _profiles is None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _profiles = json.load(f)
+        except FileNotFoundError:
+            _profiles = {}
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Profili di cattura in {path} non leggibili ({e}), uso i valori di default")
+            _profiles = {}
+    return _profiles
+
+def get_profile(device_name):
+    """Profilo del dispositivo: il primo la cui chiave compare nel nome, altrimenti {}"""
+    for key, profile in load_profiles().items():
+        if key.lower() in (device_name or "").lower():
+            return profile
+    return {}
+
+def block_size(sample_rate, latency_ms):
+    """Numero di frame che corrispondono a latency_ms millisecondi (almeno 1)"""
+    return max(1, int(round(sample_rate * latency_ms / 1000)))
+
+def get_capture_config(device_info, sample_rate=None, channels=None, latency_ms=None):
+    """
+    Sceglie frequenza, canali e dimensione dei blocchi per un dispositivo PortAudio.
+
+    La latenza richiesta (argomento, poi profilo del dispositivo, poi CAPTURE_LATENCY_MS) viene
+    confrontata con quella che PortAudio riporta per il dispositivo: blocchi più corti di
+    defaultLowInputLatency non arrivano prima, aumentano solo le letture, quindi vengono allungati.
+    """
+    profile = get_profile(device_info.get("name"))
+    sample_rate = int(sample_rate or profile.get("sample_rate") or device_info["defaultSampleRate"])
+    channels = int(channels or profile.get("channels") or max(1, device_info.get("maxInputChannels", 1)))
+    latency_ms = float(latency_ms or profile.get("latency_ms") or CAPTURE_LATENCY_MS)
+
+    low_latency_ms = 1000 * device_info.get("defaultLowInputLatency", 0)
+    if latency_ms < low_latency_ms:
+        print(f"[INFO] Blocchi da {latency_ms:g} ms sotto la latenza minima di {device_info.get('name')} "
+              f"({low_latency_ms:.1f} ms), uso {low_latency_ms:.1f} ms")
+        latency_ms = low_latency_ms
+
+    return CaptureConfig(sample_rate, channels, block_size(sample_rate, latency_ms), latency_ms)
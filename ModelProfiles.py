@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Profili dei modelli: preset con nome che scelgono checkpoint, dispositivo, precisione e thread
+di ogni backend, dal più veloce al più accurato, più un auto-tuner che li misura sulla macchina.
+
+Uso:
+  python ModelProfiles.py list [--backend faster-whisper]
+  python ModelProfiles.py select NOME [--backend faster-whisper]
+  python ModelProfiles.py tune [--target 0.5] [--audio file.wav] [--language it] [--backend faster-whisper]
+
+I profili personalizzati e la scelta corrente stanno in model_profiles.json (o nel file indicato da
+ECOUTE_MODEL_PROFILES); main.py e modern_ui.py usano il profilo scelto, oppure quello indicato con --profile.
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import platform
+import threading
+import numpy as np
+
+MODEL_PROFILES_PATH = os.environ.get("ECOUTE_MODEL_PROFILES", "model_profiles.json")
+# Profilo usato quando né la riga di comando né il file di configurazione ne indicano uno
+DEFAULT_PROFILE = "balanced"
+# Real-time factor (secondi di decodifica per secondo di audio) richiesto dall'auto-tuner
+RTF_TARGET = 0.5
+# Decodifiche misurate per profilo, dopo una di riscaldamento
+BENCHMARK_RUNS = 3
+BENCHMARK_SECONDS = 10
+
+# Preset per backend. "quality" ordina i profili dal meno al più accurato, il resto sono gli argomenti
+# del costruttore del backend. compute_type "auto": float16 su GPU, int8 su CPU; cpu_threads 0: default
+BUILTIN_PROFILES = {
+    "faster-whisper": {
+        "realtime": {
+            "quality": 1,
+            "description": "Solo tiny, greedy: didascalie immediate anche su CPU lente",
+            "model_name": "tiny", "draft_model_name": None, "device": "auto", "compute_type": "int8",
+            "cpu_threads": 0, "num_workers": 2, "beam_size": 1, "draft_beam_size": 1,
+        },
+        "fast": {
+            "quality": 2,
+            "description": "Parziali con tiny, frasi definitive con small",
+            "model_name": "small", "draft_model_name": "tiny", "device": "auto", "compute_type": "auto",
+            "cpu_threads": 0, "num_workers": 2, "beam_size": 5, "draft_beam_size": 1,
+        },
+        "balanced": {
+            "quality": 3,
+            "description": "Parziali con base, frasi definitive con medium (predefinito)",
+            "model_name": "medium", "draft_model_name": "base", "device": "auto", "compute_type": "auto",
+            "cpu_threads": 0, "num_workers": 2, "beam_size": 5, "draft_beam_size": 1,
+        },
+        "accurate": {
+            "quality": 4,
+            "description": "Parziali con small, frasi definitive con large-v3 (serve una GPU)",
+            "model_name": "large-v3", "draft_model_name": "small", "device": "auto", "compute_type": "int8_float16",
+            "cpu_threads": 0, "num_workers": 2, "beam_size": 5, "draft_beam_size": 1,
+        },
+    },
+}
+
+# Campi descrittivi, da non passare al costruttore del backend
+PROFILE_METADATA = ("quality", "description")
+
+_lock = threading.Lock()
+
+def load_config(path=MODEL_PROFILES_PATH):
+    """
+    Configurazione dei profili: {"selected": {backend: nome}, "profiles": {backend: {nome: profilo}},
+    "benchmarks": {backend: {nome: risultato}}}. Un file assente equivale a una configurazione vuota
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Profili dei modelli in {path} non leggibili ({e}), uso i preset")
+        config = {}
+    for section in ("selected", "profiles", "benchmarks"):
+        config.setdefault(section, {})
+    return config
+
+def save_config(config, path=MODEL_PROFILES_PATH):
+    with _lock:
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=2)
+        except OSError as e:
+            print(f"[WARNING] Impossibile salvare i profili dei modelli in {path}: {e}")
+
+def list_profiles(backend, path=MODEL_PROFILES_PATH):
+    """Preset del backend più quelli del file di configurazione (che possono ridefinirli), dal più veloce"""
+    user_profiles = load_config(path)["profiles"].get(backend, {})
+    profiles = {}
+    for name in set(BUILTIN_PROFILES.get(backend, {})) | set(user_profiles):
+        # Un profilo personalizzato eredita i campi del preset con lo stesso nome, o di DEFAULT_PROFILE
+        base = BUILTIN_PROFILES.get(backend, {}).get(name) or BUILTIN_PROFILES.get(backend, {}).get(DEFAULT_PROFILE, {})
+        profiles[name] = dict(base, **user_profiles.get(name, {}))
+    return dict(sorted(profiles.items(), key=lambda item: item[1].get("quality", 0)))
+
+def selected_profile(backend, path=MODEL_PROFILES_PATH):
+    """Nome del profilo scelto per il backend (con select o dall'auto-tuner), o DEFAULT_PROFILE"""
+    return load_config(path)["selected"].get(backend, DEFAULT_PROFILE)
+
+def get_profile(backend, name=None, path=MODEL_PROFILES_PATH):
+    """
+    Argomenti del costruttore del backend per il profilo ``name`` (None: quello scelto).
+    I backend senza profili ricevono un dizionario vuoto, a meno che non se ne chieda uno esplicitamente
+    """
+    profiles = list_profiles(backend, path)
+    if name is None:
+        if not profiles:
+            return {}
+        name = selected_profile(backend, path)
+    if name not in profiles:
+        raise ValueError(f"Unknown profile '{name}' for backend {backend} (available: {', '.join(profiles) or 'none'})")
+    options = {key: value for key, value in profiles[name].items() if key not in PROFILE_METADATA}
+    check_options(backend, name, options)
+    return options
+
+def check_options(backend, name, options):
+    """
+    Verifica che il costruttore del backend accetti tutti i campi del profilo, così un profilo
+    personalizzato sbagliato dà un errore chiaro invece di un TypeError dentro get_model
+    """
+    import TranscriberModels
+
+    if backend not in TranscriberModels.BACKENDS:
+        return
+    parameters = inspect.signature(TranscriberModels.BACKENDS[backend].__init__).parameters
+    if any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return
+    # La lingua la passa get_model: non è un campo dei profili
+    accepted = [parameter for parameter in parameters if parameter not in ("self", "language")]
+    unknown = sorted(set(options).difference(accepted))
+    if unknown:
+        raise ValueError(f"Profile '{name}' for backend {backend} has fields its constructor does not accept: "
+                         f"{', '.join(unknown)} (accepted: {', '.join(accepted) or 'none'})")
+
+def select_profile(backend, name, path=MODEL_PROFILES_PATH):
+    if name not in list_profiles(backend, path):
+        raise ValueError(f"Unknown profile '{name}' for backend {backend}")
+    config = load_config(path)
+    config["selected"][backend] = name
+    save_config(config, path)
+
+def load_audio(path):
+    """Legge un file WAV/FLAC/AIFF come campioni int16 mono; restituisce (campioni, frequenza)"""
+    import custom_speech_recognition as sr
+
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    return np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16), audio.sample_rate
+
+def synthetic_audio(seconds=BENCHMARK_SECONDS, sample_rate=16000):
+    """Segnale con l'inviluppo e le armoniche di una voce, per misurare senza un file: indicativo, non realistico"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 3 * t), 0, None)
+    return (voice * syllables * 4000).astype(np.int16), sample_rate
+
+def benchmark_profile(backend, name, samples, sample_rate, language="it", runs=BENCHMARK_RUNS, path=MODEL_PROFILES_PATH):
+    """
+    Carica il profilo e misura il real-time factor dei parziali e delle frasi definitive (mediana di
+    ``runs`` decodifiche dopo una di riscaldamento). "rtf" è il peggiore dei due livelli
+    """
+    import TranscriberModels
+
+    start = time.monotonic()
+    model = TranscriberModels.get_model(False, language, backend=backend, profile=name)
+    load_seconds = time.monotonic() - start
+    audio_seconds = len(samples) / sample_rate
+
+    def measure(transcribe):
+        transcribe(samples, sample_rate)
+        timings = []
+        for _ in range(runs):
+            start = time.monotonic()
+            transcribe(samples, sample_rate)
+            timings.append(time.monotonic() - start)
+        return float(np.median(timings)) / audio_seconds
+
+    draft_rtf = measure(model.get_transcription_array)
+    final_rtf = measure(model.get_final_transcription) if model.supports_refinement else draft_rtf
+    return {
+        "rtf": max(draft_rtf, final_rtf),
+        "draft_rtf": draft_rtf,
+        "final_rtf": final_rtf,
+        "load_seconds": load_seconds,
+        "measured_at": time.time(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+    }
+
+def autotune(backend="faster-whisper", target_rtf=RTF_TARGET, samples=None, sample_rate=16000, language="it",
+             path=MODEL_PROFILES_PATH):
+    """
+    Misura i profili dal più accurato al meno accurato e sceglie il primo il cui real-time factor
+    rispetta ``target_rtf``: i profili più leggeri non vengono nemmeno caricati. Se nessuno lo rispetta
+    sceglie il più veloce misurato. Scelta e misure vengono salvate nel file di configurazione
+    """
+    if samples is None:
+        samples, sample_rate = synthetic_audio()
+    profiles = list_profiles(backend, path)
+    if not profiles:
+        raise ValueError(f"Backend {backend} has no profiles to tune")
+
+    results = {}
+    chosen = None
+    for name in reversed(list(profiles)):
+        print(f"📝 Profilo {name}: {profiles[name].get('description', '')}")
+        try:
+            results[name] = benchmark_profile(backend, name, samples, sample_rate, language, path=path)
+        except Exception as e:
+            print(f"   ❌ Non utilizzabile: {type(e).__name__}: {e}")
+            continue
+        result = results[name]
+        print(f"   RTF {result['rtf']:.2f} (parziali {result['draft_rtf']:.2f}, definitivo {result['final_rtf']:.2f}), "
+              f"caricamento {result['load_seconds']:.1f} s")
+        if result["rtf"] <= target_rtf:
+            chosen = name
+            break
+    if not results:
+        raise RuntimeError(f"No profile of {backend} could be loaded")
+    if chosen is None:
+        chosen = min(results, key=lambda name: results[name]["rtf"])
+        print(f"[WARNING] Nessun profilo rispetta RTF {target_rtf}: scelgo il più veloce")
+
+    config = load_config(path)
+    config["selected"][backend] = chosen
+    config["benchmarks"].setdefault(backend, {}).update(results)
+    save_config(config, path)
+    return chosen, results
+
+def parse_args(argv):
+    options = {"backend": "faster-whisper", "target": RTF_TARGET, "audio": None, "language": "it"}
+    positional = []
+    args = iter(argv)
+    for arg in args:
+        if arg in ("--backend", "--audio", "--language"):
+            options[arg[2:]] = next(args, None)
+        elif arg == "--target":
+            options["target"] = float(next(args, RTF_TARGET))
+        else:
+            positional.append(arg)
+    return positional, options
+
+def main():
+    positional, options = parse_args(sys.argv[1:])
+    command = positional[0] if positional else "list"
+    backend = options["backend"]
+
+    if command == "list":
+        selected = selected_profile(backend)
+        benchmarks = load_config()["benchmarks"].get(backend, {})
+        for name, profile in list_profiles(backend).items():
+            measured = f" — RTF misurato {benchmarks[name]['rtf']:.2f}" if name in benchmarks else ""
+            print(f"{'*' if name == selected else ' '} {name}: {profile.get('description', '')}{measured}")
+    elif command == "select" and len(positional) > 1:
+        select_profile(backend, positional[1])
+        print(f"✅ Profilo {positional[1]} scelto per {backend}")
+    elif command == "tune":
+        samples, sample_rate = (None, 16000) if options["audio"] is None else load_audio(options["audio"])
+        if samples is None:
+            print("[WARNING] Nessun --audio: misuro su un segnale sintetico, i tempi sono solo indicativi")
+        chosen, _ = autotune(backend, options["target"], samples, sample_rate, options["language"])
+        print(f"✅ Profilo scelto per {backend}: {chosen}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
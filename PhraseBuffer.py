@@ -0,0 +1,73 @@
+import numpy as np
+
+# Whisper decodifica finestre da 30 secondi: oltre non ha senso accumulare
+MAX_PHRASE_SECONDS = 30
+
+class PhraseBuffer:
+    """
+    Accumulatore a capacità fissa per i frame PCM int16 di una frase.
+
+    Lo spazio è preallocato una sola volta come anello "specchiato": ogni frame viene
+    scritto sia in posizione p che in p + capacità, così il contenuto è sempre leggibile
+    come un'unica vista contigua senza copie. append costa quanto il blocco in ingresso,
+    trim e clear sono O(1). Quando la capacità è esaurita vengono scartati i frame più vecchi.
+    """
+    def __init__(self, sample_rate, channels=1, max_seconds=MAX_PHRASE_SECONDS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.capacity = int(sample_rate * max_seconds)
+        self._buffer = np.zeros((2 * self.capacity, channels), dtype=np.int16)
+        self._start = 0
+        self._length = 0
+        self.dropped_frames = 0
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def duration(self):
+        """Durata in secondi dell'audio accumulato"""
+        return self._length / self.sample_rate
+
+    def append(self, data):
+        """Aggiunge byte PCM int16 interleaved (o un array equivalente) in coda"""
+        frames = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        if len(frames) > self.capacity:
+            self.dropped_frames += len(frames) - self.capacity
+            frames = frames[-self.capacity:]
+
+        overflow = self._length + len(frames) - self.capacity
+        if overflow > 0:
+            self.trim(overflow)
+            self.dropped_frames += overflow
+
+        end = (self._start + self._length) % self.capacity
+        first = min(len(frames), self.capacity - end)
+        self._write(end, frames[:first])
+        self._write(0, frames[first:])
+        self._length += len(frames)
+
+    def _write(self, position, frames):
+        if len(frames) == 0:
+            return
+        self._buffer[position:position + len(frames)] = frames
+        self._buffer[position + self.capacity:position + self.capacity + len(frames)] = frames
+
+    def trim(self, frame_count):
+        """Scarta i primi frame_count frame (ad esempio l'audio già confermato)"""
+        frame_count = min(max(frame_count, 0), self._length)
+        self._start = (self._start + frame_count) % self.capacity
+        self._length -= frame_count
+
+    def clear(self):
+        self._start = 0
+        self._length = 0
+
+    def view(self):
+        """
+        Vista contigua (frame, canali) senza copie sull'audio accumulato.
+        Resta valida finché un append non supera la capacità e sovrascrive i frame più vecchi.
+        """
+        frames = self._buffer[self._start:self._start + self._length]
+        frames.flags.writeable = False
+        return frames
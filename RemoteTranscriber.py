@@ -0,0 +1,220 @@
+import time
+import queue
+import threading
+import multiprocessing
+from SharedAudioQueue import SharedAudioQueue
+from Transcript import TranscriptUpdate
+
+# Ogni quanto il processo di inferenza invia le statistiche della pipeline (secondi)
+STATS_INTERVAL = 0.5
+
+def run_inference(specs, model_options, transcriber_options, commands, updates, notify):
+    """
+    Corpo del processo di inferenza: carica il modello, apre le code condivise e trascrive.
+    Le modifiche alla trascrizione e le statistiche tornano al processo principale su ``updates``.
+    """
+    # Importati qui: il processo principale non carica mai le librerie del modello
+    import TranscriberModels
+    from AudioTranscriber import AudioTranscriber
+
+    try:
+        transcriber = AudioTranscriber(None, None, TranscriberModels.get_model(**model_options), **transcriber_options)
+    except Exception as e:
+        updates.put(("error", f"{type(e).__name__}: {e}"))
+        return
+    audio_queues = []
+    for spec in specs:
+        audio_queue = SharedAudioQueue.attach(spec)
+        transcriber.add_source(spec["label"], audio_queue, audio_queue, spec["weight"])
+        audio_queues.append(audio_queue)
+    transcriber.start()
+
+    stopped = threading.Event()
+    threading.Thread(target=forward_notifications, args=(notify, transcriber, stopped), daemon=True).start()
+    threading.Thread(target=publish_updates, args=(transcriber, updates, stopped), daemon=True).start()
+    updates.put(("ready", None))
+    try:
+        while True:
+            command, argument = commands.get()
+            if command == "stop":
+                break
+            elif command == "clear":
+                transcriber.clear_transcript_data()
+            elif command == "clear_queues":
+                transcriber.clear_queues()
+            elif command == "model":
+                model_options.update(argument)
+                transcriber.update_model(TranscriberModels.get_model(**model_options))
+    finally:
+        stopped.set()
+        transcriber.stop()
+        for audio_queue in audio_queues:
+            audio_queue.close()
+        updates.put(("stopped", None))
+
+def forward_notifications(notify, transcriber, stopped):
+    """Traduce il segnale dei recorder (multiprocessing.Event) nel risveglio del dispatcher"""
+    while not stopped.is_set():
+        if notify.wait(STATS_INTERVAL):
+            # Azzerato prima di risvegliare: un blocco arrivato nel frattempo lo reimposta
+            notify.clear()
+            transcriber.audio_ready.set()
+
+def publish_updates(transcriber, updates, stopped):
+    """Invia solo le righe cambiate della trascrizione e, periodicamente, le statistiche"""
+    version = 0
+    next_stats = 0.0
+    while not stopped.is_set():
+        transcriber.transcript_changed_event.wait(STATS_INTERVAL)
+        transcriber.transcript_changed_event.clear()
+        update = transcriber.get_transcript_since(version)
+        if update is not None:
+            updates.put(("transcript", update))
+            version = update.version
+        if time.monotonic() >= next_stats:
+            updates.put(("stats", transcriber.get_pipeline_stats()))
+            next_stats = time.monotonic() + STATS_INTERVAL
+
+class RemoteTranscriber:
+    """
+    Stessa interfaccia di AudioTranscriber per la UI, con la trascrizione in un processo separato.
+
+    Cattura e interfaccia restano nel processo principale, il modello gira in un processo di
+    inferenza: una chiamata lunga a generate tiene il GIL solo lì, mentre le letture PortAudio e i
+    ridisegni della UI continuano. L'audio passa per una SharedAudioQueue (memoria condivisa) per
+    sorgente, da creare con create_queue; sul canale di controllo viaggiano solo i comandi e, in
+    senso opposto, le righe cambiate della trascrizione, che qui vengono tenute in una copia locale.
+
+    Al posto dell'oggetto modello si passano gli argomenti di TranscriberModels.get_model, perché il
+    modello viene creato nel processo di inferenza.
+    """
+    def __init__(self, mic_source, speaker_source, model_options, **transcriber_options):
+        self.context = multiprocessing.get_context("spawn")
+        self.model_options = dict(model_options)
+        self.transcriber_options = transcriber_options
+        self.notify = self.context.Event()
+        self.commands = self.context.Queue()
+        self.updates = self.context.Queue()
+        self.process = None
+        self.receive_thread = None
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        self.version = 0
+        self.order = []
+        # id -> (riga, versione dell'ultima modifica), come ricevute dal processo di inferenza
+        self.lines = {}
+        self.rendered = ""
+        self.pipeline_stats = {}
+        self.audio_sources = {}
+        if mic_source is not None:
+            self.add_source("You", mic_source)
+        if speaker_source is not None:
+            self.add_source("Speaker", speaker_source)
+
+    def create_queue(self, recorder):
+        """Coda in memoria condivisa per il formato del recorder, collegata al risveglio del processo di inferenza"""
+        return SharedAudioQueue.for_recorder(recorder, self.notify)
+
+    def add_source(self, label, source, audio_queue=None, weight=1.0):
+        """Registra una sorgente; a differenza di AudioTranscriber va fatto prima di start"""
+        assert self.process is None, "Sources must be registered before start"
+        if label in self.audio_sources:
+            raise ValueError(f"Audio source '{label}' already registered")
+        self.audio_sources[label] = {"source": source, "queue": None, "weight": weight}
+        if audio_queue is not None:
+            self.attach_queue(label, audio_queue)
+
+    def attach_queue(self, label, audio_queue):
+        if not isinstance(audio_queue, SharedAudioQueue):
+            raise TypeError(f"Audio source '{label}' needs a SharedAudioQueue (see create_queue)")
+        self.audio_sources[label]["queue"] = audio_queue
+
+    def start(self, speaker_queue=None, mic_queue=None):
+        """Avvia il processo di inferenza; il modello viene caricato lì, in parallelo alla UI"""
+        assert self.process is None, "Transcriber already started"
+        for label, audio_queue in (("Speaker", speaker_queue), ("You", mic_queue)):
+            if audio_queue is not None:
+                self.attach_queue(label, audio_queue)
+        specs = [dict(source_info["queue"].spec(), label=label, weight=source_info["weight"])
+                 for label, source_info in self.audio_sources.items() if source_info["queue"] is not None]
+        self.process = self.context.Process(
+            target=run_inference, name="ecoute-inference", daemon=True,
+            args=(specs, self.model_options, self.transcriber_options, self.commands, self.updates, self.notify))
+        self.process.start()
+        self.receive_thread = threading.Thread(target=self.receive_updates, daemon=True)
+        self.receive_thread.start()
+
+    def receive_updates(self):
+        while True:
+            try:
+                kind, payload = self.updates.get(timeout=STATS_INTERVAL)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    break
+                continue
+            if kind == "transcript":
+                self.apply_update(payload)
+            elif kind == "stats":
+                self.pipeline_stats = payload
+            elif kind == "ready":
+                self.ready.set()
+            elif kind == "error":
+                print(f"[ERROR] Processo di inferenza: {payload}")
+            elif kind == "stopped":
+                break
+
+    def apply_update(self, update):
+        with self.lock:
+            for entry_id, line in update.changed.items():
+                self.lines[entry_id] = (line, update.version)
+            self.lines = {entry_id: self.lines[entry_id] for entry_id in update.order}
+            self.order = list(update.order)
+            self.version = update.version
+            self.rendered = "".join(self.lines[entry_id][0] for entry_id in self.order)
+
+    def update_model(self, new_model):
+        raise TypeError("RemoteTranscriber creates the model in the inference process: use update_model_options")
+
+    def update_model_options(self, **model_options):
+        """Aggiorna il modello nel processo di inferenza con gli argomenti di get_model cambiati (es. language)"""
+        self.model_options.update(model_options)
+        self.commands.put(("model", model_options))
+
+    def get_pipeline_stats(self):
+        # Il rumore di fondo è misurato dai recorder, che restano in questo processo
+        stats = {who: dict(source_stats) for who, source_stats in self.pipeline_stats.items()}
+        for who, source_info in self.audio_sources.items():
+            if who in stats and hasattr(source_info["source"], "get_noise_stats"):
+                stats[who].update(source_info["source"].get_noise_stats())
+        return stats
+
+    def get_transcript(self):
+        with self.lock:
+            return self.rendered
+
+    def get_transcript_since(self, version):
+        """Come AudioTranscriber.get_transcript_since, sulla copia locale della trascrizione"""
+        with self.lock:
+            if version == self.version:
+                return None
+            changed = {entry_id: line for entry_id, (line, line_version) in self.lines.items() if line_version > version}
+            return TranscriptUpdate(self.version, list(self.order), changed)
+
+    def clear_transcript_data(self):
+        self.commands.put(("clear", None))
+
+    def clear_queues(self):
+        self.commands.put(("clear_queues", None))
+
+    def stop(self, timeout=5):
+        """Ferma il processo di inferenza e rilascia la memoria condivisa"""
+        if self.process is not None:
+            self.commands.put(("stop", None))
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.receive_thread.join(timeout)
+        for source_info in self.audio_sources.values():
+            if source_info["queue"] is not None:
+                source_info["queue"].close()
+                source_info["queue"] = None
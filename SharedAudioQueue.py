@@ -0,0 +1,187 @@
+import queue
+import struct
+import threading
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from AudioQueue import MAX_QUEUE_SECONDS
+
+EPOCH = datetime(1970, 1, 1)
+# Intestazione della memoria condivisa: posizione di scrittura, di lettura, byte e blocchi scartati
+HEADER = struct.Struct("<4q")
+# Intestazione di ogni blocco: byte di audio (-1 = salto a inizio anello), istante di cattura e
+# istante di inserimento, da cui si misura lag() come in AudioQueue
+RECORD = struct.Struct("<qdd")
+WRAP = -1
+
+def _align(size):
+    return (size + 7) & ~7
+
+class SharedAudioQueue:
+    """
+    Coda dei blocchi audio (dati, istante) in un anello di memoria condivisa tra processi.
+
+    Il recorder (processo di cattura) scrive ogni blocco direttamente nell'anello: è l'unica copia.
+    Il trascrittore (processo di inferenza) riceve con ``get_nowait`` una memoryview sull'anello
+    senza copiare; lo spazio viene restituito al produttore solo alla ``get_nowait`` successiva,
+    quindi la vista resta valida finché l'accumulatore non ne ha letto il contenuto.
+
+    Come RingBuffer c'è un solo produttore e un solo consumatore, ciascuno avanza solo la propria
+    posizione e nessuno dei due prende lock condivisi. Se l'anello è pieno il blocco in arrivo viene
+    scartato e contato, senza mai bloccare la cattura. Ogni blocco segnala ``notify``
+    (multiprocessing.Event) per risvegliare il processo di inferenza; ``wakeup`` esiste solo perché
+    AudioTranscriber tratti la coda come ad eventi e va impostato dal processo che consuma.
+    Per questo non c'è una ``get`` bloccante: il consumatore legge con ``get_nowait`` dopo il risveglio.
+    """
+    def __init__(self, sample_rate, sample_width, channels, max_seconds=MAX_QUEUE_SECONDS, notify=None, name=None):
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = sample_width
+        self.channels = channels
+        self.notify = notify
+        self.wakeup = None
+        self.bytes_per_second = sample_rate * sample_width * channels
+        if name is None:
+            self.capacity = _align(int(max_seconds * self.bytes_per_second) + 64 * RECORD.size)
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER.size + self.capacity)
+            HEADER.pack_into(self.shm.buf, 0, 0, 0, 0, 0)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.capacity = self.shm.size - HEADER.size
+            self.owner = False
+        self.positions = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = self.shm.buf[HEADER.size:HEADER.size + self.capacity]
+        # Lato consumatore: inizio del prossimo blocco da leggere (la posizione condivisa resta
+        # sull'ultimo blocco restituito finché non viene rilasciato)
+        self.consumer_lock = threading.Lock()
+        self.next_read = int(self.positions[1])
+
+    @classmethod
+    def for_recorder(cls, recorder, notify=None, max_seconds=MAX_QUEUE_SECONDS):
+        return cls(recorder.SAMPLE_RATE, recorder.SAMPLE_WIDTH, recorder.channels, max_seconds, notify)
+
+    def spec(self):
+        """Quanto serve (serializzabile) per aprire la stessa coda in un altro processo"""
+        return {"name": self.shm.name, "sample_rate": self.SAMPLE_RATE,
+                "sample_width": self.SAMPLE_WIDTH, "channels": self.channels}
+
+    @classmethod
+    def attach(cls, spec, notify=None):
+        return cls(spec["sample_rate"], spec["sample_width"], spec["channels"], notify=notify, name=spec["name"])
+
+    def put(self, item, block=True, timeout=None):
+        """Scrive il blocco nell'anello (solo il produttore); se non c'è spazio lo scarta"""
+        data, time_spoken = item
+        if self.positions is None:
+            return  # coda già chiusa: il recorder si sta fermando
+        data = memoryview(data).cast("B")
+        write_position, read_position = int(self.positions[0]), int(self.positions[1])
+        start = write_position % self.capacity
+        size = RECORD.size + _align(len(data))
+        # Ogni blocco è contiguo, così il consumatore può leggerlo senza copie: se non entra prima
+        # della fine dell'anello si salta all'inizio
+        skip = self.capacity - start if start + size > self.capacity else 0
+        if skip + size > self.capacity - (write_position - read_position):
+            self.positions[2] += len(data)
+            self.positions[3] += 1
+        else:
+            if skip >= RECORD.size:
+                RECORD.pack_into(self.data, start, WRAP, 0.0, 0.0)
+            if skip:
+                start = 0
+            RECORD.pack_into(self.data, start, len(data), (time_spoken - EPOCH).total_seconds(),
+                             (datetime.utcnow() - EPOCH).total_seconds())
+            self.data[start + RECORD.size:start + RECORD.size + len(data)] = data
+            self.positions[0] = write_position + skip + size  # pubblicato solo a copia completata
+        if self.notify is not None:
+            self.notify.set()
+
+    def _peek(self, position=None):
+        """
+        (inizio, fine, dati, istante, istante di inserimento) del prossimo blocco a partire da
+        ``position`` (None: il prossimo da leggere), o None (solo il consumatore)
+        """
+        if position is None:
+            position = self.next_read
+        while position < int(self.positions[0]):
+            start = position % self.capacity
+            if self.capacity - start < RECORD.size:
+                position += self.capacity - start
+                continue
+            size, seconds, enqueued_seconds = RECORD.unpack_from(self.data, start)
+            if size == WRAP:
+                position += self.capacity - start
+                continue
+            end = position + RECORD.size + _align(size)
+            payload = self.data[start + RECORD.size:start + RECORD.size + size]
+            return position, end, payload, EPOCH + timedelta(seconds=seconds), EPOCH + timedelta(seconds=enqueued_seconds)
+        return None
+
+    def get_nowait(self):
+        """
+        Restituisce (memoryview, istante) del prossimo blocco senza copiarlo; la vista è valida
+        fino alla chiamata successiva, che rilascia lo spazio al produttore
+        """
+        with self.consumer_lock:
+            record = self._peek()
+            if record is None:
+                self.positions[1] = self.next_read
+                raise queue.Empty
+            # La posizione condivisa avanza solo fino all'inizio del blocco restituito
+            position, self.next_read, payload, time_spoken, _ = record
+            self.positions[1] = position
+            return payload, time_spoken
+
+    def empty(self):
+        with self.consumer_lock:
+            return self._peek() is None
+
+    def qsize(self):
+        """Blocchi in coda non ancora restituiti (solo il consumatore)"""
+        with self.consumer_lock:
+            count = 0
+            record = self._peek()
+            while record is not None:
+                count += 1
+                record = self._peek(record[1])
+            return count
+
+    def queued_bytes(self):
+        """Spazio dell'anello occupato dai blocchi non ancora restituiti, intestazioni comprese"""
+        return max(0, int(self.positions[0]) - self.next_read)
+
+    def clear(self):
+        """Scarta tutto l'audio in coda (solo il consumatore)"""
+        with self.consumer_lock:
+            self.next_read = int(self.positions[0])
+            self.positions[1] = self.next_read
+
+    def lag(self, now=None):
+        """Secondi trascorsi dall'inserimento del blocco più vecchio ancora in coda"""
+        with self.consumer_lock:
+            record = self._peek()
+        if record is None:
+            return 0.0
+        return max(0.0, ((now or datetime.utcnow()) - record[4]).total_seconds())
+
+    def get_stats(self):
+        return {
+            "queue_depth": self.qsize(),
+            "queued_seconds": self.queued_bytes() / self.bytes_per_second,
+            "lag": self.lag(),
+            "dropped_bytes": int(self.positions[2]),
+            "dropped_chunks": int(self.positions[3]),
+        }
+
+    def close(self):
+        """Chiude la mappatura; il processo che ha creato la coda la rimuove anche dal sistema"""
+        self.positions = None
+        if self.owner:
+            self.shm.unlink()
+        try:
+            self.data.release()
+            self.shm.close()
+        except BufferError:
+            pass  # una vista restituita da get_nowait è ancora in uso: la mappatura si chiude con il processo
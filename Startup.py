@@ -0,0 +1,84 @@
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+class Startup:
+    """
+    Avvio concorrente: la calibrazione dei dispositivi, il caricamento del modello e la costruzione
+    della UI procedono insieme invece che uno dopo l'altro.
+
+    Le fasi in background partono con submit (o con start_source/load_model), quelle che devono
+    restare sul thread principale (la UI) si cronometrano con ``with startup.phase(nome)``.
+    Ogni fase viene registrata con inizio e fine rispetto all'avvio; report le stampa, insieme al
+    tempo della prima didascalia se watch_first_caption è attivo.
+    """
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.lock = threading.Lock()
+        # fase -> (inizio, fine) in secondi dall'avvio
+        self.timings = {}
+        self.recorders = []
+        self.pool = ThreadPoolExecutor(thread_name_prefix="startup")
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    @contextmanager
+    def phase(self, name):
+        start = self.elapsed()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.timings[name] = (start, self.elapsed())
+
+    def submit(self, name, function, *args, **kwargs):
+        """Esegue function in background come fase ``name``; restituisce il Future"""
+        return self.pool.submit(self._run_phase, name, function, *args, **kwargs)
+
+    def _run_phase(self, name, function, *args, **kwargs):
+        try:
+            with self.phase(name):
+                return function(*args, **kwargs)
+        except Exception as e:
+            print(f"[ERROR] Avvio, fase '{name}' fallita: {e}")
+            raise
+
+    def start_source(self, transcriber, label, recorder_factory, create_queue):
+        """
+        Crea (e calibra) il recorder in background, poi lo registra nel trascrittore e avvia la
+        registrazione: ogni dispositivo inizia a trascrivere appena è pronto, senza aspettare gli altri
+        """
+        def open_source():
+            recorder = recorder_factory()
+            audio_queue = create_queue(recorder)
+            transcriber.add_source(label, recorder, audio_queue)
+            recorder.record_into_queue(audio_queue)
+            with self.lock:
+                self.recorders.append(recorder)
+            return recorder
+        return self.submit(f"calibrazione {label}", open_source)
+
+    def load_model(self, transcriber, model_factory):
+        """Carica il modello in background e lo passa al trascrittore, che fino ad allora tiene l'audio in coda"""
+        return self.submit("modello", lambda: transcriber.update_model(model_factory()))
+
+    def watch_first_caption(self, transcriber, poll_interval=0.1):
+        """Registra quando compare la prima didascalia e a quel punto stampa il report"""
+        def watch():
+            while transcriber.get_transcript_since(0) is None:
+                time.sleep(poll_interval)
+            with self.lock:
+                self.timings["prima didascalia"] = (0.0, self.elapsed())
+            self.report()
+        threading.Thread(target=watch, daemon=True).start()
+
+    def report(self):
+        with self.lock:
+            timings = sorted(self.timings.items(), key=lambda item: item[1][1])
+        for name, (start, end) in timings:
+            print(f"[STARTUP] {name}: {end - start:.2f} s (da {start:.2f} a {end:.2f} s)")
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -1,59 +1,257 @@
-import torch
-from faster_whisper import WhisperModel
-from openai import OpenAI
 import subprocess
-import json
 import tempfile
+import importlib.util
+import threading
+import time
 import os
-import soundfile as sf
-from keys import OPENAI_API_KEY
-
-# OpenVINO imports
-try:
-    from transformers.pipelines import pipeline
-    from optimum.intel.openvino import OVModelForSpeechSeq2Seq
-    from transformers import AutoProcessor
-    OPENVINO_AVAILABLE = True
-except ImportError:
-    OPENVINO_AVAILABLE = False
-
-# Voxtral imports
-try:
-    from transformers import VoxtralForConditionalGeneration, AutoProcessor as VoxtralProcessor
-    VOXTRAL_AVAILABLE = True
-except ImportError:
-    VOXTRAL_AVAILABLE = False
-
-# OpenVINO GenAI imports
-try:
-    import openvino_genai as ov_genai
-    import numpy as np
-    OPENVINO_GENAI_AVAILABLE = True
-    # pyaudio è opzionale (necessario solo per registrazione live)
-    try:
-        import pyaudio
-        PYAUDIO_AVAILABLE = True
-    except ImportError:
-        PYAUDIO_AVAILABLE = False
-        print("[WARNING] PyAudio non disponibile - registrazione live disabilitata")
-except ImportError:
-    OPENVINO_GENAI_AVAILABLE = False
-
-def get_model(use_api, language="it", use_ollama=False, use_openvino=False, use_voxtral=False, use_openvino_genai=False):
+import io
+import wave
+from collections import OrderedDict
+import numpy as np
+
+# Formato audio atteso dai modelli Whisper
+MODEL_SAMPLE_RATE = 16000
+
+# Backend di trascrizione: nome -> classe. Ogni backend importa torch, transformers, openvino o
+# l'SDK che gli serve solo quando viene creato, quindi importare questo modulo costa quasi nulla
+# e carica soltanto le librerie del backend scelto da get_model
+BACKENDS = {}
+
+def register_backend(name, *requirements):
+    """Decoratore che registra una classe come backend ``name``; requirements sono i pacchetti che importa"""
+    def register(cls):
+        cls.backend_name = name
+        cls.requirements = requirements
+        BACKENDS[name] = cls
+        return cls
+    return register
+
+def backend_available(name):
+    """True se i pacchetti del backend sono installati, senza importarli"""
+    return all(importlib.util.find_spec(package) is not None for package in BACKENDS[name].requirements)
+
+def select_backend(use_api=False, use_ollama=False, use_openvino=False, use_voxtral=False, use_openvino_genai=False):
+    """Nome del backend corrispondente alle opzioni da riga di comando"""
     if use_voxtral:
-        return VoxtralTranscriber(language=language)
+        return "voxtral"
     elif use_openvino_genai:
-        return OpenVINOGenAITranscriber(language=language)
+        return "openvino-genai"
     elif use_openvino:
-        return OpenVINOWhisperTranscriber(language=language)
+        return "openvino"
     elif use_ollama:
-        return OllamaWhisperTranscriber(language=language)
+        return "ollama"
     elif use_api:
-        return APIWhisperTranscriber(language=language)
+        return "api"
+    return "faster-whisper"
+
+def get_model(use_api, language="it", use_ollama=False, use_openvino=False, use_voxtral=False, use_openvino_genai=False, backend=None,
+              profile=None):
+    """
+    Crea il modello del backend indicato (per nome o con le opzioni use_*), importandone solo ora le dipendenze.
+    profile è il nome di un profilo di ModelProfiles (None: quello scelto per il backend).
+    I pesi vengono presi da MODEL_CACHE: richiamarla con un'altra lingua costa millisecondi, non un nuovo caricamento
+    """
+    import ModelProfiles
+
+    name = backend or select_backend(use_api, use_ollama, use_openvino, use_voxtral, use_openvino_genai)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return BACKENDS[name](language=language, **ModelProfiles.get_profile(name, profile))
+
+# Decodifica a due livelli di Faster Whisper: i parziali in diretta usano il modello piccolo con
+# decodifica greedy, il testo definitivo di ogni frase il modello grande con beam search (None: un solo modello).
+# Sono i valori predefiniti del costruttore: get_model usa quelli del profilo scelto (vedi ModelProfiles)
+FASTER_WHISPER_MODEL = "medium"
+FASTER_WHISPER_DRAFT_MODEL = "base"
+DRAFT_BEAM_SIZE = 1
+FINAL_BEAM_SIZE = 5
+# Precisione per compute_type="auto": float16 su GPU (float32 raddoppia memoria e tempi senza guadagno), int8 su CPU
+AUTO_COMPUTE_TYPES = {"cuda": "float16", "cpu": "int8"}
+
+# Memoria (MB) che i pesi tenuti in MODEL_CACHE possono occupare prima di scartare i meno usati
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get("ECOUTE_MODEL_MEMORY_MB", "8192"))
+# Stima usata quando la dimensione dei pesi non si può misurare (né parametri torch né cartella su disco)
+DEFAULT_MODEL_BYTES = 2 ** 30
+
+def checkpoint_dir(checkpoint, backend=None):
+    """
+    Cartella del checkpoint su disco, o None. faster-whisper carica i modelli per nome ("medium"):
+    la cartella è quella in cui li ha scaricati, cercata solo tra i file locali (nessuna richiesta in rete)
+    """
+    if os.path.isdir(checkpoint):
+        return checkpoint
+    if backend == "faster-whisper":
+        try:
+            from faster_whisper.utils import download_model
+            return download_model(checkpoint, local_files_only=True)
+        except Exception:
+            return None
+    return None
+
+def estimate_model_bytes(weights, checkpoint, backend=None):
+    """Memoria occupata dai pesi: parametri torch se ci sono, altrimenti la cartella del checkpoint su disco"""
+    total = 0
+    for part in weights if isinstance(weights, tuple) else (weights,):
+        parameters = getattr(part, "parameters", None)
+        if callable(parameters):
+            try:
+                total += sum(parameter.numel() * parameter.element_size() for parameter in parameters())
+            except (TypeError, AttributeError):
+                pass
+    root = checkpoint_dir(checkpoint, backend) if total == 0 else None
+    if root is not None:
+        for folder, _, files in os.walk(root):
+            total += sum(os.path.getsize(os.path.join(folder, name)) for name in files)
+    return total or DEFAULT_MODEL_BYTES
+
+class ModelCache:
+    """
+    Pesi dei modelli condivisi da tutto il processo, con chiave (backend, checkpoint, dispositivo, ...)
+    dove gli eventuali elementi successivi sono le altre opzioni di caricamento (precisione, thread).
+
+    La lingua non fa parte della chiave: è un'opzione di decodifica, quindi cambiarla riusa gli stessi pesi.
+    Quando la memoria stimata supera budget_bytes vengono scartati i modelli usati meno di recente
+    (l'ultimo caricato resta sempre, come quelli indicati in ``keep``); la memoria si libera quando
+    nessun trascrittore li usa più.
+    """
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.lock = threading.Lock()
+        # chiave -> (pesi, byte stimati), dal meno al più recentemente usato
+        self.entries = OrderedDict()
+        # chiave -> Lock, perché due richieste contemporanee dello stesso modello lo carichino una volta sola
+        self.loading = {}
+
+    def get(self, key, loader, keep=()):
+        """
+        Restituisce i pesi di key, chiamando loader() per caricarli solo se non sono già in memoria.
+        keep sono le chiavi già prese dallo stesso trascrittore, da non scartare per far posto a questa
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            key_lock = self.loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    return self.entries[key][0]
+            start = time.monotonic()
+            try:
+                weights = loader()
+                size = estimate_model_bytes(weights, key[1], key[0])
+                print(f"[INFO] Modello {'/'.join(key)} caricato in {time.monotonic() - start:.1f} s (~{size / 2 ** 20:.0f} MB)")
+                with self.lock:
+                    self.entries[key] = (weights, size)
+                    self._evict(keep)
+            finally:
+                # Rimosso solo dopo aver registrato i pesi: chi arriva ora li trova già in entries
+                with self.lock:
+                    self.loading.pop(key, None)
+        return weights
+
+    def _evict(self, keep=()):
+        total = sum(size for _, size in self.entries.values())
+        newest = next(reversed(self.entries))
+        for key in list(self.entries):
+            if total <= self.budget_bytes:
+                break
+            if key == newest or key in keep:
+                continue
+            _, size = self.entries.pop(key)
+            total -= size
+            print(f"[INFO] Modello {'/'.join(key)} rimosso dalla cache (budget {self.budget_bytes / 2 ** 20:.0f} MB)")
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "models": ["/".join(key) for key in self.entries],
+                "bytes": sum(size for _, size in self.entries.values()),
+                "budget_bytes": self.budget_bytes,
+            }
+
+MODEL_CACHE = ModelCache(MODEL_MEMORY_BUDGET_MB * 2 ** 20)
+
+def prepare_samples(samples, sample_rate):
+    """
+    Converte un array di campioni (frame,) o (frame, canali), intero o float,
+    in float32 mono a 16kHz normalizzato in [-1, 1]. Il ricampionamento è quello polifase di
+    custom_speech_recognition.dsp, lo stesso per tutti i backend
+    """
+    # Importato qui: il pacchetto costa più di tutto il resto di questo modulo all'avvio
+    from custom_speech_recognition import dsp
+
+    samples = np.asarray(samples)
+    if samples.dtype.kind == "i":
+        samples = samples.astype(np.float32) / float(2 ** (8 * samples.dtype.itemsize - 1))
     else:
-        return FasterWhisperTranscriber(language=language)
+        samples = samples.astype(np.float32, copy=False)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1, dtype=np.float32)
+    if sample_rate != MODEL_SAMPLE_RATE and len(samples) > 0:
+        samples = dsp.resample(samples, sample_rate, MODEL_SAMPLE_RATE).astype(np.float32)
+    return samples
+
+def samples_to_wav_bytes(samples, sample_rate):
+    """Codifica i campioni in un WAV PCM 16 bit mono a 16kHz interamente in memoria"""
+    pcm = (np.clip(prepare_samples(samples, sample_rate), -1.0, 1.0) * 32767).astype("<i2")
+    with io.BytesIO() as wav_file:
+        with wave.open(wav_file, "wb") as wav_writer:
+            wav_writer.setnchannels(1)
+            wav_writer.setsampwidth(2)
+            wav_writer.setframerate(MODEL_SAMPLE_RATE)
+            wav_writer.writeframes(pcm.tobytes())
+        return wav_file.getvalue()
+
+class BaseTranscriber:
+    # True se get_transcription_batch decodifica davvero più clip in una sola chiamata al modello
+    supports_batching = False
+    # True se get_final_transcription è più accurata (e più lenta) della trascrizione usata per i parziali
+    supports_refinement = False
+    # Chiamate che la stessa istanza può eseguire in contemporanea da thread diversi: le pipeline
+    # OpenVINO e i modelli transformers non sono rientranti, quindi di default una alla volta
+    concurrent_calls = 1
+    # Lingua usata quando una chiamata non ne indica una (language=None)
+    language = "it"
+
+    def set_language(self, language):
+        """Cambia la lingua predefinita: è solo un'opzione di decodifica, i pesi restano gli stessi"""
+        self.language = language
+
+    def get_transcription(self, wav_file_path, language=None):
+        raise NotImplementedError("this is an abstract class")
+
+    def get_transcription_batch(self, batch, language=None):
+        """
+        Trascrive una lista di (samples, sample_rate) restituendo un testo per elemento.
+        Di default le clip vengono decodificate una alla volta
+        """
+        return [self.get_transcription_array(samples, sample_rate, language) for samples, sample_rate in batch]
 
-class OllamaWhisperTranscriber:
+    def get_transcription_array(self, samples, sample_rate, language=None):
+        """
+        Trascrive campioni già in memoria. Implementazione di ripiego per i backend
+        che accettano solo file: scrive un WAV temporaneo e chiama get_transcription
+        """
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(samples_to_wav_bytes(samples, sample_rate))
+            return self.get_transcription(path, language)
+        finally:
+            os.unlink(path)
+
+    def get_final_transcription(self, samples, sample_rate, language=None):
+        """Testo definitivo di una frase conclusa; di default è lo stesso dei parziali"""
+        return self.get_transcription_array(samples, sample_rate, language)
+
+@register_backend("ollama")
+class OllamaWhisperTranscriber(BaseTranscriber):
     def __init__(self, language="it"):
         print(f"[INFO] Inizializzando Ollama Whisper per lingua: {language}...")
         self.language = language
@@ -65,13 +263,13 @@ class OllamaWhisperTranscriber:
             print("[ERROR] Ollama non trovato. Installa Ollama da https://ollama.ai")
             raise
 
-    def get_transcription(self, wav_file_path):
+    def get_transcription(self, wav_file_path, language=None):
         try:
             # Comando per trascrivere con Ollama Whisper
             cmd = [
                 "ollama", "run", "whisper",
                 "--model", "whisper",
-                "--language", self.language,
+                "--language", language or self.language,
                 "--file", wav_file_path
             ]
             
@@ -85,53 +283,127 @@ class OllamaWhisperTranscriber:
             print(f"Errore generico: {e}")
             return ''
 
-class FasterWhisperTranscriber:
-    def __init__(self, language="it"):
-        print(f"[INFO] Loading Faster Whisper model for language: {language}...")
-        # Usiamo un modello multilingue invece di tiny.en
-        model_name = "medium" if language == "it" else "tiny.en"
-        self.model = WhisperModel(model_name, device="cuda" if torch.cuda.is_available() else "cpu", 
-                                 compute_type="float32" if torch.cuda.is_available() else "int8")
+@register_backend("faster-whisper", "torch", "faster_whisper")
+class FasterWhisperTranscriber(BaseTranscriber):
+    # I checkpoint sono multilingue: la lingua si sceglie in decodifica, così cambiarla non richiede
+    # di caricare altri pesi
+    def __init__(self, language="it", model_name=FASTER_WHISPER_MODEL, draft_model_name=FASTER_WHISPER_DRAFT_MODEL,
+                 device="auto", compute_type="auto", cpu_threads=0, num_workers=2, beam_size=FINAL_BEAM_SIZE,
+                 draft_beam_size=DRAFT_BEAM_SIZE):
+        from faster_whisper import WhisperModel
+
+        if device == "auto":
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        if compute_type == "auto":
+            compute_type = AUTO_COMPUTE_TYPES.get(device, "default")
+
+        # Chiavi già prese da questo trascrittore: caricare il modello definitivo non deve scartare quello
+        # dei parziali, che resterebbe comunque in memoria e verrebbe ricaricato alla prossima get_model
+        acquired = []
+
+        def load(name):
+            # num_workers=2 permette a microfono e altoparlanti di decodificare davvero in parallelo
+            key = ("faster-whisper", name, device, compute_type, f"{cpu_threads}x{num_workers}")
+            weights = MODEL_CACHE.get(key, lambda: WhisperModel(
+                name, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers),
+                keep=acquired)
+            acquired.append(key)
+            return weights
+
+        # Il modello dei parziali viene caricato per primo: è quello che serve per le prime didascalie
+        self.draft_model = load(draft_model_name or model_name)
+        self.model = load(model_name)
+        self.model_name = model_name
+        # Ogni WhisperModel CTranslate2 decodifica fino a num_workers richieste in parallelo
+        self.concurrent_calls = max(1, num_workers)
+        self.supports_refinement = draft_model_name is not None
+        self.beam_size = beam_size
+        self.draft_beam_size = draft_beam_size if self.supports_refinement else beam_size
         self.language = language
-        print(f"[INFO] Faster Whisper using GPU: {torch.cuda.is_available()}")
+        print(f"[INFO] Faster Whisper su {device} ({compute_type})")
         print(f"[INFO] Language set to: {language}")
+        if self.supports_refinement:
+            print(f"[INFO] Parziali con {draft_model_name}, frasi definitive con {model_name}")
 
-    def get_transcription(self, wav_file_path):
+    def get_transcription(self, wav_file_path, language=None):
+        return self._transcribe(wav_file_path, language, self.model, self.beam_size)
+
+    def get_transcription_array(self, samples, sample_rate, language=None):
+        return self._transcribe(prepare_samples(samples, sample_rate), language, self.draft_model, self.draft_beam_size)
+
+    def get_final_transcription(self, samples, sample_rate, language=None):
+        return self._transcribe(prepare_samples(samples, sample_rate), language, self.model, self.beam_size)
+
+    def _transcribe(self, audio, language, model, beam_size):
         try:
-            # Per l'italiano, specifichiamo la lingua per migliorare l'accuratezza
-            if self.language == "it":
-                segments, _ = self.model.transcribe(wav_file_path, language="it", beam_size=5)
-            else:
-                segments, _ = self.model.transcribe(wav_file_path, beam_size=5)
+            # Lingua esplicita: niente rilevamento automatico, più accurato e più veloce
+            segments, _ = model.transcribe(audio, language=language or self.language, beam_size=beam_size)
             full_text = " ".join(segment.text for segment in segments)
             return full_text.strip()
         except Exception as e:
             print(e)
             return ''
 
-class APIWhisperTranscriber:
+    def get_transcription_words(self, samples, sample_rate, language=None):
+        """Trascrive restituendo le parole come tuple (parola, inizio, fine) in secondi, usate dallo streaming"""
+        try:
+            audio = prepare_samples(samples, sample_rate)
+            segments, _ = self.draft_model.transcribe(audio, language=language or self.language,
+                                                      beam_size=self.draft_beam_size, word_timestamps=True)
+            return [(word.word.strip(), word.start, word.end) for segment in segments for word in segment.words]
+        except Exception as e:
+            print(e)
+            return []
+
+@register_backend("api", "openai")
+class APIWhisperTranscriber(BaseTranscriber):
+    # Ogni chiamata è una richiesta HTTP indipendente
+    concurrent_calls = 4
+
     def __init__(self, api_key=None, language="it"):
+        from openai import OpenAI
+
         # Usa la chiave API dal file keys.py se non viene fornita una chiave specifica
         if api_key is None:
+            from keys import OPENAI_API_KEY
             api_key = OPENAI_API_KEY
         self.client = OpenAI(api_key=api_key)
         self.language = language
     
-    def get_transcription(self, wav_file_path):
+    def get_transcription(self, wav_file_path, language=None):
         try:
             with open(wav_file_path, "rb") as audio_file:
                 result = self.client.audio.transcriptions.create(
                     model="whisper-1",
                     file=audio_file,
-                    language=self.language
+                    language=language or self.language
                 )
             return result.text.strip()
         except Exception as e:
             print(e)
             return ''
 
-class OpenVINOWhisperTranscriber:
+    def get_transcription_array(self, samples, sample_rate, language=None):
+        try:
+            result = self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=("audio.wav", samples_to_wav_bytes(samples, sample_rate)),
+                language=language or self.language
+            )
+            return result.text.strip()
+        except Exception as e:
+            print(e)
+            return ''
+
+@register_backend("openvino", "optimum", "transformers")
+class OpenVINOWhisperTranscriber(BaseTranscriber):
+    supports_batching = True
+
     def __init__(self, language='it'):
+        from optimum.intel.openvino import OVModelForSpeechSeq2Seq
+        from transformers import AutoProcessor
+
         self.language = language
         # Usa un modello OpenVINO reale disponibile su HuggingFace
         self.model_id = "OpenVINO/whisper-tiny-int8-ov"
@@ -141,121 +413,78 @@ class OpenVINOWhisperTranscriber:
             print(f"[INFO] Caricamento modello OpenVINO: {self.model_path}")
             
             # Usa OVModelForSpeechSeq2Seq direttamente con AutoProcessor
-            self.processor = AutoProcessor.from_pretrained(self.model_path)
-            self.model = OVModelForSpeechSeq2Seq.from_pretrained(self.model_path)
+            self.processor, self.model = MODEL_CACHE.get(("openvino", self.model_path, "CPU"), lambda: (
+                AutoProcessor.from_pretrained(self.model_path), OVModelForSpeechSeq2Seq.from_pretrained(self.model_path)))
             
             print("[INFO] Modello OpenVINO caricato con successo")
         except Exception as e:
             print(f"[ERROR] Errore durante il caricamento del modello OpenVINO: {e}")
             raise
 
-    def get_transcription(self, wav_file_path):
+    def get_transcription(self, wav_file_path, language=None):
         try:
             # Carica il file audio usando soundfile
             import soundfile as sf
             audio, sample_rate = sf.read(wav_file_path)
             
-            # RESAMPLING AUTOMATICO A 16kHz CON FFMPEG (molto più efficiente)
-            if sample_rate != 16000:
-                try:
-                    import subprocess
-                    import tempfile
-                    import os
-                    
-                    print(f"[INFO] OpenVINO: Resampling da {sample_rate}Hz a 16000Hz con FFmpeg")
-                    
-                    # Crea file temporaneo per l'output resampled
-                    fd, temp_resampled_file = tempfile.mkstemp(suffix=".wav")
-                    os.close(fd)
-                    
-                    # Comando FFmpeg per resampling efficiente
-                    ffmpeg_cmd = [
-                        "ffmpeg", 
-                        "-i", wav_file_path,
-                        "-ar", "16000",  # Target sample rate
-                        "-ac", "1",      # Mono
-                        "-y",            # Overwrite output
-                        "-loglevel", "quiet",  # Suppress FFmpeg logs
-                        temp_resampled_file
-                    ]
-                    
-                    # Esegui FFmpeg
-                    result = subprocess.run(ffmpeg_cmd, capture_output=True)
-                    
-                    if result.returncode == 0:
-                        # Ricarica l'audio resampled
-                        audio, sample_rate = sf.read(temp_resampled_file)
-                        print(f"[INFO] OpenVINO: Resampling completato con FFmpeg")
-                        os.unlink(temp_resampled_file)  # Cleanup
-                    else:
-                        print(f"[WARNING] FFmpeg fallito, uso librosa come fallback")
-                        os.unlink(temp_resampled_file)
-                        # Fallback a librosa/scipy solo se FFmpeg fallisce
-                        try:
-                            import librosa
-                            audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=16000)
-                            sample_rate = 16000
-                        except ImportError:
-                            try:
-                                from scipy import signal
-                                resampling_factor = 16000 / sample_rate
-                                new_length = int(len(audio) * resampling_factor)
-                                audio = signal.resample(audio, new_length)
-                                sample_rate = 16000
-                            except ImportError:
-                                print("[ERROR] FFmpeg, librosa e scipy non disponibili per resampling")
-                                print(f"[INFO] Tentativo con sample rate originale: {sample_rate}Hz")
-                                
-                except Exception as e:
-                    print(f"[WARNING] Errore durante resampling FFmpeg: {e}, uso fallback")
-                    # Fallback a librosa/scipy
-                    try:
-                        import librosa
-                        audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=16000)
-                        sample_rate = 16000
-                    except ImportError:
-                        try:
-                            from scipy import signal
-                            resampling_factor = 16000 / sample_rate
-                            new_length = int(len(audio) * resampling_factor)
-                            audio = signal.resample(audio, new_length)
-                            sample_rate = 16000
-                        except ImportError:
-                            print("[ERROR] Nessun metodo di resampling disponibile")
-                            print(f"[INFO] Tentativo con sample rate originale: {sample_rate}Hz")
-            
-            # Preprocessa l'audio con il sample rate corretto
-            inputs = self.processor(
-                audio,
-                sampling_rate=16000,  # Forza sempre 16kHz per Whisper
-                return_tensors="pt"
-            )
-            
-            # Genera la trascrizione
-            if self.language == "it":
-                # Forza la lingua italiana
-                predicted_ids = self.model.generate(
-                    inputs["input_features"],
-                    language="italian",
-                    task="transcribe"
-                )
-            else:
-                predicted_ids = self.model.generate(inputs["input_features"])
-            
-            # Decodifica il testo
-            transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-            return transcription.strip()
+            # Ricampionamento in memoria a 16kHz (niente ffmpeg né file temporanei)
+            audio = prepare_samples(audio, sample_rate)
             
+            return self._transcribe(audio, language)
+
         except Exception as e:
             print(f"[ERROR] Errore durante la trascrizione OpenVINO: {e}")
             return ''
 
-class OpenVINOGenAITranscriber:
+    def get_transcription_array(self, samples, sample_rate, language=None):
+        try:
+            return self._transcribe(prepare_samples(samples, sample_rate), language)
+        except Exception as e:
+            print(f"[ERROR] Errore durante la trascrizione OpenVINO: {e}")
+            return ''
+
+    def get_transcription_batch(self, batch, language=None):
+        try:
+            # Il processor porta ogni clip alla finestra di 30 s, quindi il batch ha forma uniforme
+            audios = [prepare_samples(samples, sample_rate) for samples, sample_rate in batch]
+            inputs = self.processor(audios, sampling_rate=16000, return_tensors="pt")
+            predicted_ids = self._generate(inputs["input_features"], language)
+            transcriptions = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)
+            return [transcription.strip() for transcription in transcriptions]
+        except Exception as e:
+            print(f"[ERROR] Errore durante la trascrizione batch OpenVINO: {e}")
+            return [''] * len(batch)
+
+    def _transcribe(self, audio, language=None):
+        # Preprocessa l'audio con il sample rate corretto
+        inputs = self.processor(
+            audio,
+            sampling_rate=16000,  # Forza sempre 16kHz per Whisper
+            return_tensors="pt"
+        )
+        
+        # Genera e decodifica il testo
+        predicted_ids = self._generate(inputs["input_features"], language)
+        transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
+        return transcription.strip()
+
+    def _generate(self, input_features, language=None):
+        # Forza la lingua (codice ISO, es. "it"): stesso modello per tutte, cambia solo il token iniziale
+        return self.model.generate(
+            input_features,
+            language=language or self.language,
+            task="transcribe"
+        )
+
+@register_backend("openvino-genai", "openvino_genai")
+class OpenVINOGenAITranscriber(BaseTranscriber):
     def __init__(self, language='it'):
         self.language = language
         self.model_path = "whisper-large-v3-turbo-int8"
         
-        if not OPENVINO_GENAI_AVAILABLE:
+        try:
+            import openvino_genai as ov_genai
+        except ImportError:
             print("[ERROR] OpenVINO GenAI non disponibile. Installa con: pip install openvino-genai")
             raise ImportError("OpenVINO GenAI dependencies not available")
         
@@ -268,8 +497,9 @@ class OpenVINOGenAITranscriber:
                 print(f"[INFO] Tentativo caricamento modello OpenVINO GenAI: {self.model_path}")
                 print(f"[INFO] Dispositivo: {device}")
                 
-                # Inizializza la pipeline Whisper
-                self.pipe = ov_genai.WhisperPipeline(self.model_path, device)
+                # Inizializza la pipeline Whisper (o riusa quella già caricata su questo dispositivo)
+                self.pipe = MODEL_CACHE.get(("openvino-genai", self.model_path, device),
+                                            lambda: ov_genai.WhisperPipeline(self.model_path, device))
                 self.device = device
                 
                 print(f"[INFO] ✅ Modello OpenVINO GenAI caricato con successo su {device}")
@@ -288,21 +518,39 @@ class OpenVINOGenAITranscriber:
         if self.pipe is None:
             raise RuntimeError("Impossibile caricare il modello OpenVINO GenAI su nessun dispositivo")
 
-    def get_transcription(self, wav_file_path):
+    def get_transcription(self, wav_file_path, language=None):
+        if self.pipe is None:
+            print("[ERROR] Modello non inizializzato correttamente")
+            return ''
+        try:
+            return self.pipe.generate(wav_file_path, language=f"<|{language or self.language}|>", task="transcribe")
+        except Exception as e:
+            print(f"[ERROR] Errore durante la trascrizione OpenVINO GenAI: {e}")
+            return ''
+
+    def get_transcription_array(self, samples, sample_rate, language=None):
         if self.pipe is None:
             print("[ERROR] Modello non inizializzato correttamente")
             return ''
         try:
-            return self.pipe.generate(wav_file_path)
+            # La pipeline accetta direttamente il parlato grezzo float32 a 16kHz
+            return str(self.pipe.generate(prepare_samples(samples, sample_rate), language=f"<|{language or self.language}|>",
+                                          task="transcribe")).strip()
         except Exception as e:
             print(f"[ERROR] Errore durante la trascrizione OpenVINO GenAI: {e}")
             return ''
 
-class VoxtralTranscriber:
+@register_backend("voxtral", "torch", "transformers")
+class VoxtralTranscriber(BaseTranscriber):
+    supports_batching = True
+
     def __init__(self, language="it"):
         print(f"[INFO] Inizializzando Voxtral-Mini-3B per lingua: {language}...")
         
-        if not VOXTRAL_AVAILABLE:
+        try:
+            import torch
+            from transformers import VoxtralForConditionalGeneration, AutoProcessor as VoxtralProcessor
+        except ImportError:
             print("[ERROR] Voxtral non disponibile. Installa con: pip install transformers mistral_common")
             raise ImportError("Voxtral dependencies not available")
         
@@ -324,13 +572,12 @@ class VoxtralTranscriber:
         try:
             print(f"[INFO] Caricamento modello Voxtral: {self.model_id}")
             
-            # Carica il processore e il modello
-            self.processor = VoxtralProcessor.from_pretrained(self.model_id)
-            self.model = VoxtralForConditionalGeneration.from_pretrained(
-                self.model_id, 
-                torch_dtype=torch.bfloat16,
-                device_map="auto" if torch.cuda.is_available() else "cpu"
-            )
+            # Carica il processore e il modello (o li riusa se sono già in memoria)
+            device = "auto" if torch.cuda.is_available() else "cpu"
+            self.processor, self.model = MODEL_CACHE.get(("voxtral", self.model_id, device), lambda: (
+                VoxtralProcessor.from_pretrained(self.model_id),
+                VoxtralForConditionalGeneration.from_pretrained(self.model_id, torch_dtype=torch.bfloat16, device_map=device)
+            ))
             
             print(f"[INFO] Voxtral caricato con successo - GPU: {torch.cuda.is_available()}")
             print(f"[INFO] Lingua impostata: {self.language}")
@@ -339,8 +586,10 @@ class VoxtralTranscriber:
             print(f"[ERROR] Errore durante il caricamento di Voxtral: {e}")
             raise
 
-    def get_transcription(self, wav_file_path):
+    def get_transcription(self, wav_file_path, language=None):
         try:
+            import torch
+
             # Crea la conversazione per la trascrizione
             conversation = [
                 {
@@ -378,12 +627,50 @@ class VoxtralTranscriber:
         except Exception as e:
             print(f"[ERROR] Errore durante la trascrizione Voxtral: {e}")
             return ''
+
+    def get_transcription_array(self, samples, sample_rate, language=None):
+        return self.get_transcription_batch([(samples, sample_rate)], language)[0]
+
+    def get_transcription_batch(self, batch, language=None):
+        try:
+            import torch
+
+            # Richiesta di trascrizione con l'audio passato direttamente come array;
+            # il processor allinea le clip del batch con padding
+            inputs = self.processor.apply_transcription_request(
+                language=language or self.language,
+                audio=[prepare_samples(samples, sample_rate) for samples, sample_rate in batch],
+                model_id=self.model_id,
+                sampling_rate=MODEL_SAMPLE_RATE
+            )
+            inputs = inputs.to(self.model.device, dtype=torch.bfloat16)
+            
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=500,
+                    temperature=0.0,
+                    do_sample=False
+                )
+            
+            transcriptions = self.processor.batch_decode(
+                outputs[:, inputs.input_ids.shape[1]:], 
+                skip_special_tokens=True
+            )
+            
+            return [transcription.strip() for transcription in transcriptions]
+            
+        except Exception as e:
+            print(f"[ERROR] Errore durante la trascrizione Voxtral: {e}")
+            return [''] * len(batch)
     
     def get_audio_understanding(self, wav_file_path, question="Trascrivi questo audio"):
         """
         Metodo avanzato per comprensione audio con domande personalizzate
         """
         try:
+            import torch
+
             conversation = [
                 {
                     "role": "user",
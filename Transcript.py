@@ -0,0 +1,102 @@
+import threading
+from collections import namedtuple
+
+MAX_PHRASES = 10
+
+# Righe visibili (id in ordine, dal più recente) e solo quelle cambiate dopo la versione richiesta
+TranscriptUpdate = namedtuple("TranscriptUpdate", ["version", "order", "changed"])
+
+class Transcript:
+    """
+    Trascrizione versionata: ogni frase ha un id stabile e ogni modifica incrementa ``version``.
+
+    Chi legge periodicamente conserva l'ultima versione vista e chiama ``get_since``: se nulla è
+    cambiato ottiene None senza alcun lavoro, altrimenti solo le righe modificate più l'ordine
+    corrente. Il testo completo viene ricostruito al massimo una volta per versione.
+    """
+    def __init__(self, speakers, max_phrases=MAX_PHRASES):
+        self.max_phrases = max_phrases
+        self.lock = threading.RLock()
+        self.version = 0
+        self._next_id = 0
+        # id -> [speaker, riga, istante, versione dell'ultima modifica]
+        self._entries = {}
+        # Per ogni speaker gli id delle sue frasi, dalla più recente
+        self._phrases = {speaker: [] for speaker in speakers}
+        self._order = []
+        self._rendered = ""
+
+    def add(self, speaker, text, time_spoken):
+        """Aggiunge una nuova frase in cima e ne restituisce l'id"""
+        with self.lock:
+            phrases = self._phrases.setdefault(speaker, [])
+            if len(phrases) > self.max_phrases:
+                del self._entries[phrases.pop(-1)]
+            entry_id = self._next_id
+            self._next_id += 1
+            phrases.insert(0, entry_id)
+            self._set(entry_id, speaker, text, time_spoken)
+            return entry_id
+
+    def update(self, entry_id, text, time_spoken=None):
+        """Sostituisce il testo di una frase; restituisce False se la frase non esiste più"""
+        with self.lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                return False
+            if entry[1] == self.format_line(entry[0], text) and time_spoken in (None, entry[2]):
+                return True
+            self._set(entry_id, entry[0], text, entry[2] if time_spoken is None else time_spoken)
+            return True
+
+    def __contains__(self, entry_id):
+        with self.lock:
+            return entry_id in self._entries
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            for phrases in self._phrases.values():
+                phrases.clear()
+            self._changed()
+
+    @staticmethod
+    def format_line(speaker, text):
+        return f"{speaker}: [{text}]\n\n"
+
+    def _set(self, entry_id, speaker, text, time_spoken):
+        self.version += 1
+        self._entries[entry_id] = [speaker, self.format_line(speaker, text), time_spoken, self.version]
+        self._changed(bump=False)
+
+    def _changed(self, bump=True):
+        if bump:
+            self.version += 1
+        # Le frasi visibili sono le max_phrases più recenti tra tutti gli speaker
+        order = sorted(self._entries, key=lambda entry_id: self._entries[entry_id][2],
+                       reverse=True)[:self.max_phrases]
+        # Una frase che torna visibile conta come cambiata, così chi legge la riceve
+        for entry_id in set(order).difference(self._order):
+            self._entries[entry_id][3] = self.version
+        self._order = order
+        self._rendered = None
+
+    def render(self):
+        """Testo completo della trascrizione, dalla frase più recente"""
+        with self.lock:
+            if self._rendered is None:
+                self._rendered = "".join(self._entries[entry_id][1] for entry_id in self._order)
+            return self._rendered
+
+    def get_since(self, version):
+        """
+        Restituisce None se la trascrizione non è cambiata dopo ``version``, altrimenti un
+        TranscriptUpdate con l'ordine corrente e le sole righe modificate (id -> riga).
+        Gli id assenti da ``order`` rispetto all'aggiornamento precedente sono stati rimossi.
+        """
+        with self.lock:
+            if version == self.version:
+                return None
+            changed = {entry_id: self._entries[entry_id][1] for entry_id in self._order
+                       if self._entries[entry_id][3] > version}
+            return TranscriptUpdate(self.version, list(self._order), changed)
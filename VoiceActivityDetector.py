@@ -0,0 +1,164 @@
+import os
+import numpy as np
+from custom_speech_recognition import dsp
+
+# WebRTC VAD (opzionale)
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+# Silero VAD via ONNX Runtime (opzionale)
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+VAD_SAMPLE_RATE = 16000
+# Backend usato di default da AudioTranscriber ("webrtc", "silero" oppure None per disattivare)
+VAD_BACKEND = "webrtc"
+# Audio mantenuto prima e dopo ogni frame di parlato, per non tagliare l'inizio e la fine delle parole
+SPEECH_PADDING = 0.2
+SILERO_MODEL_PATH = os.environ.get("SILERO_VAD_MODEL", "silero_vad.onnx")
+
+def get_vad(name=VAD_BACKEND):
+    """Crea un rilevatore di attività vocale; restituisce None se il backend non è disponibile"""
+    if name is None:
+        return None
+    try:
+        if name == "webrtc":
+            return WebRTCVAD()
+        elif name == "silero":
+            return SileroVAD()
+    except (ImportError, OSError) as e:
+        print(f"[WARNING] VAD '{name}' non disponibile ({e}), filtro disattivato")
+        return None
+    raise ValueError(f"Unknown VAD backend: {name}")
+
+class BaseVAD:
+    """
+    Rilevatore di attività vocale applicato ai blocchi audio prima dell'accumulatore.
+    L'analisi avviene su audio mono a 16kHz diviso in frame da ``frame_length`` campioni;
+    i frame senza parlato (più un margine di SPEECH_PADDING) vengono scartati dall'audio originale.
+    L'ultimo audio scartato resta da parte (pre-roll), così il margine prima di un parlato che inizia
+    all'inizio di un blocco arriva comunque dal blocco precedente.
+    Ogni istanza ha stato proprio, quindi va usata per una sola sorgente.
+    """
+    frame_length = 480
+
+    def __init__(self, padding=SPEECH_PADDING):
+        self.padding_frames = int(round(padding * VAD_SAMPLE_RATE / self.frame_length))
+        self.hangover = 0
+        # Coda dell'audio scartato (frame originali) e se l'ultimo frame del blocco precedente è stato tenuto
+        self.pre_roll = None
+        self.tail_kept = False
+        self.speech_frames = 0
+        self.total_frames = 0
+
+    def speech_mask(self, samples):
+        """Restituisce un array booleano con un valore per frame (samples: int16 mono a 16kHz)"""
+        raise NotImplementedError("this is an abstract class")
+
+    def filter(self, data, sample_rate, channels=1):
+        """Restituisce solo le parti di parlato di ``data`` (PCM int16 interleaved), b"" se non ce ne sono"""
+        frames = np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+        if len(frames) == 0:
+            return b""
+
+        analysis = to_vad_input(frames, sample_rate)
+        frame_count = -(-len(analysis) // self.frame_length)
+        padded = np.zeros(frame_count * self.frame_length, dtype=np.int16)
+        padded[:len(analysis)] = analysis
+        mask = self.speech_mask(padded)
+        self.total_frames += frame_count
+        self.speech_frames += int(mask.sum())
+
+        # Estende il parlato di padding_frames in entrambe le direzioni: in avanti anche nel blocco
+        # successivo (hangover), all'indietro nel blocco precedente con il pre-roll
+        keep = np.convolve(mask, np.ones(2 * self.padding_frames + 1), mode="same") > 0
+        keep[:self.hangover] = True
+        speech_indices = np.flatnonzero(mask)
+        if len(speech_indices):
+            self.hangover = max(0, self.padding_frames - (frame_count - 1 - speech_indices[-1]))
+        else:
+            self.hangover = max(0, self.hangover - frame_count)
+
+        if self.pre_roll is None or self.pre_roll.shape[1] != channels:
+            self.pre_roll = frames[:0].copy()
+        pre_roll = frames[:0]
+        if len(speech_indices) and speech_indices[0] < self.padding_frames and not self.tail_kept:
+            # La fine del blocco precedente è stata scartata, ma serve come margine prima del parlato
+            needed = round((self.padding_frames - speech_indices[0]) * self.frame_length * sample_rate / VAD_SAMPLE_RATE)
+            pre_roll = self.pre_roll[max(0, len(self.pre_roll) - needed):]
+
+        frame_of_sample = np.arange(len(frames)) * VAD_SAMPLE_RATE // sample_rate // self.frame_length
+        sample_keep = keep[np.minimum(frame_of_sample, frame_count - 1)]
+        kept = np.flatnonzero(sample_keep)
+        rejected_tail = frames[kept[-1] + 1:] if len(kept) else np.concatenate([self.pre_roll, frames])
+        # Copia: i dati possono essere una vista su un buffer che la coda riusa
+        max_pre_roll = round(self.padding_frames * self.frame_length * sample_rate / VAD_SAMPLE_RATE)
+        self.pre_roll = rejected_tail[max(0, len(rejected_tail) - max_pre_roll):].copy()
+        self.tail_kept = bool(keep[-1])
+
+        if not len(kept):
+            return b""
+        if len(pre_roll) == 0 and len(kept) == len(frames):
+            return data
+        return np.concatenate([pre_roll, frames[sample_keep]]).tobytes()
+
+def to_vad_input(frames, sample_rate):
+    """Porta frame int16 (frame, canali) a int16 mono a 16kHz per l'analisi"""
+    mono = frames.mean(axis=1) if frames.shape[1] > 1 else frames[:, 0].astype(np.float64)
+    if sample_rate != VAD_SAMPLE_RATE:
+        mono = dsp.resample(mono, sample_rate, VAD_SAMPLE_RATE)
+    return dsp.to_int16(mono)
+
+class WebRTCVAD(BaseVAD):
+    """Classificatore di frame WebRTC (GMM), frame da 30 ms"""
+    frame_length = 480
+
+    def __init__(self, aggressiveness=2, padding=SPEECH_PADDING):
+        if not WEBRTCVAD_AVAILABLE:
+            raise ImportError("webrtcvad not installed: pip install webrtcvad")
+        super().__init__(padding)
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def speech_mask(self, samples):
+        frame_bytes = samples.tobytes()
+        step = self.frame_length * 2
+        return np.fromiter(
+            (self.vad.is_speech(frame_bytes[i:i + step], VAD_SAMPLE_RATE) for i in range(0, len(frame_bytes), step)),
+            dtype=bool, count=len(samples) // self.frame_length)
+
+class SileroVAD(BaseVAD):
+    """Rete neurale Silero VAD (v5, ONNX) eseguita su CPU, frame da 32 ms"""
+    frame_length = 512
+    context_length = 64
+
+    def __init__(self, model_path=SILERO_MODEL_PATH, threshold=0.5, padding=SPEECH_PADDING):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime not installed: pip install onnxruntime")
+        super().__init__(padding)
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.threshold = threshold
+        self.sample_rate = np.array(VAD_SAMPLE_RATE, dtype=np.int64)
+        self.state = np.zeros((2, 1, 128), dtype=np.float32)
+        self.context = np.zeros((1, self.context_length), dtype=np.float32)
+
+    def speech_mask(self, samples):
+        # Tutti i frame del blocco vengono convertiti in una volta; la rete è ricorrente,
+        # quindi i frame vengono poi valutati in sequenza mantenendo lo stato tra un blocco e l'altro
+        frames = (samples.astype(np.float32) / 32768.0).reshape(-1, self.frame_length)
+        mask = np.empty(len(frames), dtype=bool)
+        for i, frame in enumerate(frames):
+            model_input = np.concatenate([self.context, frame[np.newaxis, :]], axis=1)
+            probability, self.state = self.session.run(
+                None, {"input": model_input, "state": self.state, "sr": self.sample_rate})
+            self.context = model_input[:, -self.context_length:]
+            mask[i] = probability.item() >= self.threshold
+        return mask
@@ -8,9 +8,7 @@ import tempfile
 import sys
 import subprocess
 import wave
-import aifc
 import math
-import audioop
 import collections
 import json
 import base64
@@ -25,6 +23,11 @@ try:
 except (ModuleNotFoundError, ImportError):
     pass
 
+try:  # ``aifc`` was removed from the standard library in Python 3.13
+    import aifc
+except ImportError:
+    aifc = None
+
 __author__ = "Anthony Zhang (Uberi)"
 __version__ = "3.10.0"
 __license__ = "BSD"
@@ -33,7 +36,12 @@ from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 from urllib.error import URLError, HTTPError
 
+from . import dsp
 from .audio import AudioData, get_flac_converter
+from .ringbuffer import RingBuffer
+from .devices import DeviceCache, HEARING_THRESHOLD, device_key, probe_devices
+from .segmenter import SegmentEvent, StreamingSegmenter
+from .noisefloor import NoiseFloorTracker
 from .exceptions import (
     RequestError,
     TranscriptionFailed, 
@@ -133,43 +141,73 @@ class Microphone(AudioSource):
         return result
 
     @staticmethod
-    def list_working_microphones():
+    def list_working_microphones(parallel=False, timeout=None, cache=None, lock=None):
         """
         Returns a dictionary mapping device indices to microphone names, for microphones that are currently hearing sounds. When using this function, ensure that your microphone is unmuted and make some noise at it to ensure it will be detected as working.
 
         Each key in the returned dictionary can be passed to the ``Microphone`` constructor to use that microphone. For example, if the return value is ``{3: "HDA Intel PCH: ALC3232 Analog (hw:1,0)"}``, you can do ``Microphone(device_index=3)`` to use that microphone.
+
+        With ``parallel=True`` every device is probed at the same time instead of one after another, and a device that doesn't answer within ``timeout`` seconds is treated as not working. ``cache`` is an optional ``DeviceCache``: devices with a recent result for the same hardware are not opened at all, so repeated calls return immediately, while devices that were plugged in or changed since are probed again.
+
+        PortAudio initialization and termination, and every stream open and close, happen while holding ``lock`` (a private lock if ``None``). Pass the lock that guards the application's other uses of PortAudio so that probing can run alongside them.
         """
+        if lock is None:
+            lock = threading.Lock()
         pyaudio_module = Microphone.get_pyaudio()
-        audio = pyaudio_module.PyAudio()
+        with lock:
+            audio = pyaudio_module.PyAudio()
+        pending = []
         try:
-            result = {}
+            devices, keys, host_api_names = {}, {}, {}
             for device_index in range(audio.get_device_count()):
                 device_info = audio.get_device_info_by_index(device_index)
-                device_name = device_info.get("name")
                 assert isinstance(device_info.get("defaultSampleRate"), (float, int)) and device_info["defaultSampleRate"] > 0, "Invalid device info returned from PyAudio: {}".format(device_info)
-                try:
-                    # read audio
-                    pyaudio_stream = audio.open(
-                        input_device_index=device_index, channels=1, format=pyaudio_module.paInt16,
-                        rate=int(device_info["defaultSampleRate"]), input=True
-                    )
-                    try:
-                        buffer = pyaudio_stream.read(1024)
-                        if not pyaudio_stream.is_stopped(): pyaudio_stream.stop_stream()
-                    finally:
-                        pyaudio_stream.close()
-                except Exception:
-                    continue
-
-                # compute RMS of debiased audio
-                energy = -audioop.rms(buffer, 2)
-                energy_bytes = bytes([energy & 0xFF, (energy >> 8) & 0xFF])
-                debiased_energy = audioop.rms(audioop.add(buffer, energy_bytes * (len(buffer) // 2), 2), 2)
-
-                if debiased_energy > 30:  # probably actually audio
-                    result[device_index] = device_name
+                host_api = device_info.get("hostApi")
+                if host_api not in host_api_names:
+                    host_api_names[host_api] = audio.get_host_api_info_by_index(host_api)["name"]
+                key = device_key(device_info, host_api_names[host_api])
+                duplicates = sum(1 for other in keys.values() if other == key or other.startswith(key + " #"))
+                keys[device_index] = key if duplicates == 0 else "{} #{}".format(key, duplicates + 1)
+                devices[device_index] = device_info
+
+            if cache is None:
+                to_probe = devices
+            else:
+                stale = set(cache.sync({keys[device_index]: device_info for device_index, device_info in devices.items()}))
+                to_probe = {device_index: device_info for device_index, device_info in devices.items() if keys[device_index] in stale}
+            energies, pending = probe_devices(audio, pyaudio_module, to_probe, parallel, timeout, lock)
+            if cache is not None:
+                for device_index, energy in energies.items():
+                    cache.put(keys[device_index], device_index, devices[device_index], energy)
+                cache.save()
+
+            result = {}
+            for device_index, device_info in devices.items():
+                if device_index in energies:
+                    energy = energies[device_index]
+                else:
+                    entry = cache.get(keys[device_index], device_info)
+                    energy = entry["energy"] if entry is not None else None
+                if energy is not None and energy != "timeout" and energy > HEARING_THRESHOLD:  # probably actually audio
+                    result[device_index] = device_info.get("name")
         finally:
-            audio.terminate()
+            if not pending:
+                with lock:
+                    audio.terminate()
+            else:
+                # abandoned probes still use PortAudio: terminate it only once the last one returns
+                remaining = [len(pending)]
+                remaining_lock = threading.Lock()
+
+                def probe_done(_):
+                    with remaining_lock:
+                        remaining[0] -= 1
+                        last = remaining[0] == 0
+                    if last:
+                        with lock:
+                            audio.terminate()
+                for future in pending:
+                    future.add_done_callback(probe_done)
         return result
 
     def __enter__(self):
@@ -223,6 +261,74 @@ class Microphone(AudioSource):
                 self.pyaudio_stream.close()
 
 
+class CallbackMicrophone(Microphone):
+    """
+    Creates a new ``CallbackMicrophone`` instance, a ``Microphone`` whose stream is opened in PortAudio callback mode. Subclass of ``Microphone``, with the same constructor arguments plus ``buffer_seconds``.
+
+    Every block delivered by PortAudio is copied into a preallocated ``RingBuffer`` holding ``buffer_seconds`` seconds of audio, and ``source.stream.read`` (used by ``recognizer_instance.listen`` and ``recognizer_instance.listen_in_background``) consumes from that ring. Capture therefore keeps running while the reading thread is stalled, for example by GIL contention with a transcription model, and audio is only lost if the ring fills up.
+
+    Lost audio is counted rather than hidden: ``stream.overrun_bytes``/``stream.overrun_count`` count data dropped because the ring was full, and ``stream.input_overflows`` counts blocks PortAudio itself flagged as overflowed.
+    """
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024, speaker=False, channels=1, buffer_seconds=10):
+        super().__init__(device_index=device_index, sample_rate=sample_rate, chunk_size=chunk_size, speaker=speaker, channels=channels)
+        assert buffer_seconds > 0, "Buffer duration must be positive"
+        self.buffer_seconds = buffer_seconds
+
+    def __enter__(self):
+        assert self.stream is None, "This audio source is already inside a context manager"
+        self.audio = self.pyaudio_module.PyAudio()
+
+        frame_bytes = self.SAMPLE_WIDTH * self.channels
+        ring = RingBuffer(int(self.buffer_seconds * self.SAMPLE_RATE) * frame_bytes, frame_bytes)
+        try:
+            self.stream = CallbackMicrophone.RingStream(ring, self.SAMPLE_WIDTH * self.channels, self.pyaudio_module)
+            self.stream.pyaudio_stream = self.audio.open(
+                input_device_index=self.device_index, channels=self.channels, format=self.format,
+                rate=self.SAMPLE_RATE, frames_per_buffer=self.CHUNK, input=True,
+                stream_callback=self.stream.callback,
+            )
+            self.stream.pyaudio_stream.start_stream()
+        except Exception:
+            self.stream = None
+            self.audio.terminate()
+            raise
+        return self
+
+    class RingStream(object):
+        def __init__(self, ring, frame_bytes, pyaudio_module):
+            self.ring = ring
+            self.frame_bytes = frame_bytes
+            self.pyaudio_module = pyaudio_module
+            self.pyaudio_stream = None
+            self.input_overflows = 0
+
+        @property
+        def overrun_bytes(self):
+            return self.ring.overrun_bytes
+
+        @property
+        def overrun_count(self):
+            return self.ring.overrun_count
+
+        def callback(self, in_data, frame_count, time_info, status):
+            # runs on the PortAudio thread: copy and return, never block
+            if status & self.pyaudio_module.paInputOverflow:
+                self.input_overflows += 1
+            self.ring.write(in_data)
+            return None, self.pyaudio_module.paContinue
+
+        def read(self, size):
+            return self.ring.read(size * self.frame_bytes)
+
+        def close(self):
+            try:
+                if not self.pyaudio_stream.is_stopped():
+                    self.pyaudio_stream.stop_stream()
+                self.pyaudio_stream.close()
+            finally:
+                self.ring.close()
+
+
 class AudioFile(AudioSource):
     """
     Creates a new ``AudioFile`` instance given a WAV/AIFF/FLAC audio file ``filename_or_fileobject``. Subclass of ``AudioSource``.
@@ -255,20 +361,21 @@ class AudioFile(AudioSource):
         try:
             # attempt to read the file as WAV
             self.audio_reader = wave.open(self.filename_or_fileobject, "rb")
-            self.little_endian = True  # RIFF WAV is a little-endian format (most ``audioop`` operations assume that the frames are stored in little-endian form)
+            self.little_endian = True  # RIFF WAV is a little-endian format (the ``dsp`` operations assume that the frames are stored in little-endian form)
         except (wave.Error, EOFError):
             try:
                 # attempt to read the file as AIFF
+                if aifc is None: raise EOFError("AIFF support is not available in this version of Python")
                 self.audio_reader = aifc.open(self.filename_or_fileobject, "rb")
                 self.little_endian = False  # AIFF is a big-endian format
-            except (aifc.Error, EOFError):
+            except (getattr(aifc, "Error", EOFError), EOFError):
                 # attempt to read the file as FLAC
                 if hasattr(self.filename_or_fileobject, "read"):
                     flac_data = self.filename_or_fileobject.read()
                 else:
                     with open(self.filename_or_fileobject, "rb") as f: flac_data = f.read()
 
-                # run the FLAC converter with the FLAC data to get the AIFF data
+                # run the FLAC converter with the FLAC data to get the AIFF data (or WAV data, if AIFF can't be read)
                 flac_converter = get_flac_converter()
                 if os.name == "nt":  # on Windows, specify that the process is to be started without showing a console window
                     startup_info = subprocess.STARTUPINFO()
@@ -279,32 +386,29 @@ class AudioFile(AudioSource):
                 process = subprocess.Popen([
                     flac_converter,
                     "--stdout", "--totally-silent",  # put the resulting AIFF file in stdout, and make sure it's not mixed with any program output
-                    "--decode", "--force-aiff-format",  # decode the FLAC file into an AIFF file
+                    "--decode",  # decode the FLAC file into a WAV file...
+                ] + (["--force-aiff-format"] if aifc is not None else []) + [  # ...or into an AIFF file
                     "-",  # the input FLAC file contents will be given in stdin
                 ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, startupinfo=startup_info)
-                aiff_data, _ = process.communicate(flac_data)
-                aiff_file = io.BytesIO(aiff_data)
+                decoded_data, _ = process.communicate(flac_data)
+                decoded_file = io.BytesIO(decoded_data)
                 try:
-                    self.audio_reader = aifc.open(aiff_file, "rb")
-                except (aifc.Error, EOFError):
+                    if aifc is not None:
+                        self.audio_reader = aifc.open(decoded_file, "rb")
+                        self.little_endian = False  # AIFF is a big-endian format
+                    else:
+                        self.audio_reader = wave.open(decoded_file, "rb")
+                        self.little_endian = True
+                except (getattr(aifc, "Error", wave.Error), wave.Error, EOFError):
                     raise ValueError("Audio file could not be read as PCM WAV, AIFF/AIFF-C, or Native FLAC; check if file is corrupted or in another format")
-                self.little_endian = False  # AIFF is a big-endian format
         assert 1 <= self.audio_reader.getnchannels() <= 2, "Audio must be mono or stereo"
-        self.SAMPLE_WIDTH = self.audio_reader.getsampwidth()
-
-        # 24-bit audio needs some special handling for old Python versions (workaround for https://bugs.python.org/issue12866)
-        samples_24_bit_pretending_to_be_32_bit = False
-        if self.SAMPLE_WIDTH == 3:  # 24-bit audio
-            try: audioop.bias(b"", self.SAMPLE_WIDTH, 0)  # test whether this sample width is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
-            except audioop.error:  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
-                samples_24_bit_pretending_to_be_32_bit = True  # while the ``AudioFile`` instance will outwardly appear to be 32-bit, it will actually internally be 24-bit
-                self.SAMPLE_WIDTH = 4  # the ``AudioFile`` instance should present itself as a 32-bit stream now, since we'll be converting into 32-bit on the fly when reading
+        self.SAMPLE_WIDTH = self.audio_reader.getsampwidth()  # 24-bit audio is handled natively by ``dsp``
 
         self.SAMPLE_RATE = self.audio_reader.getframerate()
         self.CHUNK = 4096
         self.FRAME_COUNT = self.audio_reader.getnframes()
         self.DURATION = self.FRAME_COUNT / float(self.SAMPLE_RATE)
-        self.stream = AudioFile.AudioFileStream(self.audio_reader, self.little_endian, samples_24_bit_pretending_to_be_32_bit)
+        self.stream = AudioFile.AudioFileStream(self.audio_reader, self.little_endian)
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -314,10 +418,9 @@ class AudioFile(AudioSource):
         self.DURATION = None
 
     class AudioFileStream(object):
-        def __init__(self, audio_reader, little_endian, samples_24_bit_pretending_to_be_32_bit):
+        def __init__(self, audio_reader, little_endian):
             self.audio_reader = audio_reader  # an audio file object (e.g., a `wave.Wave_read` instance)
             self.little_endian = little_endian  # whether the audio data is little-endian (when working with big-endian things, we'll have to convert it to little-endian before we process it)
-            self.samples_24_bit_pretending_to_be_32_bit = samples_24_bit_pretending_to_be_32_bit  # this is true if the audio is 24-bit audio, but 24-bit audio isn't supported, so we have to pretend that this is 32-bit audio and convert it on the fly
 
         def read(self, size=-1):
             buffer = self.audio_reader.readframes(self.audio_reader.getnframes() if size == -1 else size)
@@ -325,17 +428,68 @@ class AudioFile(AudioSource):
 
             sample_width = self.audio_reader.getsampwidth()
             if not self.little_endian:  # big endian format, convert to little endian on the fly
-                if hasattr(audioop, "byteswap"):  # ``audioop.byteswap`` was only added in Python 3.4 (incidentally, that also means that we don't need to worry about 24-bit audio being unsupported, since Python 3.4+ always has that functionality)
-                    buffer = audioop.byteswap(buffer, sample_width)
-                else:  # manually reverse the bytes of each sample, which is slower but works well enough as a fallback
-                    buffer = buffer[sample_width - 1::-1] + b"".join(buffer[i + sample_width:i:-1] for i in range(sample_width - 1, len(buffer), sample_width))
-
-            # workaround for https://bugs.python.org/issue12866
-            if self.samples_24_bit_pretending_to_be_32_bit:  # we need to convert samples from 24-bit to 32-bit before we can process them with ``audioop`` functions
-                buffer = b"".join(b"\x00" + buffer[i:i + sample_width] for i in range(0, len(buffer), sample_width))  # since we're in little endian, we prepend a zero byte to each 24-bit sample to get a 32-bit sample
-                sample_width = 4  # make sure we thread the buffer as 32-bit audio now, after converting it from 24-bit audio
+                buffer = dsp.byteswap(buffer, sample_width)
             if self.audio_reader.getnchannels() != 1:  # stereo audio
-                buffer = audioop.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
+                buffer = dsp.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
+            return buffer
+
+
+class ReplayFile(AudioFile):
+    """
+    Creates a new ``ReplayFile`` instance, an ``AudioFile`` that plays the file back as if it were a live input device. Subclass of ``AudioFile``, accepting the same WAV/AIFF/FLAC files.
+
+    Reads from ``source.stream`` are paced so that audio is delivered at ``speed`` times real time: ``1`` behaves like a microphone, ``4`` delivers four seconds of audio per second, and ``None`` delivers it as fast as it is read. The audio is always presented as mono 16-bit PCM in buffers of ``chunk_duration`` seconds, so it can go through ``recognizer_instance.listen_in_background`` and the rest of a live capture pipeline unchanged.
+
+    ``finished`` is a ``threading.Event`` that is set once the whole file has been delivered. Each ``ReplayFile`` has its own clock, so several of them can be replayed at the same time.
+    """
+
+    def __init__(self, filename_or_fileobject, speed=1.0, chunk_duration=0.03):
+        super().__init__(filename_or_fileobject)
+        assert speed is None or speed > 0, "Speed must be None or a positive number"
+        assert chunk_duration > 0, "Chunk duration must be positive"
+        self.speed = speed
+        self.chunk_duration = chunk_duration
+        self.channels = 1
+        self.finished = threading.Event()
+
+    def __enter__(self):
+        super().__enter__()
+        self.stream = ReplayFile.ReplayStream(self.stream, self.SAMPLE_RATE, self.SAMPLE_WIDTH, self.speed, self.finished)
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = max(1, int(self.SAMPLE_RATE * self.chunk_duration))
+        self.finished.clear()
+        return self
+
+    class ReplayStream(object):
+        def __init__(self, file_stream, sample_rate, sample_width, speed, finished):
+            self.file_stream = file_stream
+            self.sample_rate = sample_rate
+            self.sample_width = sample_width
+            self.speed = speed
+            self.finished = finished
+            self.position = 0  # frames delivered so far
+            self.start_time = None
+
+        def read(self, size=-1):
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+            buffer = self.file_stream.read(size)
+            if len(buffer) == 0:
+                self.finished.set()
+                return buffer
+
+            # present every file as 16-bit audio, like a microphone opened with ``paInt16``
+            if self.sample_width == 1:
+                buffer = dsp.bias(buffer, 1, -128)  # 8-bit WAV samples are unsigned
+            if self.sample_width != 2:
+                buffer = dsp.lin2lin(buffer, self.sample_width, 2)
+
+            # like a device, return a buffer only once its last frame would have been captured
+            self.position += len(buffer) // 2
+            if self.speed is not None:
+                delay = self.start_time + self.position / (self.sample_rate * self.speed) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
             return buffer
 
 
@@ -400,15 +554,14 @@ class Recognizer(AudioSource):
         assert self.pause_threshold >= self.non_speaking_duration >= 0
 
         seconds_per_buffer = (source.CHUNK + 0.0) / source.SAMPLE_RATE
-        elapsed_time = 0
+        buffer_count = int(duration / seconds_per_buffer + 1e-9)
 
-        # adjust energy threshold until a phrase starts
-        while True:
-            elapsed_time += seconds_per_buffer
-            if elapsed_time > duration: break
-            buffer = source.stream.read(source.CHUNK)
-            energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
+        # read all the calibration audio first, then measure the energy of every buffer in a single pass
+        buffers = [source.stream.read(source.CHUNK) for _ in range(buffer_count)]
+        samples_per_buffer = len(buffers[0]) // source.SAMPLE_WIDTH if buffers else 1
+        energies = dsp.rms_frames(b"".join(buffers), source.SAMPLE_WIDTH, max(1, samples_per_buffer))
 
+        for energy in energies.tolist():
             # dynamically adjust the energy threshold using asymmetric weighted average
             damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
             target_energy = energy * self.dynamic_energy_ratio
@@ -451,7 +604,7 @@ class Recognizer(AudioSource):
             frames.append(buffer)
 
             # resample audio to the required sample rate
-            resampled_buffer, resampling_state = audioop.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
+            resampled_buffer, resampling_state = dsp.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
             resampled_frames.append(resampled_buffer)
             if time.time() - last_check > check_interval:
                 # run Snowboy on the resampled audio
@@ -511,7 +664,7 @@ class Recognizer(AudioSource):
                         frames.popleft()
 
                     # detect whether speaking has started on audio input
-                    energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
+                    energy = dsp.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
                     if energy > self.energy_threshold: break
 
                     # dynamically adjust the energy threshold using asymmetric weighted average
@@ -542,7 +695,7 @@ class Recognizer(AudioSource):
                 phrase_count += 1
 
                 # check if speaking has stopped for longer than the pause threshold on the audio input
-                energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # unit energy of the audio signal within the buffer
+                energy = dsp.rms(buffer, source.SAMPLE_WIDTH)  # unit energy of the audio signal within the buffer
                 if energy > self.energy_threshold:
                     pause_count = 0
                 else:
@@ -560,33 +713,39 @@ class Recognizer(AudioSource):
 
         return AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
 
-    def listen_in_background(self, source, callback, phrase_time_limit=None):
+    def listen_in_background(self, source, callback, phrase_time_limit=None, event_callback=None, partial_interval=None, noise_tracker=None):
         """
         Spawns a thread to repeatedly record phrases from ``source`` (an ``AudioSource`` instance) into an ``AudioData`` instance and call ``callback`` with that ``AudioData`` instance as soon as each phrase are detected.
 
-        Returns a function object that, when called, requests that the background listener thread stop. The background thread is a daemon and will not stop the program from exiting if there are no other non-daemon threads. The function accepts one parameter, ``wait_for_stop``: if truthy, the function will wait for the background listener to stop before returning, otherwise it will return immediately and the background listener thread might still be running for a second or two afterwards. Additionally, if you are using a truthy value for ``wait_for_stop``, you must call the function from the same thread you originally called ``listen_in_background`` from.
+        Returns a function object that, when called, requests that the background listener thread stop. The background thread is a daemon and will not stop the program from exiting if there are no other non-daemon threads. The function accepts one parameter, ``wait_for_stop``: if truthy, the function will wait for the background listener to stop before returning, otherwise it will return immediately and the background listener thread might still be running for a moment afterwards. Additionally, if you are using a truthy value for ``wait_for_stop``, you must call the function from the same thread you originally called ``listen_in_background`` from.
 
-        Phrase recognition uses the exact same mechanism as ``recognizer_instance.listen(source)``. The ``phrase_time_limit`` parameter works in the same way as the ``phrase_time_limit`` parameter for ``recognizer_instance.listen(source)``, as well.
+        Phrase detection uses the same energy rules as ``recognizer_instance.listen(source)``, but runs as a single ``StreamingSegmenter`` over the whole stream instead of restarting ``listen`` for every phrase, so no audio between phrases is lost. The ``phrase_time_limit`` parameter works in the same way as the ``phrase_time_limit`` parameter for ``recognizer_instance.listen(source)``, as well.
 
         The ``callback`` parameter is a function that should accept two parameters - the ``recognizer_instance``, and an ``AudioData`` instance representing the captured audio. Note that ``callback`` function will be called from a non-main thread.
+
+        If ``event_callback`` is given, it is called with the ``recognizer_instance`` and every ``SegmentEvent`` (phrase start, partial and end, with sample offsets from the start of the stream); ``partial_interval`` sets how often, in seconds of phrase audio, partial events are emitted.
+
+        ``noise_tracker``, a ``NoiseFloorTracker``, keeps the energy threshold following the background noise of the stream for as long as it is listened to.
         """
         assert isinstance(source, AudioSource), "Source must be an audio source"
         running = [True]
 
         def threaded_listen():
             with source as s:
+                segmenter = StreamingSegmenter(self, s.SAMPLE_RATE, s.SAMPLE_WIDTH, s.CHUNK, getattr(s, "channels", 1), phrase_time_limit, partial_interval, noise_tracker)
                 while running[0]:
-                    try:  # listen for 1 second, then check again if the stop function has been called
-                        audio = self.listen(s, 1, phrase_time_limit)
-                    except WaitTimeoutError:  # listening timed out, just try again
-                        pass
-                    else:
-                        if running[0]: callback(self, audio)
+                    buffer = s.stream.read(s.CHUNK)
+                    events = segmenter.process(buffer) if len(buffer) > 0 else segmenter.flush()
+                    for event in events:
+                        if not running[0]: break
+                        if event_callback is not None: event_callback(self, event)
+                        if event.kind == "end": callback(self, event.audio)
+                    if len(buffer) == 0: break  # reached end of the stream
 
         def stopper(wait_for_stop=True):
             running[0] = False
             if wait_for_stop:
-                listener_thread.join()  # block until the background thread is done, which can take around 1 second
+                listener_thread.join()  # block until the background thread is done, which takes at most one buffer
 
         listener_thread = threading.Thread(target=threaded_listen)
         listener_thread.daemon = True
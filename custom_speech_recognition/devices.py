@@ -0,0 +1,150 @@
+"""Probing of PortAudio input devices, with a persisted cache of the results."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import dsp
+
+DEFAULT_MAX_AGE = 24 * 3600  # seconds a probe result stays valid
+HEARING_THRESHOLD = 30  # debiased RMS above which a device is "probably actually audio"
+
+
+def device_key(device_info, host_api_name):
+    """Stable identifier of a device across runs: device indices change whenever devices are added or removed."""
+    return "{}/{}".format(host_api_name, device_info.get("name"))
+
+
+def device_signature(device_info):
+    """Capabilities that, if they change under the same key, mean a different device was plugged in."""
+    return [device_info.get("maxInputChannels"), device_info.get("defaultSampleRate")]
+
+
+def probe_device(audio, pyaudio_module, device_index, device_info, frames=1024, lock=None):
+    """
+    Opens the device, reads ``frames`` frames and returns the RMS of the debiased audio, or ``None`` if the device can't be opened or read.
+
+    PortAudio is not thread-safe when opening and closing streams, so those steps run while holding ``lock``; only the read happens outside it.
+    """
+    if lock is None:
+        lock = threading.Lock()
+    try:
+        with lock:
+            pyaudio_stream = audio.open(
+                input_device_index=device_index, channels=1, format=pyaudio_module.paInt16,
+                rate=int(device_info["defaultSampleRate"]), input=True
+            )
+        try:
+            buffer = pyaudio_stream.read(frames)
+        finally:
+            with lock:
+                if not pyaudio_stream.is_stopped(): pyaudio_stream.stop_stream()
+                pyaudio_stream.close()
+    except Exception:
+        return None
+
+    # compute RMS of debiased audio
+    energy = -dsp.rms(buffer, 2)
+    energy_bytes = bytes([energy & 0xFF, (energy >> 8) & 0xFF])
+    return dsp.rms(dsp.add(buffer, energy_bytes * (len(buffer) // 2), 2), 2)
+
+
+def probe_devices(audio, pyaudio_module, devices, parallel=False, timeout=None, lock=None):
+    """
+    Probes ``devices`` (a dictionary mapping device indices to device info). Returns a dictionary mapping each index to its debiased energy, ``None`` if it could not be read, or ``"timeout"`` if it didn't answer within ``timeout`` seconds.
+
+    With ``parallel=True`` all the devices are probed at the same time, so the total time is about the one of the slowest device (at most ``timeout``) instead of the sum: streams are opened and closed one at a time under ``lock``, but the reads, which take most of the time, overlap. A device that times out is abandoned: its probe keeps running in the background, and its future is returned in the second element of the result so that ``audio`` is terminated only after it finishes.
+    """
+    if lock is None:
+        lock = threading.Lock()
+    results = {}
+    if not parallel:
+        for device_index, device_info in devices.items():
+            results[device_index] = probe_device(audio, pyaudio_module, device_index, device_info, lock=lock)
+        return results, []
+
+    pool = ThreadPoolExecutor(max_workers=max(1, len(devices)), thread_name_prefix="probe")
+    futures = {device_index: pool.submit(probe_device, audio, pyaudio_module, device_index, device_info, lock=lock)
+               for device_index, device_info in devices.items()}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = []
+    for device_index, future in futures.items():
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            results[device_index] = future.result(remaining)
+        except Exception:  # concurrent.futures.TimeoutError
+            results[device_index] = "timeout"
+            pending.append(future)
+    pool.shutdown(wait=False)
+    return results, pending
+
+
+class DeviceCache(object):
+    """
+    Probe results of input devices, keyed by host API and device name and optionally persisted to a JSON file at ``path``.
+
+    An entry is reused while it is younger than ``max_age`` seconds and the device still reports the same capabilities. ``sync`` compares the cache with the devices PortAudio currently enumerates, which is cheap (no stream is opened): entries of unplugged devices are dropped and new or changed devices are reported for probing, so hot-plugging a device invalidates exactly the entries it affects.
+    """
+
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):  # missing or unreadable: everything is probed again
+            return {}
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            entries = dict(self.entries)
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2)
+        except OSError:
+            pass  # the cache is only an optimization
+
+    def get(self, key, device_info):
+        """Returns the cached entry for the device, or ``None`` if it is missing, stale or was recorded for different hardware."""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None or time.time() - entry["probed_at"] > self.max_age or entry["signature"] != device_signature(device_info):
+            return None
+        return entry
+
+    def put(self, key, device_index, device_info, energy):
+        with self.lock:
+            self.entries[key] = {
+                "index": device_index,
+                "name": device_info.get("name"),
+                "signature": device_signature(device_info),
+                "energy": None if energy == "timeout" else energy,
+                "timed_out": energy == "timeout",
+                "probed_at": time.time(),
+            }
+
+    def sync(self, current):
+        """
+        Brings the cache in line with ``current`` (a dictionary mapping keys to device info of the devices present now): drops unplugged devices and returns the keys that need probing.
+        """
+        with self.lock:
+            for key in [key for key in self.entries if key not in current]:
+                del self.entries[key]
+        return [key for key, device_info in current.items() if self.get(key, device_info) is None]
+
+    def invalidate(self, key=None):
+        """Forgets the entry of one device, or of all devices if ``key`` is ``None``."""
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
@@ -0,0 +1,335 @@
+"""Vectorized helpers for processing 16-bit PCM audio blocks with numpy."""
+
+import functools
+import math
+
+import numpy as np
+
+
+def downmix(frames):
+    """
+    Averages interleaved 16-bit PCM ``frames`` (bytes or an int16 array of shape ``(frames, channels)``) down to a single channel.
+
+    Returns a float64 array with one value per frame.
+    """
+    frames = np.asarray(frames)
+    if frames.ndim == 1:
+        return frames.astype(np.float64)
+    if frames.shape[1] == 1:
+        return frames[:, 0].astype(np.float64)
+    return frames.mean(axis=1)
+
+
+def to_int16(samples):
+    """Rounds and clips floating point ``samples`` to the 16-bit range, returning an int16 array."""
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+def _check_width(width):
+    assert width in (1, 2, 3, 4), "Sample width must be between 1 and 4 inclusive"
+
+
+def _check_fragment(fragment, width, nchannels=1):
+    _check_width(width)
+    assert len(fragment) % (width * nchannels) == 0, "Fragment length must be a multiple of the frame size"
+
+
+def from_bytes(fragment, width):
+    """Decodes little-endian signed PCM samples of ``width`` bytes into an int32 array."""
+    _check_fragment(fragment, width)
+    if width == 3:
+        raw = np.frombuffer(fragment, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        return np.where(samples >= 1 << 23, samples - (1 << 24), samples).astype(np.int32)
+    return np.frombuffer(fragment, dtype=_DTYPES[width]).astype(np.int32)
+
+
+def to_bytes(samples, width):
+    """Encodes integer ``samples`` (already within range) as little-endian signed PCM of ``width`` bytes."""
+    _check_width(width)
+    samples = np.asarray(samples)
+    if width == 3:
+        samples = samples.astype(np.int32)
+        return np.stack([samples & 0xFF, (samples >> 8) & 0xFF, (samples >> 16) & 0xFF], axis=-1).astype(np.uint8).tobytes()
+    return samples.astype(_DTYPES[width]).tobytes()
+
+
+_DTYPES = {1: np.int8, 2: "<i2", 4: "<i4"}
+
+
+def _limits(width):
+    return -(1 << (8 * width - 1)), (1 << (8 * width - 1)) - 1
+
+
+def _float_samples(fragment, width):
+    if width == 3:
+        return from_bytes(fragment, width).astype(np.float64)
+    _check_fragment(fragment, width)
+    return np.frombuffer(fragment, dtype=_DTYPES[width]).astype(np.float64)
+
+
+def rms(fragment, width):
+    """Root mean square of all the samples in ``fragment``, truncated to an integer (same result as ``audioop.rms``)."""
+    samples = _float_samples(fragment, width)
+    if len(samples) == 0:
+        return 0
+    return int(math.sqrt(np.dot(samples, samples) / len(samples)))
+
+
+def rms_frames(fragment, width, frame_length):
+    """
+    RMS of each consecutive block of ``frame_length`` samples in ``fragment``, computed in a single pass.
+
+    Equivalent to calling ``rms`` on every block; a trailing partial block is measured on its own. Returns an int64 array.
+    """
+    assert frame_length > 0, "Frame length must be a positive integer"
+    samples = _float_samples(fragment, width)
+    if len(samples) == 0:
+        return np.zeros(0, dtype=np.int64)
+    whole = len(samples) - len(samples) % frame_length
+    blocks = samples[:whole].reshape(-1, frame_length)
+    energies = np.einsum("ij,ij->i", blocks, blocks) / frame_length
+    if whole < len(samples):
+        tail = samples[whole:]
+        energies = np.append(energies, np.dot(tail, tail) / len(tail))
+    return np.sqrt(energies).astype(np.int64)
+
+
+def add(fragment1, fragment2, width):
+    """Adds two fragments sample by sample, saturating at the limits of the sample width (same result as ``audioop.add``)."""
+    assert len(fragment1) == len(fragment2), "Fragments must have the same length"
+    low, high = _limits(width)
+    total = from_bytes(fragment1, width).astype(np.int64) + from_bytes(fragment2, width)
+    return to_bytes(np.clip(total, low, high), width)
+
+
+def bias(fragment, width, bias):
+    """Adds ``bias`` to every sample, wrapping around on overflow (same result as ``audioop.bias``)."""
+    _check_fragment(fragment, width)
+    if width == 1:
+        # 8-bit samples are biased as unsigned bytes, like audioop does
+        return (np.frombuffer(fragment, dtype=np.uint8).astype(np.int64) + bias).astype(np.uint8).tobytes()
+    modulus = 1 << (8 * width)
+    unsigned = (from_bytes(fragment, width).astype(np.int64) + bias) % modulus
+    return to_bytes(np.where(unsigned >= modulus // 2, unsigned - modulus, unsigned), width)
+
+
+def byteswap(fragment, width):
+    """Reverses the byte order of every sample, converting between little-endian and big-endian."""
+    _check_fragment(fragment, width)
+    return np.frombuffer(fragment, dtype=np.uint8).reshape(-1, width)[:, ::-1].tobytes()
+
+
+def lin2lin(fragment, width, newwidth):
+    """Converts samples between sample widths by shifting, keeping the most significant bits (same result as ``audioop.lin2lin``)."""
+    _check_width(newwidth)
+    samples = from_bytes(fragment, width).astype(np.int64) << (32 - 8 * width)
+    return to_bytes(samples >> (32 - 8 * newwidth), newwidth)
+
+
+def tomono(fragment, width, lfactor, rfactor):
+    """
+    Mixes a stereo fragment down to mono as ``left * lfactor + right * rfactor``, clipped and rounded down (same result as ``audioop.tomono``).
+
+    For averaging a numpy array of frames with any number of channels, see ``downmix``.
+    """
+    _check_fragment(fragment, width, 2)
+    low, high = _limits(width)
+    frames = from_bytes(fragment, width).reshape(-1, 2).astype(np.float64)
+    mixed = frames[:, 0] * lfactor + frames[:, 1] * rfactor
+    mixed = np.where(mixed > high, high, np.where(mixed < low + 1, low, mixed))
+    return to_bytes(np.floor(mixed).astype(np.int64), width)
+
+
+RATECV_BLOCK = 4096  # output frames interpolated at once by ``ratecv``
+
+
+def ratecv(fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+    """
+    Converts the frame rate of ``fragment`` by linear interpolation, returning ``(newfragment, newstate)``.
+
+    This is a vectorized port of ``audioop.ratecv`` that produces the same bytes and a compatible ``state``, so it can be fed the state from a previous call (or ``None`` to start a new stream). With ``weightB`` other than 0 the recursive input filter is applied sample by sample.
+    """
+    _check_fragment(fragment, width, nchannels)
+    assert nchannels >= 1, "# of channels should be >= 1"
+    assert inrate > 0 and outrate > 0, "sampling rate not > 0"
+    assert weightA >= 1 and weightB >= 0, "weightA should be >= 1, weightB should be >= 0"
+
+    divisor = math.gcd(inrate, outrate)
+    inrate, outrate = inrate // divisor, outrate // divisor
+    divisor = math.gcd(weightA, weightB)
+    weightA, weightB = weightA // divisor, weightB // divisor
+
+    # samples are processed as 32-bit values, like audioop does internally; they are kept in int32 and only the
+    # frames picked for the output are widened, since full-size temporaries dominate the cost on long fragments
+    samples = from_bytes(fragment, width)
+    samples <<= 32 - 8 * width
+    samples = samples.reshape(-1, nchannels)
+    if state is None:
+        d = -outrate
+        prev, cur = np.zeros(nchannels, dtype=np.int32), np.zeros(nchannels, dtype=np.int32)
+    else:
+        d, channel_state = state
+        assert len(channel_state) == nchannels, "illegal state argument"
+        prev = np.array([p for p, _ in channel_state], dtype=np.int32)
+        cur = np.array([c for _, c in channel_state], dtype=np.int32)
+
+    if weightB:
+        filtered = np.empty_like(samples)
+        last = cur.copy()
+        for i, frame in enumerate(samples):
+            last = ((weightA * frame.astype(np.float64) + weightB * last.astype(np.float64)) / (weightA + weightB)).astype(np.int64)
+            filtered[i] = last
+        samples = filtered
+
+    # extended[j] and extended[j + 1] are the (previous, current) input pair after consuming j input frames
+    extended = np.concatenate([prev[np.newaxis, :], cur[np.newaxis, :], samples])
+    count = len(samples)
+    total = count * outrate + d
+    outputs = total // inrate + 1 if total >= 0 else 0
+
+    output = np.empty(outputs * nchannels, dtype=np.int32)
+    # outputs are computed in blocks, so the float temporaries of long fragments stay small
+    for first in range(0, outputs, RATECV_BLOCK):
+        k = np.arange(first, min(outputs, first + RATECV_BLOCK), dtype=np.int64)
+        consumed = np.maximum(0, -((d - k * inrate) // outrate))
+        # np.take gathers whole frames many times faster than indexing the rows of ``extended``
+        current = np.take(extended, consumed + 1, axis=0).reshape(-1)
+        if outrate == 1 and d < outrate:
+            # integer decimation (e.g. 48 kHz to 16 kHz): every output falls exactly on an input frame
+            mixed = current
+        else:
+            position = (d + consumed * outrate - k * inrate).astype(np.float64)
+            # flat arrays with the weights repeated per channel, since broadcasting over a short channel axis is slow
+            weight = np.repeat(position, nchannels)
+            previous = np.take(extended, consumed, axis=0).reshape(-1).astype(np.float64)
+            mixed = np.trunc((previous * weight + current * (outrate - weight)) / outrate)
+        output[first * nchannels:(first + len(k)) * nchannels] = mixed
+    output >>= 32 - 8 * width
+
+    d = d + count * outrate - outputs * inrate
+    new_state = (int(d), tuple((int(p), int(c)) for p, c in zip(extended[count], extended[count + 1])))
+    return to_bytes(output, width), new_state
+
+
+@functools.lru_cache(maxsize=32)
+def polyphase_filter(up, down, taps, rolloff, kaiser_beta):
+    """
+    Kaiser-windowed sinc low-pass filter for resampling by ``up/down``, split into ``up`` phases of ``taps`` coefficients each.
+
+    Designing the filter of an uneven ratio such as 44100 to 16000 (160 phases) costs more than resampling a block, so filters are cached per parameter set and shared, read-only, by every ``StreamResampler`` and every call to ``resample``.
+    """
+    if up == down:
+        phases = np.ones((1, 1))
+    else:
+        length = up * taps
+        # cutoff relative to the Nyquist frequency of the upsampled rate
+        cutoff = rolloff / max(up, down)
+        # an odd number of coefficients centers the filter on a sample, so its delay is a whole number of samples
+        span = length - 1 + length % 2
+        n = np.arange(span) - (span - 1) / 2.0
+        prototype = np.zeros(length)
+        prototype[:span] = cutoff * np.sinc(cutoff * n) * np.kaiser(span, kaiser_beta) * up
+        # phases[p, k] is the coefficient applied to the input sample k steps before the current one
+        phases = prototype.reshape(taps, up).T.copy()
+    phases.flags.writeable = False
+    return phases
+
+
+# outputs per filter phase from which a block is filtered phase by phase instead of gathering a window per output
+PHASE_LOOP_MIN_OUTPUTS = 4
+RESAMPLE_BLOCK = 16384  # input samples filtered at once by ``resample``, to bound the size of the windows it gathers
+
+
+def resample(samples, input_rate, output_rate):
+    """
+    Resamples a whole signal of mono floating point ``samples`` from ``input_rate`` to ``output_rate`` with the ``StreamResampler`` filter, returning a float64 array of ``ceil(len(samples) * output_rate / input_rate)`` samples.
+
+    Unlike a stream, the whole signal is known, so the delay of the filter is compensated: output sample ``i`` lines up with input time ``i * input_rate / output_rate`` and the end of the signal is flushed instead of being held back for the next block.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    resampler = StreamResampler(input_rate, output_rate)
+    if resampler.up == resampler.down:
+        return samples
+    output_length = -(-len(samples) * resampler.up // resampler.down)
+    # starting half a filter later centers the first output on the first input sample
+    shift = (resampler.up * resampler.taps - 1) // 2
+    resampler._position += shift
+    padded = np.concatenate([samples, np.zeros(-(-shift // resampler.up) + 1)])
+    output = np.concatenate([resampler.process_samples(padded[start:start + RESAMPLE_BLOCK])
+                             for start in range(0, len(padded), RESAMPLE_BLOCK)])
+    return output[:output_length]
+
+
+class StreamResampler(object):
+    """
+    Stateful polyphase resampler converting a stream of 16-bit PCM blocks from ``input_rate`` to ``output_rate``, downmixing to mono.
+
+    The conversion ratio is reduced to ``L/M`` (upsample by ``L``, downsample by ``M``) and a single Kaiser-windowed sinc low-pass filter is split into ``L`` phases. The filter spans ``zero_crossings`` lobes of the sinc on each side and cuts off at ``rolloff`` times the lower of the two Nyquist frequencies. Every output sample is then the dot product of one phase with the most recent input samples, computed for a whole block at once.
+
+    The filter history and the fractional position are carried over between calls to ``process``, so consecutive blocks of a stream are resampled without discontinuities at their boundaries. Use one instance per stream.
+    """
+
+    def __init__(self, input_rate, output_rate, channels=1, zero_crossings=16, rolloff=0.9, kaiser_beta=8.6):
+        assert input_rate > 0 and output_rate > 0, "Sample rates must be positive integers"
+        assert channels >= 1, "Channel count must be at least 1"
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        self.channels = int(channels)
+
+        divisor = math.gcd(self.input_rate, self.output_rate)
+        self.up = self.output_rate // divisor
+        self.down = self.input_rate // divisor
+        if self.up == self.down:
+            self.taps = 1
+        else:
+            # taps per phase, enough to cover the filter span on the input time axis
+            self.taps = -(-2 * zero_crossings * max(self.up, self.down) // self.up)
+        self.phases = polyphase_filter(self.up, self.down, self.taps, rolloff, kaiser_beta)
+
+        self.reset()
+
+    def reset(self):
+        """Forgets the filter history, so the next block is treated as the start of a new stream."""
+        self._history = np.zeros(self.taps - 1)
+        # position of the next output sample on the upsampled time axis, relative to the start of the history
+        self._position = (self.taps - 1) * self.up
+
+    def process(self, data):
+        """
+        Resamples the next block of the stream. ``data`` is interleaved 16-bit PCM, as bytes or an int16 array.
+
+        Returns the converted mono 16-bit PCM as bytes.
+        """
+        frames = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        return to_int16(self.process_samples(downmix(frames))).tobytes()
+
+    def process_samples(self, samples):
+        """Resamples the next block of mono floating point ``samples``, returning a float64 array."""
+        if self.up == self.down:
+            return np.asarray(samples, dtype=np.float64)
+
+        signal = np.concatenate([self._history, samples])
+        available = len(signal) * self.up - self._position
+        count = max(0, -(-available // self.down))
+
+        if count >= PHASE_LOOP_MIN_OUTPUTS * self.up:
+            # outputs i and i + up share a phase and read inputs down samples apart: each phase is one
+            # matrix-vector product over a strided view of the signal, without gathering the windows
+            output = np.empty(count)
+            windows = np.lib.stride_tricks.sliding_window_view(signal, self.taps)
+            for first in range(self.up):
+                current, phase = divmod(self._position + first * self.down, self.up)
+                rows = windows[current - self.taps + 1::self.down][:len(range(first, count, self.up))]
+                output[first::self.up] = rows @ self.phases[phase, ::-1]
+        else:
+            positions = self._position + np.arange(count) * self.down
+            current, phase = np.divmod(positions, self.up)
+            # row i holds the taps most recent input samples for output i, newest first
+            windows = signal[current[:, np.newaxis] - np.arange(self.taps)]
+            output = np.einsum("ij,ij->i", self.phases[phase], windows)
+
+        consumed = len(signal) - (self.taps - 1)
+        self._history = signal[consumed:]
+        self._position += count * self.down - consumed * self.up
+        return output
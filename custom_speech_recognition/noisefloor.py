@@ -0,0 +1,72 @@
+"""Continuous estimation of the background noise level of an audio stream."""
+
+import numpy as np
+
+
+class NoiseFloorTracker(object):
+    """
+    Tracks the noise floor of a stream as a low percentile of the buffer energies seen in the last ``window_seconds`` seconds, and derives an energy threshold from it.
+
+    Speech is loud and intermittent, so a low percentile (``percentile``, 10 by default) of a long enough window follows the steady background noise and ignores the speech on top of it, without any need to know which buffers are speech. The threshold is ``noise_floor * ratio``, never below ``min_threshold``.
+
+    Energies are passed in batches (``update`` takes all the buffer energies of a block at once) and stored in a preallocated ring, so following the noise costs one percentile over the window per block. Until ``warmup_seconds`` of audio have been seen, ``threshold`` returns ``None`` and the current threshold should be kept.
+
+    The window is sized in buffers, so the tracker is configured for a stream with ``reset`` (or the ``seconds_per_buffer`` argument) before the first ``update``.
+    """
+
+    def __init__(self, window_seconds=10, percentile=10, ratio=2.0, min_threshold=50, warmup_seconds=1, seconds_per_buffer=None):
+        assert window_seconds > 0, "Window duration must be positive"
+        assert 0 <= percentile <= 100, "Percentile must be between 0 and 100"
+        self.window_seconds = window_seconds
+        self.percentile = percentile
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.warmup_seconds = warmup_seconds
+        self.window = None
+        if seconds_per_buffer is not None:
+            self.reset(seconds_per_buffer)
+
+    def reset(self, seconds_per_buffer):
+        """Starts tracking a new stream made of buffers of ``seconds_per_buffer`` seconds (``StreamingSegmenter`` calls this)."""
+        assert seconds_per_buffer > 0, "Buffer duration must be positive"
+        self.seconds_per_buffer = seconds_per_buffer
+        self.window = np.zeros(max(1, int(round(self.window_seconds / seconds_per_buffer))))
+        self.warmup_buffers = min(len(self.window), int(round(self.warmup_seconds / seconds_per_buffer)))
+        self.position = 0  # total buffers seen
+        self.noise_floor = None
+        self.speech_buffers = 0  # buffers above the threshold in effect when they arrived
+        self.last_threshold = None
+
+    def update(self, energies):
+        """Adds the energies of consecutive buffers and returns the updated threshold (``None`` while warming up)."""
+        energies = np.asarray(energies, dtype=np.float64)[-len(self.window):]
+        if len(energies) == 0:
+            return self.threshold()
+        if self.last_threshold is not None:
+            self.speech_buffers += int(np.count_nonzero(energies > self.last_threshold))
+
+        start = self.position % len(self.window)
+        first = min(len(energies), len(self.window) - start)
+        self.window[start:start + first] = energies[:first]
+        self.window[:len(energies) - first] = energies[first:]
+        self.position += len(energies)
+
+        filled = self.window[:min(self.position, len(self.window))]
+        self.noise_floor = float(np.percentile(filled, self.percentile))
+        self.last_threshold = self.threshold()
+        return self.last_threshold
+
+    def threshold(self):
+        if self.window is None or self.noise_floor is None or self.position < self.warmup_buffers:
+            return None
+        return max(self.min_threshold, self.noise_floor * self.ratio)
+
+    def get_stats(self):
+        if self.window is None:
+            return {}
+        return {
+            "noise_floor": self.noise_floor,
+            "energy_threshold": self.threshold(),
+            "speech_fraction": self.speech_buffers / self.position if self.position else 0.0,
+            "seconds_tracked": self.position * self.seconds_per_buffer,
+        }
@@ -0,0 +1,72 @@
+"""Preallocated single-producer/single-consumer byte ring used between audio callbacks and the listening thread."""
+
+import threading
+
+
+class RingBuffer(object):
+    """
+    Fixed-capacity FIFO of bytes with exactly one writer and one reader.
+
+    The storage is allocated once. The writer only advances ``write_position`` and the reader only advances ``read_position``, each after copying its data, so neither side ever takes a lock: the audio callback can always return immediately, whatever the reading thread is doing.
+
+    When the reader falls behind and the ring is full, incoming data is dropped in whole frames of ``frame_bytes`` bytes and counted in ``overrun_bytes``/``overrun_count`` instead of blocking the writer.
+    """
+
+    def __init__(self, capacity, frame_bytes=1):
+        assert capacity > 0 and frame_bytes > 0, "Capacity and frame size must be positive integers"
+        self.frame_bytes = frame_bytes
+        self.capacity = capacity - capacity % frame_bytes
+        self._buffer = bytearray(self.capacity)
+        self._view = memoryview(self._buffer)
+        self.write_position = 0  # total bytes ever written
+        self.read_position = 0  # total bytes ever read
+        self.overrun_bytes = 0
+        self.overrun_count = 0
+        self.closed = False
+        self._data_ready = threading.Event()
+
+    def available(self):
+        """Number of bytes that can currently be read."""
+        return self.write_position - self.read_position
+
+    def write(self, data):
+        """Appends ``data`` (called by the producer only). Returns the number of bytes actually stored."""
+        data = memoryview(data).cast("B")
+        free = self.capacity - (self.write_position - self.read_position)
+        if len(data) > free:
+            self.overrun_bytes += len(data) - free + free % self.frame_bytes
+            self.overrun_count += 1
+            data = data[:free - free % self.frame_bytes]
+
+        start = self.write_position % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._view[start:start + first] = data[:first]
+        self._view[:len(data) - first] = data[first:]
+        self.write_position += len(data)  # publish only after the copy is complete
+        self._data_ready.set()
+        return len(data)
+
+    def read(self, size, timeout=None):
+        """
+        Removes and returns ``size`` bytes (called by the consumer only), waiting until they are available.
+
+        Returns fewer bytes if the ring is closed, or if ``timeout`` seconds pass first (possibly ``b""``).
+        """
+        while self.available() < size and not self.closed:
+            self._data_ready.clear()
+            if self.available() >= size or self.closed:
+                break
+            if not self._data_ready.wait(timeout) and timeout is not None:
+                break
+
+        size = min(size, self.available())
+        start = self.read_position % self.capacity
+        first = min(size, self.capacity - start)
+        data = bytes(self._view[start:start + first]) + bytes(self._view[:size - first])
+        self.read_position += size
+        return data
+
+    def close(self):
+        """Marks the end of the stream: pending and future reads return whatever data is left."""
+        self.closed = True
+        self._data_ready.set()
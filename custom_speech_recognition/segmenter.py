@@ -0,0 +1,172 @@
+"""Streaming phrase segmentation over an endless stream of audio buffers."""
+
+import collections
+import math
+
+from . import dsp
+from .audio import AudioData
+
+SegmentEvent = collections.namedtuple("SegmentEvent", ["kind", "audio", "start_sample", "end_sample"])
+SegmentEvent.__doc__ = """
+A phrase boundary detected by ``StreamingSegmenter``.
+
+``kind`` is ``"start"`` when a phrase has lasted long enough to count as one, ``"partial"`` while it is still going on and ``"end"`` when it is complete. ``audio`` is an ``AudioData`` with the phrase so far (``None`` for ``"start"``), and ``start_sample``/``end_sample`` are frame offsets of that audio from the beginning of the stream.
+"""
+
+
+class StreamingSegmenter(object):
+    """
+    Splits a continuous stream of audio buffers into phrases, using the same energy rules as ``recognizer_instance.listen``.
+
+    The segmenter is a single state machine that lives as long as the stream: buffers are passed to ``process`` as they are read, and it returns the ``SegmentEvent`` instances they complete. Nothing is rebuilt between phrases and no audio is skipped; the silence after a phrase becomes the leading context (up to ``non_speaking_duration`` seconds) of the next one.
+
+    The thresholds are read from ``recognizer`` (``energy_threshold``, ``pause_threshold``, ``phrase_threshold``, ``non_speaking_duration`` and the dynamic threshold settings) every time they are needed, so changes made while listening take effect immediately. ``phrase_time_limit`` cuts phrases longer than that many seconds, and ``partial_interval``, if not ``None``, emits a ``"partial"`` event at most every that many seconds of phrase audio.
+
+    If ``noise_tracker`` (a ``NoiseFloorTracker``) is given, it receives the energies of every block and sets ``recognizer.energy_threshold`` from the tracked noise floor, in place of the dynamic energy threshold.
+    """
+
+    IDLE, SPEAKING = "idle", "speaking"
+
+    def __init__(self, recognizer, sample_rate, sample_width, chunk_size, channels=1, phrase_time_limit=None, partial_interval=None, noise_tracker=None):
+        assert sample_rate > 0 and chunk_size > 0, "Sample rate and chunk size must be positive integers"
+        self.recognizer = recognizer
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.chunk_size = chunk_size
+        self.channels = channels
+        self.phrase_time_limit = phrase_time_limit
+        self.partial_interval = partial_interval
+        self.seconds_per_buffer = float(chunk_size) / sample_rate
+        self.noise_tracker = noise_tracker
+        if noise_tracker is not None:
+            noise_tracker.reset(self.seconds_per_buffer)
+
+        self.state = self.IDLE
+        self.offset = 0  # frame offset of the next buffer in the stream
+        self.buffers = collections.deque()  # (start frame, data) of the leading context or of the current phrase
+        self.phrase_count = 0  # buffers of the current phrase, after the one that started it
+        self.pause_count = 0  # consecutive non-speaking buffers at the end of the current phrase
+        self.started = False
+        self.last_partial = 0
+        self._pending = b""
+
+    def _buffer_counts(self):
+        recognizer = self.recognizer
+        pause = int(math.ceil(recognizer.pause_threshold / self.seconds_per_buffer))
+        phrase = int(math.ceil(recognizer.phrase_threshold / self.seconds_per_buffer))
+        non_speaking = int(math.ceil(recognizer.non_speaking_duration / self.seconds_per_buffer))
+        return pause, phrase, non_speaking
+
+    def process(self, data):
+        """Consumes the next audio of the stream (any length) and returns the list of events it completes."""
+        data = self._pending + data
+        buffer_bytes = self.chunk_size * self.channels * self.sample_width
+        whole = len(data) - len(data) % buffer_bytes
+        self._pending = data[whole:]
+        if whole == 0:
+            return []
+
+        # the energy of every buffer in the block is measured in a single pass
+        energies = dsp.rms_frames(data[:whole], self.sample_width, self.chunk_size * self.channels)
+        if self.noise_tracker is not None:
+            threshold = self.noise_tracker.update(energies)
+            if threshold is not None:
+                self.recognizer.energy_threshold = threshold
+        energies = energies.tolist()
+        events = []
+        for index, energy in enumerate(energies):
+            self._process_buffer(data[index * buffer_bytes:(index + 1) * buffer_bytes], energy, events)
+        return events
+
+    def flush(self):
+        """Ends the stream: returns the ``"end"`` event of the phrase in progress, if it is long enough to count."""
+        events = []
+        if self._pending:
+            data, self._pending = self._pending, b""
+            self._process_buffer(data, dsp.rms(data, self.sample_width), events)
+        if self.state == self.SPEAKING and self.started:
+            events.append(self._end_phrase(trim=False))
+        self._reset(keep_context=False)
+        return events
+
+    def _process_buffer(self, buffer, energy, events):
+        pause_buffer_count, phrase_buffer_count, non_speaking_buffer_count = self._buffer_counts()
+        recognizer = self.recognizer
+        self.buffers.append((self.offset, buffer))
+        self.offset += len(buffer) // (self.sample_width * self.channels)
+
+        if self.state == self.IDLE:
+            while len(self.buffers) > non_speaking_buffer_count + 1:  # keep only the needed amount of leading context
+                self.buffers.popleft()
+            if energy > recognizer.energy_threshold:
+                self.state = self.SPEAKING
+                self.phrase_count = self.pause_count = 0
+                if phrase_buffer_count == 0:
+                    self._start_phrase(events)
+            elif recognizer.dynamic_energy_threshold and self.noise_tracker is None:
+                # dynamically adjust the energy threshold using asymmetric weighted average
+                damping = recognizer.dynamic_energy_adjustment_damping ** self.seconds_per_buffer
+                target_energy = energy * recognizer.dynamic_energy_ratio
+                recognizer.energy_threshold = recognizer.energy_threshold * damping + target_energy * (1 - damping)
+            return
+
+        self.phrase_count += 1
+        if energy > recognizer.energy_threshold:
+            self.pause_count = 0
+        else:
+            self.pause_count += 1
+
+        if not self.started and self.phrase_count - self.pause_count >= phrase_buffer_count:
+            self._start_phrase(events)
+
+        phrase_seconds = (self.phrase_count + 1) * self.seconds_per_buffer
+        if self.pause_count > pause_buffer_count:  # end of the phrase
+            if self.started:
+                events.append(self._end_phrase(trim=True))
+            else:
+                # too short to be a phrase (a click or a pop): the audio stays only as leading context
+                self._reset(keep_context=True)
+        elif self.phrase_time_limit and phrase_seconds >= self.phrase_time_limit:
+            if self.started:
+                events.append(self._end_phrase(trim=False))
+            else:
+                self._reset(keep_context=True)
+        elif self.started and self.partial_interval and phrase_seconds - self.last_partial >= self.partial_interval:
+            self.last_partial = phrase_seconds
+            events.append(self._event("partial", list(self.buffers)))
+
+    def _start_phrase(self, events):
+        self.started = True
+        self.last_partial = 0
+        events.append(SegmentEvent("start", None, self.buffers[0][0], self.buffers[0][0]))
+
+    def _end_phrase(self, trim):
+        _, _, non_speaking_buffer_count = self._buffer_counts()
+        buffers = list(self.buffers)
+        trailing = []
+        if trim:
+            # remove extra non-speaking buffers at the end, they become the leading context of the next phrase
+            extra = max(0, min(self.pause_count - non_speaking_buffer_count, len(buffers) - 1))
+            if extra:
+                buffers, trailing = buffers[:-extra], buffers[-extra:]
+        event = self._event("end", buffers)
+        self._reset(keep_context=False)
+        self.buffers.extend(trailing)
+        return event
+
+    def _reset(self, keep_context):
+        self.state = self.IDLE
+        self.started = False
+        self.phrase_count = self.pause_count = 0
+        if not keep_context:
+            self.buffers.clear()
+        else:
+            _, _, non_speaking_buffer_count = self._buffer_counts()
+            while len(self.buffers) > non_speaking_buffer_count:
+                self.buffers.popleft()
+
+    def _event(self, kind, buffers):
+        frame_data = b"".join(data for _, data in buffers)
+        start = buffers[0][0]
+        end = start + len(frame_data) // (self.sample_width * self.channels)
+        return SegmentEvent(kind, AudioData(frame_data, self.sample_rate, self.sample_width), start, end)
@@ -1,29 +1,61 @@
-import threading
 from AudioTranscriber import AudioTranscriber
+from AudioQueue import AudioQueue
+from RemoteTranscriber import RemoteTranscriber
+from Startup import Startup
+from concurrent.futures import wait
 import customtkinter as ctk
 import AudioRecorder 
-import queue
-import time
 import sys
 import TranscriberModels
 import subprocess
 
-def write_in_textbox(textbox, text):
-    textbox.delete("0.0", "end")
-    textbox.insert("0.0", text)
+def apply_transcript_update(textbox, update, shown_order):
+    """Riscrive nella textbox solo le righe cambiate; ogni riga è marcata con il tag del suo id"""
+    if update.order == shown_order:
+        for entry_id, line in update.changed.items():
+            tag = f"entry-{entry_id}"
+            start, end = textbox.tag_ranges(tag)
+            textbox.delete(start, end)
+            textbox.insert(start, line, tag)
+        return
 
-def update_transcript_UI(transcriber, textbox):
-    transcript_string = transcriber.get_transcript()
-    write_in_textbox(textbox, transcript_string)
-    textbox.after(300, update_transcript_UI, transcriber, textbox)
+    # Frasi aggiunte, rimosse o riordinate: si ricompone il testo riusando le righe già mostrate
+    lines = {entry_id: textbox.get(*textbox.tag_ranges(f"entry-{entry_id}")) for entry_id in shown_order}
+    lines.update(update.changed)
+    textbox.delete("0.0", "end")
+    for entry_id in shown_order:
+        textbox.tag_delete(f"entry-{entry_id}")
+    for entry_id in update.order:
+        textbox.insert("end", lines[entry_id], f"entry-{entry_id}")
+
+def update_transcript_UI(transcriber, textbox, version=0, shown_order=()):
+    # Nessun lavoro se la trascrizione non è cambiata dall'ultimo aggiornamento
+    update = transcriber.get_transcript_since(version)
+    if update is not None:
+        apply_transcript_update(textbox, update, list(shown_order))
+        version, shown_order = update.version, update.order
+    textbox.after(300, update_transcript_UI, transcriber, textbox, version, shown_order)
 
 def clear_context(transcriber, speaker_queue, mic_queue):
     transcriber.clear_transcript_data()
-
-    with speaker_queue.mutex:
-        speaker_queue.queue.clear()
-    with mic_queue.mutex:
-        mic_queue.queue.clear()
+    # Tutte le sorgenti registrate, compresi eventuali microfoni aggiuntivi
+    transcriber.clear_queues()
+
+def parse_extra_mics(argv):
+    """Microfoni aggiuntivi da riga di comando: --mic INDICE oppure --mic INDICE=ETICHETTA (ripetibile)"""
+    mics = []
+    for i, arg in enumerate(argv):
+        if arg == "--mic" and i + 1 < len(argv):
+            index, _, label = argv[i + 1].partition("=")
+            mics.append((int(index), label or f"Mic {index}"))
+    return mics
+
+def parse_profile(argv):
+    """Profilo del modello da riga di comando (--profile NOME), None per quello scelto in ModelProfiles"""
+    for i, arg in enumerate(argv):
+        if arg == "--profile" and i + 1 < len(argv):
+            return argv[i + 1]
+    return None
 
 def change_language(transcriber, speaker_queue, mic_queue, language_var):
     """Cambia la lingua del modello di trascrizione"""
@@ -37,8 +69,15 @@ def change_language(transcriber, speaker_queue, mic_queue, language_var):
     use_voxtral = '--voxtral' in sys.argv
     use_openvino_genai = '--openvino-genai' in sys.argv
     
-    # Ricrea il modello con la nuova lingua
-    new_model = TranscriberModels.get_model(use_api=use_api, language=new_language, use_ollama=use_ollama, use_openvino=use_openvino, use_voxtral=use_voxtral, use_openvino_genai=use_openvino_genai)
+    if isinstance(transcriber, RemoteTranscriber):
+        # Il modello vive nel processo di inferenza: la lingua viene cambiata lì
+        transcriber.update_model_options(language=new_language)
+        clear_context(transcriber, speaker_queue, mic_queue)
+        return
+
+    # Trascrittore con la nuova lingua: i pesi restano in TranscriberModels.MODEL_CACHE, niente ricaricamento
+    new_model = TranscriberModels.get_model(use_api=use_api, language=new_language, use_ollama=use_ollama, use_openvino=use_openvino, use_voxtral=use_voxtral, use_openvino_genai=use_openvino_genai,
+                                            profile=parse_profile(sys.argv))
     # Non usare model_var.set() perché converte l'oggetto in stringa
     # Aggiorna direttamente il modello nel trascrittore
     transcriber.update_model(new_model)
@@ -119,17 +158,15 @@ def main():
         print("ERROR: The ffmpeg library is not installed. Please install ffmpeg and try again.")
         return
 
-    root = ctk.CTk()
-    speaker_queue = queue.Queue()
-    mic_queue = queue.Queue()
-
-    user_audio_recorder = AudioRecorder.DefaultMicRecorder()
-    user_audio_recorder.record_into_queue(mic_queue)
-
-    time.sleep(2)
+    if '--list-mics' in sys.argv:
+        # Scelta dei microfoni per --mic: dalla cache, riprovando solo i dispositivi nuovi
+        for device_index, name in AudioRecorder.list_working_microphones('--refresh' in sys.argv).items():
+            print(f"{device_index}: {name}")
+        print("Usa --mic INDICE oppure --mic INDICE=ETICHETTA per trascriverli")
+        return
 
-    speaker_audio_recorder = AudioRecorder.DefaultSpeakerRecorder()
-    speaker_audio_recorder.record_into_queue(speaker_queue)
+    startup = Startup()
+    root = ctk.CTk()
 
     # Determina quale modello usare
     use_ollama = '--ollama' in sys.argv
@@ -137,21 +174,51 @@ def main():
     use_openvino = '--openvino' in sys.argv
     use_voxtral = '--voxtral' in sys.argv
     use_openvino_genai = '--openvino-genai' in sys.argv
-    
-    initial_model = TranscriberModels.get_model(use_api=use_api, language="it", use_ollama=use_ollama, use_openvino=use_openvino, use_voxtral=use_voxtral, use_openvino_genai=use_openvino_genai)
-
-    transcriber = AudioTranscriber(user_audio_recorder.source, speaker_audio_recorder.source, initial_model)
-    transcribe = threading.Thread(target=transcriber.transcribe_audio_queue, args=(speaker_queue, mic_queue))
-    transcribe.daemon = True
-    transcribe.start()
-
-    transcript_textbox, language_var = create_ui_components(root, transcriber, speaker_queue, mic_queue)
+    model_options = dict(use_api=use_api, language="it", use_ollama=use_ollama, use_openvino=use_openvino, use_voxtral=use_voxtral, use_openvino_genai=use_openvino_genai,
+                         profile=parse_profile(sys.argv))
+
+    # Con --recalibrate il rumore di fondo viene rimisurato anche se in cache ce n'è una misura recente
+    recalibrate = '--recalibrate' in sys.argv
+    recorder_factories = [
+        ("You", lambda: AudioRecorder.DefaultMicRecorder(recalibrate)),
+        ("Speaker", lambda: AudioRecorder.DefaultSpeakerRecorder(recalibrate)),
+    ] + [(label, lambda device_index=device_index, label=label: AudioRecorder.MicRecorder(device_index, label, recalibrate))
+         for device_index, label in parse_extra_mics(sys.argv)]
+
+    # Calibrazione dei dispositivi, caricamento del modello e costruzione della UI procedono insieme
+    multiprocess = '--multiprocess' in sys.argv
+    if multiprocess:
+        # Con --multiprocess il modello gira in un processo separato e l'audio arriva in memoria condivisa
+        transcriber = RemoteTranscriber(None, None, model_options)
+        create_queue = transcriber.create_queue
+    else:
+        # Il trascrittore parte subito senza modello: l'audio dei dispositivi già calibrati resta in coda
+        transcriber = AudioTranscriber(None, None, None)
+        transcriber.start()
+        startup.load_model(transcriber, lambda: TranscriberModels.get_model(**model_options))
+        create_queue = lambda recorder: AudioQueue()
+    sources = [startup.start_source(transcriber, label, factory, create_queue) for label, factory in recorder_factories]
+
+    with startup.phase("interfaccia"):
+        transcript_textbox, language_var = create_ui_components(root, transcriber, None, None)
+
+    if multiprocess:
+        # Le sorgenti del processo di inferenza vanno registrate prima di avviarlo
+        wait(sources)
+        transcriber.start()
 
     print("PRONTO - Supporto Italiano Attivo")
+    startup.watch_first_caption(transcriber)
 
     update_transcript_UI(transcriber, transcript_textbox)
 
     root.mainloop()
 
+    wait(sources)
+    startup.shutdown()
+    for recorder in startup.recorders:
+        recorder.stop()
+    transcriber.stop()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
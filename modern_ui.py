@@ -1,7 +1,5 @@
 import sys
-import threading
-import queue
-import time
+from concurrent.futures import wait
 from datetime import datetime
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QSplitter, QTextEdit, QListWidget, 
@@ -9,15 +7,21 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QLineEdit, QMessageBox, QDialog, QDialogButtonBox,
                              QFormLayout, QFrame, QScrollArea, QToolBar, QStatusBar)
 from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal, QSize
-from PyQt6.QtGui import QFont, QIcon, QAction, QPalette, QColor
+from PyQt6.QtGui import QFont, QIcon, QAction, QPalette, QColor, QTextCursor
 
 from AudioTranscriber import AudioTranscriber
+from AudioQueue import AudioQueue
+from Startup import Startup
 import AudioRecorder
 import TranscriberModels
 from database import DatabaseManager
 
+def qt_length(text):
+    """Lunghezza di ``text`` nelle posizioni di QTextDocument (unità UTF-16: un'emoji ne occupa due)"""
+    return len(text.encode("utf-16-le")) // 2
+
 class ModernEcouteApp(QMainWindow):
-    def __init__(self, use_api=False, use_ollama=False, use_openvino=False, use_voxtral=False, use_openvino_genai=False, language="it"):
+    def __init__(self, use_api=False, use_ollama=False, use_openvino=False, use_voxtral=False, use_openvino_genai=False, language="it", profile=None):
         super().__init__()
         self.db = DatabaseManager()
         self.current_transcription = None
@@ -31,15 +35,21 @@ class ModernEcouteApp(QMainWindow):
         self.use_voxtral = use_voxtral
         self.use_openvino_genai = use_openvino_genai
         self.language = language
+        self.profile = profile
         
         # Setup audio components
         self.setup_audio()
         
-        # Setup UI
-        self.setup_ui()
-        self.setup_styles()
+        # Setup UI (mentre dispositivi e modello si preparano in background)
+        with self.startup.phase("interfaccia"):
+            self.setup_ui()
+            self.setup_styles()
         
         # Setup timer for UI updates
+        self.transcript_version = 0
+        # Righe mostrate nella text area: id in ordine e testo di ciascuna, per riscrivere solo quelle cambiate
+        self.shown_order = []
+        self.shown_lines = {}
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_transcript_display)
         self.timer.start(300)  # Update every 300ms
@@ -48,41 +58,25 @@ class ModernEcouteApp(QMainWindow):
         self.load_transcriptions()
         
     def setup_audio(self):
-        """Inizializza i componenti audio"""
-        self.speaker_queue = queue.Queue()
-        self.mic_queue = queue.Queue()
-        
-        # Setup audio recorders
-        self.user_audio_recorder = AudioRecorder.DefaultMicRecorder()
-        self.user_audio_recorder.record_into_queue(self.mic_queue)
-        
-        time.sleep(1)  # Wait for mic to initialize
-        
-        self.speaker_audio_recorder = AudioRecorder.DefaultSpeakerRecorder()
-        self.speaker_audio_recorder.record_into_queue(self.speaker_queue)
-        
-        # Setup transcriber
-        initial_model = TranscriberModels.get_model(
+        """Avvia in background calibrazione dei dispositivi e caricamento del modello"""
+        self.startup = Startup()
+        # Il trascrittore parte subito senza modello: l'audio dei dispositivi già calibrati resta in coda
+        self.transcriber = AudioTranscriber(None, None, None)
+        self.transcriber.start()
+        self.startup.load_model(self.transcriber, lambda: TranscriberModels.get_model(
             use_api=self.use_api, 
             language=self.language, 
             use_ollama=self.use_ollama, 
             use_openvino=self.use_openvino, 
             use_voxtral=self.use_voxtral,
-            use_openvino_genai=self.use_openvino_genai
-        )
-        self.transcriber = AudioTranscriber(
-            self.user_audio_recorder.source, 
-            self.speaker_audio_recorder.source, 
-            initial_model
-        )
-        
-        # Start transcription thread
-        self.transcribe_thread = threading.Thread(
-            target=self.transcriber.transcribe_audio_queue, 
-            args=(self.speaker_queue, self.mic_queue)
-        )
-        self.transcribe_thread.daemon = True
-        self.transcribe_thread.start()
+            use_openvino_genai=self.use_openvino_genai,
+            profile=self.profile
+        ))
+        self.sources = [
+            self.startup.start_source(self.transcriber, "You", AudioRecorder.DefaultMicRecorder, lambda recorder: AudioQueue()),
+            self.startup.start_source(self.transcriber, "Speaker", AudioRecorder.DefaultSpeakerRecorder, lambda recorder: AudioQueue()),
+        ]
+        self.startup.watch_first_caption(self.transcriber)
         
     def setup_ui(self):
         """Configura l'interfaccia utente"""
@@ -360,7 +354,7 @@ class ModernEcouteApp(QMainWindow):
         QMessageBox.information(self, "Esportazione", "Funzionalità di esportazione in arrivo!")
         
     def change_language(self, language):
-        """Cambia la lingua del modello"""
+        """Cambia la lingua del modello (i pesi vengono riusati dalla cache di TranscriberModels)"""
         self.language = language
         new_model = TranscriberModels.get_model(
             use_api=self.use_api, 
@@ -368,7 +362,8 @@ class ModernEcouteApp(QMainWindow):
             use_ollama=self.use_ollama, 
             use_openvino=self.use_openvino, 
             use_voxtral=self.use_voxtral,
-            use_openvino_genai=self.use_openvino_genai
+            use_openvino_genai=self.use_openvino_genai,
+            profile=self.profile
         )
         self.transcriber.update_model(new_model)
         self.clear_transcription()
@@ -387,17 +382,65 @@ class ModernEcouteApp(QMainWindow):
     def update_transcript_display(self):
         """Aggiorna il display della trascrizione"""
         if self.is_recording:
-            transcript = self.transcriber.get_transcript()
-            if transcript and transcript.strip():
-                print(f"[DEBUG] Trascrizione ricevuta: {transcript[:100]}...")  # Debug
-                self.text_area.setPlainText(transcript)
+            # Nessun lavoro se la trascrizione non è cambiata dall'ultimo aggiornamento
+            update = self.transcriber.get_transcript_since(self.transcript_version)
+            if update is None:
+                self.update_pipeline_status()
+                return
+            self.transcript_version = update.version
+            self.apply_transcript_update(update)
+            if update.order:
                 # Auto-scroll to bottom
                 cursor = self.text_area.textCursor()
                 cursor.movePosition(cursor.MoveOperation.End)
                 self.text_area.setTextCursor(cursor)
+            self.update_pipeline_status()
+
+    def apply_transcript_update(self, update):
+        """
+        Riscrive nella text area solo le righe cambiate, come main.py fa con i tag della textbox:
+        la posizione di ogni riga nel documento è la somma delle lunghezze delle righe che la precedono
+        """
+        document = self.text_area.document()
+        expected = sum(qt_length(line) for line in self.shown_lines.values())
+        # Con le stesse righe e il documento intatto (nessuna modifica a mano né trascrizione caricata)
+        if update.order == self.shown_order and document.characterCount() - 1 == expected:
+            cursor = QTextCursor(document)
+            cursor.beginEditBlock()
+            position = 0
+            for entry_id in self.shown_order:
+                old_line = self.shown_lines[entry_id]
+                new_line = update.changed.get(entry_id)
+                if new_line is not None and new_line != old_line:
+                    cursor.setPosition(position)
+                    cursor.setPosition(position + qt_length(old_line), QTextCursor.MoveMode.KeepAnchor)
+                    cursor.insertText(new_line)
+                    self.shown_lines[entry_id] = old_line = new_line
+                position += qt_length(old_line)
+            cursor.endEditBlock()
+            return
+
+        # Frasi aggiunte, rimosse o riordinate: si ricompone il testo riusando le righe già mostrate
+        lines = {entry_id: self.shown_lines[entry_id] for entry_id in update.order if entry_id in self.shown_lines}
+        lines.update(update.changed)
+        self.shown_order = list(update.order)
+        self.shown_lines = {entry_id: lines[entry_id] for entry_id in self.shown_order}
+        self.text_area.setPlainText("".join(self.shown_lines.values()))
+
+    def update_pipeline_status(self):
+        """Segnala nella status bar quando il modello non tiene il passo con l'audio"""
+        lagging = {who: stats for who, stats in self.transcriber.get_pipeline_stats().items() if stats["catching_up"]}
+        if lagging:
+            details = ", ".join(f"{who} {stats['lag']:.1f}s" for who, stats in lagging.items())
+            self.status_bar.showMessage(f"Trascrizione in ritardo ({details}) - solo frasi complete", 2000)
                 
     def closeEvent(self, event):
         """Gestisce la chiusura dell'applicazione"""
+        wait(self.sources)
+        self.startup.shutdown()
+        for recorder in self.startup.recorders:
+            recorder.stop()
+        self.transcriber.stop()
         self.db.session.close()
         event.accept()
 
@@ -416,9 +459,12 @@ def main():
     
     # Determine language
     language = "it"  # Default
+    profile = None  # Profilo scelto in ModelProfiles
     for arg in sys.argv:
         if arg.startswith('--lang='):
             language = arg.split('=')[1]
+        elif arg.startswith('--profile='):
+            profile = arg.split('=')[1]
     
     # Show which model is being used
     model_type = "FasterWhisper (Local)"
@@ -442,7 +488,8 @@ def main():
         use_openvino=use_openvino, 
         use_voxtral=use_voxtral,
         use_openvino_genai=use_openvino_genai,
-        language=language
+        language=language,
+        profile=profile
     )
     window.show()
     
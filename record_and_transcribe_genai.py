@@ -6,8 +6,6 @@ Basato sul codice originale fornito dall'utente
 
 import pyaudio
 import numpy as np
-import tempfile
-import soundfile as sf
 import time
 import sys
 import TranscriberModels
@@ -57,12 +55,6 @@ def record_audio(duration=5, sample_rate=16000, chunk_size=1024):
     audio_data = np.frombuffer(b''.join(frames), dtype=np.float32)
     return audio_data, sample_rate
 
-def save_audio_to_temp_file(audio_data, sample_rate):
-    """Salva l'audio in un file temporaneo"""
-    temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-    sf.write(temp_file.name, audio_data, sample_rate)
-    return temp_file.name
-
 def main():
     # Parametri configurabili
     duration = 5  # secondi
@@ -105,34 +97,22 @@ def main():
             print()
             audio_sample, sample_rate = record_audio(duration=duration)
             
-            # Salva in file temporaneo
-            temp_audio_file = save_audio_to_temp_file(audio_sample, sample_rate)
+            # Trascrivi l'audio registrato direttamente dalla memoria
+            print("🔄 Trascrizione in corso...")
+            start_time = time.time()
+            result = model.get_transcription_array(audio_sample, sample_rate)
+            end_time = time.time()
             
-            try:
-                # Trascrivi l'audio registrato
-                print("🔄 Trascrizione in corso...")
-                start_time = time.time()
-                result = model.get_transcription(temp_audio_file)
-                end_time = time.time()
-                
-                print()
-                print("📝 TRASCRIZIONE:")
-                print("=" * 30)
-                if result:
-                    print(result)
-                else:
-                    print("⚠️  Nessun testo rilevato")
-                print("=" * 30)
-                print(f"⏱️  Tempo di elaborazione: {end_time - start_time:.2f}s")
-                print()
-                
-            finally:
-                # Pulizia file temporaneo
-                import os
-                try:
-                    os.unlink(temp_audio_file)
-                except:
-                    pass
+            print()
+            print("📝 TRASCRIZIONE:")
+            print("=" * 30)
+            if result:
+                print(result)
+            else:
+                print("⚠️  Nessun testo rilevato")
+            print("=" * 30)
+            print(f"⏱️  Tempo di elaborazione: {end_time - start_time:.2f}s")
+            print()
                     
     except KeyboardInterrupt:
         print("\n⏹️  Interrotto dall'utente")
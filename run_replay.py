@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Esecuzione senza interfaccia né scheda audio: riproduce file audio attraverso la catena
+recorder -> coda -> AudioTranscriber e misura latenza delle didascalie e throughput.
+
+Uso: python run_replay.py file1.wav [file2.flac ...] [--speed 1|4|fast] [--openvino|--api|...]
+Ogni file diventa una sorgente separata, etichettata con il nome del file.
+"""
+
+import os
+import sys
+import time
+import threading
+import TranscriberModels
+from AudioQueue import AudioQueue
+from AudioRecorder import ReplayRecorder
+from AudioTranscriber import AudioTranscriber
+
+class MeasuringTranscriber(AudioTranscriber):
+    """AudioTranscriber che annota quando ogni blocco in coda arriva nella trascrizione"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorders = {}
+        self.latencies = []
+        self.latencies_lock = threading.Lock()
+
+    def publish_transcription(self, who_spoke, text, time_spoken):
+        super().publish_transcription(who_spoke, text, time_spoken)
+        now = time.monotonic()
+        enqueued_at = self.recorders[who_spoke].enqueued_at
+        # Tutti i blocchi fino a time_spoken sono ora nella trascrizione
+        for chunk_time in [chunk_time for chunk_time in list(enqueued_at) if chunk_time <= time_spoken]:
+            with self.latencies_lock:
+                self.latencies.append(now - enqueued_at.pop(chunk_time))
+
+def parse_args(argv):
+    files, speed = [], 1.0
+    args = iter(argv)
+    for arg in args:
+        if arg == "--speed":
+            value = next(args, "1")
+            speed = None if value == "fast" else float(value)
+        elif not arg.startswith("--"):
+            files.append(arg)
+    return files, speed
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main():
+    files, speed = parse_args(sys.argv[1:])
+    if not files:
+        print("❌ Uso: python run_replay.py file1.wav [file2.flac ...] [--speed 1|4|fast] [--openvino|--api|...]")
+        sys.exit(1)
+    for path in files:
+        if not os.path.exists(path):
+            print(f"❌ File non trovato: {path}")
+            sys.exit(1)
+
+    model = TranscriberModels.get_model(
+        use_api='--api' in sys.argv, language="it", use_ollama='--ollama' in sys.argv,
+        use_openvino='--openvino' in sys.argv, use_voxtral='--voxtral' in sys.argv,
+        use_openvino_genai='--openvino-genai' in sys.argv)
+
+    transcriber = MeasuringTranscriber(None, None, model)
+    recorders = []
+    for path in files:
+        recorder = ReplayRecorder(path, speed)
+        name = recorder.name
+        while name in transcriber.audio_sources:
+            name += "'"
+        audio_queue = AudioQueue()
+        transcriber.add_source(name, recorder, audio_queue)
+        transcriber.recorders[name] = recorder
+        recorders.append((recorder, audio_queue))
+
+    speed_label = "massima" if speed is None else f"{speed:g}x"
+    print(f"🚀 Riproduzione di {len(files)} file a velocità {speed_label}...")
+    transcriber.start()
+    start = time.monotonic()
+    for recorder, audio_queue in recorders:
+        recorder.record_into_queue(audio_queue)
+
+    # Finito quando tutti i file sono stati letti e tutto l'audio in coda è stato trascritto
+    while True:
+        time.sleep(0.05)
+        with transcriber.transcript_lock:
+            busy = transcriber.in_flight or any(info["pending_final"] for info in transcriber.audio_sources.values())
+        if all(recorder.finished and audio_queue.empty() for recorder, audio_queue in recorders) and not busy:
+            break
+    elapsed = time.monotonic() - start
+    transcriber.stop()
+    for recorder, _ in recorders:
+        recorder.stop()
+
+    audio_seconds = sum(recorder.source.FRAME_COUNT / recorder.source.SAMPLE_RATE for recorder, _ in recorders
+                        if recorder.source.FRAME_COUNT)
+    print("\n" + transcriber.get_transcript())
+    print(f"⏱️  Audio: {audio_seconds:.1f} s in {elapsed:.1f} s -> throughput {audio_seconds / elapsed:.2f}x tempo reale")
+    if transcriber.latencies:
+        latencies = transcriber.latencies
+        print(f"⏱️  Latenza coda -> didascalia su {len(latencies)} blocchi: p50 {percentile(latencies, 0.5):.2f} s, "
+              f"p95 {percentile(latencies, 0.95):.2f} s, max {max(latencies):.2f} s")
+    for who, stats in transcriber.get_pipeline_stats().items():
+        print(f"📊 {who}: {stats}")
+
+if __name__ == "__main__":
+    main()
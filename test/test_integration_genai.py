@@ -3,7 +3,6 @@
 Test integrazione OpenVINO GenAI con registrazione microfono e speaker
 """
 import queue
-import threading
 import time
 from datetime import datetime
 
@@ -87,8 +86,8 @@ def test_real_audio_recording():
         print("4. Inizializzazione AudioTranscriber...")
         # Inizializza il trascrittore
         transcriber = AudioTranscriber(
-            mic_source=mic_recorder.source,
-            speaker_source=speaker_recorder.source, 
+            mic_source=mic_recorder,
+            speaker_source=speaker_recorder,
             model=model
         )
         
@@ -103,13 +102,8 @@ def test_real_audio_recording():
         speaker_recorder.record_into_queue(speaker_queue)
         
         print("7. Avvio thread di trascrizione...")
-        # Avvia il thread di trascrizione
-        transcription_thread = threading.Thread(
-            target=transcriber.transcribe_audio_queue,
-            args=(speaker_queue, mic_queue),
-            daemon=True
-        )
-        transcription_thread.start()
+        # Avvia il thread di trascrizione collegando le code alle sorgenti "Speaker" e "You"
+        transcriber.start(speaker_queue, mic_queue)
         
         print("\n🎙️ REGISTRAZIONE ATTIVA! Parla nel microfono o riproduci audio...")
         print("⏱️  Registrerò per 30 secondi...")
@@ -132,6 +126,7 @@ def test_real_audio_recording():
                     print("-" * 50)
                     last_transcript = current_transcript
         
+        transcriber.stop()
         print(f"\n✅ Test di registrazione completato!")
         print(f"📊 Trascrizione finale:")
         final_transcript = transcriber.get_transcript()
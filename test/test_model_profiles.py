@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test dei profili dei modelli: ereditarietà dei profili personalizzati, scelta salvata, auto-tuner
+(con benchmark_profile sostituito, senza caricare modelli) e campi non accettati dal backend
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# File di configurazione temporaneo, impostato prima dell'import come farebbe l'utente
+CONFIG_DIR = tempfile.mkdtemp()
+os.environ["ECOUTE_MODEL_PROFILES"] = os.path.join(CONFIG_DIR, "model_profiles.json")
+
+import ModelProfiles
+
+BACKEND = "faster-whisper"
+# Real-time factor finto per profilo: accurate è troppo lento, balanced il primo entro RTF_TARGET
+FAKE_RTF = {"accurate": 0.9, "balanced": 0.4, "fast": 0.2, "realtime": 0.1}
+
+def reset_config():
+    if os.path.exists(ModelProfiles.MODEL_PROFILES_PATH):
+        os.unlink(ModelProfiles.MODEL_PROFILES_PATH)
+
+def write_user_profiles(profiles):
+    config = ModelProfiles.load_config()
+    config["profiles"] = profiles
+    ModelProfiles.save_config(config)
+
+def test_inheritance():
+    """Un profilo personalizzato eredita dal preset omonimo, o da DEFAULT_PROFILE se è nuovo"""
+    print("📝 Ereditarietà dei profili...")
+    reset_config()
+    write_user_profiles({BACKEND: {"balanced": {"beam_size": 3}, "custom": {"model_name": "small", "quality": 2.5}}})
+    profiles = ModelProfiles.list_profiles(BACKEND)
+    balanced = ModelProfiles.BUILTIN_PROFILES[BACKEND]["balanced"]
+    checks = {
+        "campo ridefinito": profiles["balanced"]["beam_size"] == 3,
+        "campi del preset": profiles["balanced"]["model_name"] == balanced["model_name"],
+        "nuovo profilo da DEFAULT_PROFILE": profiles["custom"]["draft_model_name"] == balanced["draft_model_name"],
+        "nuovo profilo, campo proprio": profiles["custom"]["model_name"] == "small",
+        "ordine per qualità": list(profiles) == ["realtime", "fast", "custom", "balanced", "accurate"],
+        "metadati esclusi": not set(ModelProfiles.get_profile(BACKEND, "custom")) & set(ModelProfiles.PROFILE_METADATA),
+    }
+    failed = [name for name, ok in checks.items() if not ok]
+    if failed:
+        print(f"❌ Ereditarietà errata: {', '.join(failed)}")
+        return False
+    print("✅ Profili ereditati correttamente")
+    return True
+
+def test_select_profile():
+    """select_profile salva la scelta e rifiuta i profili sconosciuti"""
+    print("📝 Scelta del profilo...")
+    reset_config()
+    if ModelProfiles.selected_profile(BACKEND) != ModelProfiles.DEFAULT_PROFILE:
+        print("❌ Senza configurazione il profilo scelto non è DEFAULT_PROFILE")
+        return False
+    ModelProfiles.select_profile(BACKEND, "fast")
+    if ModelProfiles.selected_profile(BACKEND) != "fast" or ModelProfiles.get_profile(BACKEND)["model_name"] != "small":
+        print("❌ La scelta non è stata salvata")
+        return False
+    try:
+        ModelProfiles.select_profile(BACKEND, "inesistente")
+        print("❌ Profilo sconosciuto accettato")
+        return False
+    except ValueError:
+        pass
+    print("✅ Scelta salvata, profili sconosciuti rifiutati")
+    return True
+
+def run_autotune(rtf, failing=()):
+    """Esegue l'auto-tuner con benchmark_profile sostituito; restituisce (scelto, misurati)"""
+    measured = []
+
+    def fake_benchmark(backend, name, samples, sample_rate, language="it", runs=1, path=None):
+        measured.append(name)
+        if name in failing:
+            raise RuntimeError("modello non disponibile")
+        return {"rtf": rtf[name], "draft_rtf": rtf[name], "final_rtf": rtf[name], "load_seconds": 0.0}
+
+    original = ModelProfiles.benchmark_profile
+    ModelProfiles.benchmark_profile = fake_benchmark
+    try:
+        chosen, _ = ModelProfiles.autotune(BACKEND, target_rtf=0.5, samples=[0] * 16000)
+    finally:
+        ModelProfiles.benchmark_profile = original
+    return chosen, measured
+
+def test_autotune():
+    """L'auto-tuner sceglie il più accurato entro il target, altrimenti il più veloce misurato"""
+    print("📝 Auto-tuner...")
+    reset_config()
+    chosen, measured = run_autotune(FAKE_RTF)
+    if chosen != "balanced" or measured != ["accurate", "balanced"]:
+        print(f"❌ Scelto {chosen} dopo aver misurato {measured}, atteso balanced dopo accurate e balanced")
+        return False
+    if ModelProfiles.selected_profile(BACKEND) != "balanced":
+        print("❌ La scelta dell'auto-tuner non è stata salvata")
+        return False
+
+    reset_config()
+    chosen, measured = run_autotune({name: rtf + 1.0 for name, rtf in FAKE_RTF.items()}, failing=("realtime",))
+    if chosen != "fast" or len(measured) != len(FAKE_RTF):
+        print(f"❌ Nessun profilo entro il target: scelto {chosen}, atteso fast (realtime non caricabile)")
+        return False
+    print("✅ Auto-tuner corretto")
+    return True
+
+def test_unknown_fields():
+    """Un profilo con campi che il costruttore del backend non accetta dà un ValueError chiaro"""
+    print("📝 Campi non accettati dal backend...")
+    reset_config()
+    write_user_profiles({"openvino": {"fast": {"model_name": "tiny"}}, BACKEND: {"balanced": {"beam": 3}}})
+    success = True
+    for backend, name in (("openvino", "fast"), (BACKEND, "balanced")):
+        try:
+            ModelProfiles.get_profile(backend, name)
+            print(f"❌ Profilo {backend}/{name} accettato")
+            success = False
+        except ValueError as e:
+            print(f"   {e}")
+    if ModelProfiles.get_profile("ollama") != {}:
+        print("❌ Un backend senza profili deve ricevere un dizionario vuoto")
+        success = False
+    if success:
+        print("✅ Campi sconosciuti rifiutati prima di get_model")
+    return success
+
+if __name__ == "__main__":
+    print("🚀 Avvio test dei profili dei modelli...\n")
+
+    success = True
+    success &= test_inheritance()
+    success &= test_select_profile()
+    success &= test_autotune()
+    success &= test_unknown_fields()
+    reset_config()
+
+    if success:
+        print("\n✅ Tutti i test sono passati!")
+        sys.exit(0)
+    else:
+        print("\n❌ Alcuni test sono falliti.")
+        sys.exit(1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test della soglia adattiva (NoiseFloorTracker) contro la soglia fissa, su audio sintetico:
+rumore di fondo forte con parlato sopra, poi ambiente silenzioso con un parlatore a bassa voce
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import custom_speech_recognition as sr
+
+SAMPLE_RATE = 16000
+CHUNK = 480  # 30 ms, come i blocchi dei recorder
+FIXED_THRESHOLD = 1000  # ENERGY_THRESHOLD di AudioRecorder
+
+def synthetic_stream(seed=0):
+    """Restituisce (audio int16 in byte, intervalli in secondi in cui c'è parlato)"""
+    rng = np.random.default_rng(seed)
+    parts, speech, position = [], [], 0.0
+
+    def add(seconds, rms, is_speech=False):
+        nonlocal position
+        parts.append(rng.normal(0, rms, int(seconds * SAMPLE_RATE)))
+        if is_speech:
+            speech.append((position, position + seconds))
+        position += seconds
+
+    # Ventola o condizionatore sopra la soglia fissa, con parlato forte
+    add(2, 1500)
+    for _ in range(3):
+        add(1, 6000, is_speech=True)
+        add(5, 1500)
+    # Stanza silenziosa, parlatore a bassa voce sotto la soglia fissa
+    for _ in range(3):
+        add(5, 100)
+        add(1, 700, is_speech=True)
+    add(3, 100)
+    audio = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    return audio.tobytes(), speech
+
+def segment(audio, noise_tracker):
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = FIXED_THRESHOLD
+    recognizer.dynamic_energy_threshold = False
+    segmenter = sr.StreamingSegmenter(recognizer, SAMPLE_RATE, 2, CHUNK, phrase_time_limit=3, noise_tracker=noise_tracker)
+    events = []
+    for i in range(0, len(audio), CHUNK * 2):
+        events += segmenter.process(audio[i:i + CHUNK * 2])
+    events += segmenter.flush()
+    return [event for event in events if event.kind == "end"]
+
+def summarize(phrases, speech):
+    """Secondi di audio mandati al modello e frasi parlate raggiunte da almeno una chiamata"""
+    seconds = sum((phrase.end_sample - phrase.start_sample) / SAMPLE_RATE for phrase in phrases)
+    found = sum(any(phrase.start_sample / SAMPLE_RATE < end and phrase.end_sample / SAMPLE_RATE > start for phrase in phrases)
+                for start, end in speech)
+    return seconds, found
+
+def test_adaptive_threshold():
+    """Con la soglia adattiva meno audio senza parlato arriva al modello e nessuna frase va persa"""
+    print("📝 Confronto soglia fissa / adattiva...")
+    audio, speech = synthetic_stream()
+    fixed_seconds, fixed_found = summarize(segment(audio, None), speech)
+    tracker = sr.NoiseFloorTracker()
+    tracked_seconds, tracked_found = summarize(segment(audio, tracker), speech)
+    print(f"   Soglia fissa: {fixed_seconds:.1f} s al modello, {fixed_found}/{len(speech)} frasi")
+    print(f"   Soglia adattiva: {tracked_seconds:.1f} s al modello, {tracked_found}/{len(speech)} frasi")
+    print(f"   Statistiche: {tracker.get_stats()}")
+
+    if tracked_found < fixed_found:
+        print("❌ La soglia adattiva perde frasi che la soglia fissa trova")
+        return False
+    if tracked_seconds >= fixed_seconds:
+        print("❌ La soglia adattiva non riduce l'audio mandato al modello")
+        return False
+    print("✅ Meno audio al modello, nessuna frase persa")
+    return True
+
+def test_batched_updates():
+    """Aggiornare a blocchi o un buffer alla volta deve dare la stessa stima"""
+    print("📝 Confronto aggiornamenti a blocchi / singoli...")
+    energies = np.random.default_rng(1).uniform(50, 3000, 2000)
+    batched, single = sr.NoiseFloorTracker(seconds_per_buffer=0.03), sr.NoiseFloorTracker(seconds_per_buffer=0.03)
+    for i in range(0, len(energies), 37):
+        batched.update(energies[i:i + 37])
+    for energy in energies:
+        single.update([energy])
+    if batched.noise_floor != single.noise_floor:
+        print(f"❌ Stime diverse: {batched.noise_floor} / {single.noise_floor}")
+        return False
+    print("✅ Stima identica")
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Avvio test della soglia adattiva...\n")
+
+    success = True
+    success &= test_adaptive_threshold()
+    success &= test_batched_updates()
+
+    if success:
+        print("\n✅ Tutti i test sono passati!")
+        sys.exit(0)
+    else:
+        print("\n❌ Alcuni test sono falliti.")
+        sys.exit(1)
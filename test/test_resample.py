@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test e benchmark del ricampionamento in memoria (dsp.resample, usato da tutti i backend tramite
+prepare_samples) contro il vecchio percorso di OpenVINO: WAV temporaneo, ffmpeg, rilettura del file
+"""
+
+import os
+import sys
+import wave
+import tempfile
+import subprocess
+import statistics
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from custom_speech_recognition import dsp
+
+RATES = [48000, 44100, 22050, 8000]
+TARGET_RATE = 16000
+CHUNK_SECONDS = 0.1  # un blocco degli altoparlanti
+RUNS = 20
+
+def tone(frequency, sample_rate, seconds=1.0):
+    return np.sin(2 * np.pi * frequency * np.arange(int(sample_rate * seconds)) / sample_rate)
+
+def test_accuracy():
+    """Un tono sotto la nuova Nyquist resta identico, uno sopra viene eliminato (np.interp lo ripiega nella banda)"""
+    print("📝 Precisione e anti-aliasing...")
+    success = True
+    for rate in RATES:
+        output = dsp.resample(tone(440, rate), rate, TARGET_RATE)
+        error = np.max(np.abs(output - tone(440, TARGET_RATE)[:len(output)])[100:-100])
+        alias_rms, interp_rms = 0.0, 0.0
+        if rate > TARGET_RATE * 1.2:
+            high = tone(TARGET_RATE * 0.6, rate)
+            alias_rms = np.sqrt(np.mean(dsp.resample(high, rate, TARGET_RATE) ** 2))
+            positions = np.arange(len(output)) * (rate / TARGET_RATE)
+            interp_rms = np.sqrt(np.mean(np.interp(positions, np.arange(len(high)), high) ** 2))
+        print(f"   {rate} Hz: errore max {error:.5f}, alias {alias_rms:.4f} (np.interp {interp_rms:.4f})")
+        if error > 1e-3 or alias_rms > 0.01:
+            success = False
+    print("✅ Ricampionamento accurato" if success else "❌ Errore o aliasing oltre la soglia")
+    return success
+
+def test_streaming_matches_block():
+    """StreamResampler a blocchi deve dare lo stesso risultato dell'intero segnale in una volta"""
+    print("📝 Blocchi / segnale intero...")
+    samples = np.random.default_rng(0).normal(0, 3000, 48000)
+    whole = dsp.StreamResampler(48000, TARGET_RATE).process_samples(samples)
+    resampler = dsp.StreamResampler(48000, TARGET_RATE)
+    blocks = np.concatenate([resampler.process_samples(samples[i:i + 1234]) for i in range(0, len(samples), 1234)])
+    if not np.allclose(blocks, whole):
+        print("❌ I confini dei blocchi introducono discontinuità")
+        return False
+    print("✅ Identici")
+    return True
+
+def write_wav(path, samples, sample_rate):
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(dsp.to_int16(samples * 32767).tobytes())
+
+def ffmpeg_resample(path):
+    """Il vecchio percorso: processo ffmpeg su file temporaneo e rilettura del risultato"""
+    fd, output_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        subprocess.run(["ffmpeg", "-i", path, "-ar", str(TARGET_RATE), "-ac", "1", "-y", "-loglevel", "quiet", output_path],
+                       capture_output=True, check=True)
+        with wave.open(output_path, "rb") as wav_file:
+            return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+    finally:
+        os.unlink(output_path)
+
+def median_ms(function):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def test_benchmark():
+    """Tempo per un blocco da 100 ms e per una frase da 10 s a 48kHz, in memoria e con ffmpeg"""
+    print("📝 Benchmark dsp.resample / ffmpeg (48kHz -> 16kHz)...")
+    try:
+        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
+        has_ffmpeg = True
+    except (OSError, subprocess.CalledProcessError):
+        has_ffmpeg = False
+        print("   ⚠️  ffmpeg non trovato: misuro solo il ricampionamento in memoria")
+
+    for seconds in (CHUNK_SECONDS, 10.0):
+        samples = np.random.default_rng(1).normal(0, 0.1, int(48000 * seconds))
+        in_memory = median_ms(lambda: dsp.resample(samples, 48000, TARGET_RATE))
+        line = f"   {seconds:g} s: in memoria {in_memory:.2f} ms"
+        if has_ffmpeg:
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                write_wav(path, samples, 48000)
+                line += f", ffmpeg {median_ms(lambda: ffmpeg_resample(path)):.2f} ms"
+            finally:
+                os.unlink(path)
+        print(line)
+    print("✅ Benchmark completato")
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Avvio test del ricampionamento...\n")
+
+    success = True
+    success &= test_accuracy()
+    success &= test_streaming_matches_block()
+    success &= test_benchmark()
+
+    if success:
+        print("\n✅ Tutti i test sono passati!")
+        sys.exit(0)
+    else:
+        print("\n❌ Alcuni test sono falliti.")
+        sys.exit(1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark di avvio: importare TranscriberModels non deve caricare le librerie dei backend
+(torch, transformers, openvino, ...) e deve restare entro IMPORT_BUDGET_SECONDS
+"""
+
+import os
+import sys
+import json
+import subprocess
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Tempo massimo per "import TranscriberModels" oltre a numpy (che serve comunque a tutta l'app)
+IMPORT_BUDGET_SECONDS = float(os.environ.get("ECOUTE_IMPORT_BUDGET", "0.1"))
+RUNS = 5
+# Moduli che devono essere importati solo quando get_model sceglie il backend corrispondente
+HEAVY_MODULES = ["torch", "faster_whisper", "openai", "keys", "transformers", "optimum", "openvino_genai",
+                 "openvino", "soundfile"]
+
+MEASURE = """
+import sys, json, time
+sys.path.insert(0, {root!r})
+import numpy
+start = time.perf_counter()
+import TranscriberModels
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure_import():
+    """Importa TranscriberModels in un interprete nuovo e restituisce (secondi, moduli pesanti caricati)"""
+    code = MEASURE.format(root=ROOT, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"]
+
+def test_no_heavy_imports():
+    """Nessuna libreria di backend deve essere caricata dal solo import"""
+    print("📝 Controllo moduli caricati da 'import TranscriberModels'...")
+    _, loaded = measure_import()
+    if loaded:
+        print(f"❌ Importati all'avvio: {', '.join(loaded)}")
+        return False
+    print("✅ Nessuna libreria di backend importata")
+    return True
+
+def test_import_time():
+    """Mediana su più interpreti nuovi, confrontata con il budget"""
+    print(f"📝 Tempo di import (mediana di {RUNS} esecuzioni)...")
+    seconds = statistics.median(measure_import()[0] for _ in range(RUNS))
+    print(f"⏱️  import TranscriberModels: {seconds * 1000:.1f} ms (budget {IMPORT_BUDGET_SECONDS * 1000:.0f} ms)")
+    if seconds > IMPORT_BUDGET_SECONDS:
+        print("❌ Tempo di import oltre il budget: regressione all'avvio")
+        return False
+    print("✅ Tempo di import entro il budget")
+    return True
+
+def test_registry():
+    """Ogni opzione di get_model corrisponde a un backend registrato"""
+    print("📝 Controllo registro dei backend...")
+    sys.path.insert(0, ROOT)
+    import TranscriberModels
+    options = [{}, {"use_api": True}, {"use_ollama": True}, {"use_openvino": True},
+               {"use_voxtral": True}, {"use_openvino_genai": True}]
+    missing = [option for option in options if TranscriberModels.select_backend(**option) not in TranscriberModels.BACKENDS]
+    if missing:
+        print(f"❌ Opzioni senza backend: {missing}")
+        return False
+    available = [name for name in TranscriberModels.BACKENDS if TranscriberModels.backend_available(name)]
+    print(f"✅ Backend registrati: {', '.join(TranscriberModels.BACKENDS)} (installati: {', '.join(available) or 'nessuno'})")
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Avvio benchmark di avvio...\n")
+
+    success = True
+    success &= test_no_heavy_imports()
+    success &= test_import_time()
+    success &= test_registry()
+
+    if success:
+        print("\n✅ Tutti i test sono passati!")
+        sys.exit(0)
+    else:
+        print("\n❌ Alcuni test sono falliti.")
+        sys.exit(1)